@@ -0,0 +1,105 @@
+"""Shared, pooled HTTP client for litellm calls.
+
+Without a shared client each provider handler may build its own HTTP client, so
+requests pay for fresh TCP (and TLS) handshakes, which adds up with concurrent
+requests to one provider. ``shared_client`` installs a single keep-alive
+``httpx.Client`` (HTTP/2 when the ``h2`` package is available) as
+``litellm.client_session`` for the duration of a run. OpenAI-compatible
+providers (openai, azure, lm_studio, deepseek, ...) send every request through
+it; other providers keep litellm's own cached clients.
+
+Connection reuse is measured with httpcore's ``trace`` request extension: every
+new connection emits ``connection.connect_tcp`` (and ``connection.start_tls``
+for HTTPS) events, so requests minus connections is the number of reused ones.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+
+class ConnectionStats:
+    """Thread-safe counters of requests, new connections and TLS handshakes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def on_request(self, request) -> None:
+        """httpx request event hook: count the request and attach the tracer."""
+        with self._lock:
+            self.requests += 1
+        request.extensions = {**request.extensions, "trace": self._trace}
+
+    @property
+    def reused(self) -> int:
+        return max(0, self.requests - self.connections)
+
+    def summary(self) -> str:
+        if not self.requests:
+            return "connections: no requests through the shared pool"
+        ratio = self.reused / self.requests
+        return (
+            f"connections: {self.requests} requests over {self.connections} connections "
+            f"({self.tls_handshakes} TLS handshakes), {ratio:.0%} reused"
+        )
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def make_client(pool_size: int = 10, http2: bool = True, timeout: Optional[float] = 600,
+                keepalive_expiry: float = 30.0, stats: Optional[ConnectionStats] = None):
+    """Build a pooled keep-alive ``httpx.Client``; returns ``(client, stats)``."""
+    import httpx
+
+    stats = stats or ConnectionStats()
+    limits = httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=keepalive_expiry,
+    )
+    client = httpx.Client(
+        limits=limits,
+        http2=http2 and _h2_available(),
+        timeout=timeout,
+        event_hooks={"request": [stats.on_request]},
+    )
+    return client, stats
+
+
+@contextmanager
+def shared_client(pool_size: int = 10, http2: bool = True, timeout: Optional[float] = 600):
+    """Install a pooled client as ``litellm.client_session`` and yield its stats.
+
+    If a session is already installed (e.g. by an outer ``shared_client`` around
+    several runs) it is reused as-is and ``None`` is yielded, so only the owner
+    reports and closes it.
+    """
+    import litellm
+
+    if litellm.client_session is not None:
+        yield None
+        return
+    client, stats = make_client(pool_size=pool_size, http2=http2, timeout=timeout)
+    litellm.client_session = client
+    try:
+        yield stats
+    finally:
+        litellm.client_session = None
+        client.close()
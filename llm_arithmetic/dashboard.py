@@ -0,0 +1,192 @@
+"""Live terminal dashboard for long runs (``run.py --dashboard``).
+
+A drop-in alternative to ``RunProgress`` (same ``advance`` / ``tick`` / ``log``
+interface) that draws, with rich's ``Live``:
+
+- the variant × depth accuracy grid, coloured like ``scripts/heatmap.py``
+- trials done / planned, throughput and projected completion time
+- requests in flight and request latency percentiles
+
+Everything shown is read from the run's ``RunMetrics`` registry when a frame
+is drawn. Frames are drawn by rich's refresh thread at most
+``refresh_per_second`` times a second; the run loop only bumps counters, so
+a slow terminal never holds up trials. Falls back to ``RunProgress`` output
+when stderr is not a terminal.
+"""
+
+import time
+from colorsys import hls_to_rgb
+from typing import Iterable, List
+
+from llm_arithmetic.progress import RunProgress, format_stats
+
+VARIANT_ORDER = [f"{prefix}_{op}" for prefix in ("int", "float") for op in ("add", "sub", "mul", "div")]
+
+
+def heat_text(val: float, metric: str = "accuracy"):
+    """Rich ``Text`` for a rate in [0, 1]: red→green shading, bold for the best value."""
+    from rich.style import Style
+    from rich.text import Text
+
+    display_pct = val * 100
+    # Choose hue: high good for accuracy, low good for rates, with progressive scale for nan_rate
+    if metric == "accuracy":
+        hue_val = val
+    elif metric == "nan_rate":
+        # power mapping for nan_rate: steep initial shading, flatten near high values
+        exponent = 0.3
+        hue_val = 1 - (val ** exponent)
+    else:
+        hue_val = 1 - val
+    hue = hue_val * 120  # 0 to 120 degrees
+    # highlight best cases: accuracy == 100% or rate metrics == 0%
+    if (metric == "accuracy" and val == 1.0) or (metric != "accuracy" and val == 0.0):
+        return Text(f"{display_pct:.1f}%", style=Style(bold=True))
+    # shading: darker reds to brighter greens based on hue_val
+    lightness = 0.3 + 0.4 * hue_val
+    r, g, b = hls_to_rgb(hue / 360, lightness, 1)
+    bg = f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
+    return Text(f"{display_pct:.1f}%", style=Style(color="white", bgcolor=bg))
+
+
+def order_variants(variants: Iterable[str]) -> List[str]:
+    """int_* then float_* in add/sub/mul/div order, anything else after."""
+    variants = sorted(set(variants))
+    ordered = [v for v in VARIANT_ORDER if v in variants]
+    return ordered + [v for v in variants if v not in ordered]
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+
+class RunDashboard:
+    """Rich renderable built from a ``RunMetrics`` snapshot on every refresh."""
+
+    def __init__(self, metrics, total: int, variants: Iterable[str], depths: Iterable[int]):
+        self.metrics = metrics
+        self.total = total
+        self.variants = order_variants(variants)
+        self.depths = sorted(depths)
+        self.done = 0
+        self.start = time.monotonic()
+
+    def cell_counts(self):
+        """{(variant, depth): [correct, total]} from the trials counter."""
+        counts = {}
+        for (model, variant, depth, classification), n in self.metrics.trials.items():
+            if model != self.metrics.model:
+                continue
+            c = counts.setdefault((variant, int(depth)), [0, 0])
+            c[1] += n
+            if classification == "Correct":
+                c[0] += n
+        return counts
+
+    def grid(self):
+        from rich.table import Table
+        from rich.text import Text
+
+        counts = self.cell_counts()
+        table = Table(title="Accuracy (this session)", expand=False)
+        table.add_column("Category", style="bold")
+        for d in self.depths:
+            table.add_column(f"Depth {d}", justify="right")
+        for variant in self.variants:
+            row = [variant]
+            for d in self.depths:
+                correct, n = counts.get((variant, d), (0, 0))
+                row.append(heat_text(correct / n) if n else Text("-", style="dim"))
+            table.add_row(*row)
+        return table
+
+    def status(self):
+        from rich.table import Table
+
+        m = self.metrics
+        model = m.model
+        elapsed = time.monotonic() - self.start
+        session = sum(n for (mod, *_), n in m.trials.items() if mod == model)
+        rate = session / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.total - self.done)
+        eta = _format_duration(remaining / rate) if rate > 0 else "?"
+        tokens = {kind: n for (mod, kind), n in m.tokens.items() if mod == model}
+        pcts = []
+        for label, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            bound = m.latency.quantile(q, model=model)
+            pcts.append(f"{label} ≤{bound:g}s" if bound is not None else f"{label} -")
+
+        table = Table.grid(padding=(0, 2))
+        table.add_column(style="bold")
+        table.add_column()
+        pct = 100 * self.done / self.total if self.total else 100.0
+        table.add_row("Trials", f"{self.done}/{self.total} ({pct:.0f}%)")
+        table.add_row("Throughput", f"{rate:.2f} trials/s, elapsed {_format_duration(elapsed)}, ETA {eta}")
+        table.add_row("In flight", f"{m.in_flight.value(model=model):g}")
+        table.add_row("Latency", "  ".join(pcts))
+        table.add_row("Retries / failed",
+                      f"{m.retries.value(model=model):g} / {m.failed.value(model=model):g}")
+        table.add_row("Usage", format_stats(
+            int(tokens.get("prompt", 0)), int(tokens.get("completion", 0)), m.cost.value(model=model)))
+        return table
+
+    def __rich__(self):
+        from rich.console import Group
+        from rich.panel import Panel
+
+        return Group(Panel(self.status(), title=f"[bold]{self.metrics.model}[/bold]", expand=False), self.grid())
+
+
+class LiveDashboard(RunProgress):
+    """``RunProgress`` replacement that shows a ``RunDashboard`` via rich ``Live``."""
+
+    def __init__(self, total: int, metrics, variants: Iterable[str], depths: Iterable[int],
+                 refresh_per_second: float = 2.0):
+        super().__init__(total)
+        self.view = RunDashboard(metrics, total, variants, depths)
+        self.refresh_per_second = refresh_per_second
+        self._live = None
+
+    def __enter__(self) -> "RunProgress":
+        if self._disable:
+            return super().__enter__()
+        from rich.console import Console
+        from rich.live import Live
+
+        self._start_time = time.monotonic()
+        self.view.start = self._start_time
+        self._live = Live(
+            self.view,
+            console=Console(stderr=True),
+            refresh_per_second=self.refresh_per_second,
+            transient=False,
+        )
+        self._live.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self._live is None:
+            return super().__exit__(exc_type, exc_val, exc_tb)
+        self._live.__exit__(exc_type, exc_val, exc_tb)
+        self._live = None
+
+    def advance(self, n: int) -> None:
+        super().advance(n)
+        self.view.done = self._n
+
+    def tick(self, *, prompt_tokens: int, completion_tokens: int, cost: float) -> None:
+        if self._live is None:
+            super().tick(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost=cost)
+        else:
+            self._n += 1
+        self.view.done = self._n
+
+    def log(self, message: str) -> None:
+        if self._live is not None:
+            self._live.console.print(message, markup=False, highlight=False)
+        else:
+            super().log(message)
+
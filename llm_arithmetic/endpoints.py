@@ -0,0 +1,151 @@
+"""Spread one logical model over several equivalent servers.
+
+When the same model runs on several llama.cpp / vLLM servers, pass every base
+URL as a list: ``--litellm-params '{"api_base": ["http://a:8080/v1",
+"http://b:8080/v1"]}'``. Each request goes to the healthy endpoint with the
+fewest requests outstanding (ties rotate), so faster servers take more of the
+work and throughput scales with the number of servers.
+
+An endpoint is ejected after ``eject_after`` consecutive failed requests.
+Prompt-specific errors (see ``retry.PROMPT_ERRORS``) don't count. A background
+thread also probes every endpoint each ``health_interval`` seconds with
+``GET <api_base>/models``. An ejected endpoint is put back once a probe
+succeeds, and a healthy one that stops answering probes is ejected. If every
+endpoint is ejected, requests still go to the one ejected longest ago rather
+than stalling; the circuit breaker (``retry.CircuitBreaker``) covers a fully
+dead pool.
+
+Each trial records the ``endpoint`` that served it.
+"""
+
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from llm_arithmetic.retry import PROMPT_ERRORS
+
+
+class Endpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.served = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_at: Optional[float] = None
+        self.ejections = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_at is None
+
+
+def probe_models(url: str, api_key: Optional[str] = None, timeout: float = 5.0) -> bool:
+    """Is the server answering? Any non-5xx reply to ``GET <url>/models`` counts."""
+    import httpx
+
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+    try:
+        return httpx.get(url.rstrip("/") + "/models", headers=headers, timeout=timeout).status_code < 500
+    except httpx.HTTPError:
+        return False
+
+
+@dataclass
+class EndpointOptions:
+    """Settings of ``runner.run(endpoint_pool=...)``, used when ``api_base`` is a list."""
+    eject_after: int = 3
+    health_interval: float = 10.0  # 0 disables the health checks
+
+
+class EndpointPool:
+    """Least-outstanding-requests balancing with ejection; thread-safe, a context manager for health checks."""
+
+    def __init__(self, urls: List[str], eject_after: int = 3, health_interval: float = 10.0,
+                 probe: Optional[Callable[[str], bool]] = None, log: Optional[Callable[[str], None]] = None):
+        if not urls:
+            raise ValueError("An endpoint pool needs at least one api_base")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.eject_after = eject_after
+        self.health_interval = health_interval
+        self.probe = probe or probe_models
+        self.log = log or (lambda msg: None)
+        self._lock = threading.Lock()
+        self._rotation = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def acquire(self) -> Endpoint:
+        """Pick the endpoint for the next request and count it as outstanding."""
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.healthy]
+            if not candidates:
+                oldest = min(e.ejected_at for e in self.endpoints)
+                candidates = [e for e in self.endpoints if e.ejected_at == oldest]
+            least = min(e.outstanding for e in candidates)
+            tied = [e for e in candidates if e.outstanding == least]
+            endpoint = tied[next(self._rotation) % len(tied)]
+            endpoint.outstanding += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, ok: bool, error_class: Optional[str] = None) -> None:
+        """Finish a request started with ``acquire``."""
+        with self._lock:
+            endpoint.outstanding -= 1
+            endpoint.served += 1
+            if ok:
+                endpoint.consecutive_failures = 0
+                return
+            endpoint.failures += 1
+            if error_class in PROMPT_ERRORS:
+                return
+            endpoint.consecutive_failures += 1
+            if endpoint.healthy and endpoint.consecutive_failures >= self.eject_after:
+                self._eject(endpoint, f"{endpoint.consecutive_failures} consecutive failures")
+
+    def _eject(self, endpoint: Endpoint, reason: str) -> None:
+        endpoint.ejected_at = time.monotonic()
+        endpoint.ejections += 1
+        self.log(f"endpoint {endpoint.url} ejected: {reason}")
+
+    def check_health(self) -> None:
+        """Probe every endpoint once; reinstate or eject accordingly."""
+        for endpoint in self.endpoints:
+            alive = self.probe(endpoint.url)
+            with self._lock:
+                if alive and not endpoint.healthy:
+                    endpoint.ejected_at = None
+                    endpoint.consecutive_failures = 0
+                    self.log(f"endpoint {endpoint.url} back in the pool")
+                elif not alive and endpoint.healthy:
+                    self._eject(endpoint, "health check failed")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def __enter__(self) -> "EndpointPool":
+        if self.health_interval > 0:
+            self._thread = threading.Thread(target=self._run, name="endpoint-health", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {e.url: e.served for e in self.endpoints}
+
+    def summary(self) -> str:
+        with self._lock:
+            parts = [
+                f"{e.url} {e.served} requests ({e.failures} failed"
+                + (f", ejected {e.ejections}x" if e.ejections else "") + ")"
+                for e in self.endpoints
+            ]
+        return "endpoints: " + "; ".join(parts)
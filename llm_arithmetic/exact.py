@@ -0,0 +1,116 @@
+"""Exact fixed-point arithmetic on scaled integers.
+
+Float operands are fixed-point numbers. ``gen`` used to build and combine
+them with ``Decimal`` under the default 28-digit context. That rounds
+silently once a result has more than 28 significant digits: a depth-13
+``float_mul`` product already has 30. Quantizing such a value raises
+``InvalidOperation``, so deep answers also came out as NaN in
+``parse.parse_response``.
+
+Here a number is an integer coefficient and a scale, ``value = coefficient ×
+10**-scale``, and every operation is done on Python ints, which have no
+precision limit. Values still cross module boundaries (prompts, JSONL, the
+work queue) as ``Decimal``. Those are built from the scaled integer by string
+construction and read back with ``Decimal.as_tuple``; neither step goes
+through the decimal context, so both are exact. Results keep ``Decimal``'s
+exponent conventions: a sum has the larger scale of its operands, and a
+product has the sum of their scales. ``quantize`` and ``div`` round half to
+even, like the default context.
+
+Python refuses to convert ints of more than 4300 digits to and from strings
+(``sys.set_int_max_str_digits``), which caps the depth at about 2000.
+"""
+
+from decimal import Decimal
+from typing import Tuple, Union
+
+Number = Union[int, Decimal]
+
+# the default int <-> str digit limit; larger values can't be written out anyway
+MAX_DIGITS = 4300
+
+
+def to_scaled(value: Number) -> Tuple[int, int]:
+    """(coefficient, scale) with ``value == coefficient * 10**-scale`` and scale >= 0."""
+    if isinstance(value, int):
+        return value, 0
+    sign, digits, exponent = value.as_tuple()
+    if not isinstance(exponent, int):
+        raise ValueError(f"Not a finite number: {value}")
+    if len(digits) + exponent > MAX_DIGITS:
+        raise ValueError(f"More than {MAX_DIGITS} integer digits: {value:.3E}")
+    coefficient = int("".join(map(str, digits)))
+    if sign:
+        coefficient = -coefficient
+    if exponent > 0:
+        return coefficient * 10 ** exponent, 0
+    return coefficient, -exponent
+
+
+def from_scaled(coefficient: int, scale: int) -> Decimal:
+    """The ``Decimal`` equal to ``coefficient * 10**-scale``, with exponent ``-scale``."""
+    return Decimal(f"{coefficient}E{-scale}")
+
+
+def _round_half_even(numerator: int, denominator: int) -> int:
+    """``numerator / denominator`` rounded to an integer, ties to even (denominator > 0)."""
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def rescale(coefficient: int, scale: int, new_scale: int) -> int:
+    """The coefficient of the same value at ``new_scale`` (rounded half-even when shrinking)."""
+    if new_scale >= scale:
+        return coefficient * 10 ** (new_scale - scale)
+    return _round_half_even(coefficient, 10 ** (scale - new_scale))
+
+
+def _aligned(lhs: Number, rhs: Number) -> Tuple[int, int, int]:
+    a, sa = to_scaled(lhs)
+    b, sb = to_scaled(rhs)
+    scale = max(sa, sb)
+    return a * 10 ** (scale - sa), b * 10 ** (scale - sb), scale
+
+
+def add(lhs: Number, rhs: Number) -> Decimal:
+    a, b, scale = _aligned(lhs, rhs)
+    return from_scaled(a + b, scale)
+
+
+def sub(lhs: Number, rhs: Number) -> Decimal:
+    a, b, scale = _aligned(lhs, rhs)
+    return from_scaled(a - b, scale)
+
+
+def abs_diff(lhs: Number, rhs: Number) -> Decimal:
+    a, b, scale = _aligned(lhs, rhs)
+    return from_scaled(abs(a - b), scale)
+
+
+def mul(lhs: Number, rhs: Number) -> Decimal:
+    a, sa = to_scaled(lhs)
+    b, sb = to_scaled(rhs)
+    return from_scaled(a * b, sa + sb)
+
+
+def div(lhs: Number, rhs: Number, places: int) -> Decimal:
+    """``lhs / rhs`` rounded half-even to ``places`` decimals."""
+    a, sa = to_scaled(lhs)
+    b, sb = to_scaled(rhs)
+    if b == 0:
+        raise ZeroDivisionError("division by zero")
+    numerator, denominator = a * 10 ** (places + sb), b * 10 ** sa
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+    return from_scaled(_round_half_even(numerator, denominator), places)
+
+
+def quantize(value: Number, places: int) -> Decimal:
+    """``value`` rounded half-even to exactly ``places`` decimals."""
+    if isinstance(value, Decimal) and value.is_finite() and value.adjusted() < -places - 1:
+        return from_scaled(0, places)  # far below half a unit in the last place (e.g. "1e-999999")
+    coefficient, scale = to_scaled(value)
+    return from_scaled(rescale(coefficient, scale, places), places)
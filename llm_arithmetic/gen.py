@@ -1,49 +1,65 @@
 import random
-from decimal import Decimal, getcontext
 
-# Set sufficient precision for Decimal operations
-getcontext().prec = 28
+from llm_arithmetic import exact
 
+# float operands have two decimal places; float_mul / float_div results four
+FLOAT_PLACES = 2
+RESULT_PLACES = 4
 
-def gen_int_pair(variant: str, depth: int):
+
+def gen_int_pair(variant: str, depth: int, rng=random):
     """
     Generate a pair of integers for the given variant and digit depth.
     For int_div, guarantees an integer quotient.
+    ``rng`` is the random source (a seeded ``random.Random`` for reproducible problems).
     """
     low = 10 ** (depth - 1)
     high = 10 ** depth - 1
     if variant == "int_div":
-        divisor = random.randint(low, high)
-        quotient = random.randint(low, high)
+        divisor = rng.randint(low, high)
+        quotient = rng.randint(low, high)
         dividend = divisor * quotient
         return dividend, divisor
-    lhs = random.randint(low, high)
-    rhs = random.randint(low, high)
+    lhs = rng.randint(low, high)
+    rhs = rng.randint(low, high)
     return lhs, rhs
 
 
-def gen_float_pair(variant: str, depth: int):
+def gen_float_pair(variant: str, depth: int, rng=random):
     """
     Generate a pair of fixed-point floats (Decimal) for the given variant and digit depth.
-    Two decimal places.
+    Two decimal places; drawn as scaled integers, so exact at any depth (see ``exact``).
     """
     low = 10 ** (depth - 1)
     high = 10 ** depth - 1
-    scale = Decimal("0.01")
     int_low = low * 100
     int_high = high * 100
     if variant == "float_div":
-        divisor_int = random.randint(int_low, int_high)
-        quotient_int = random.randint(int_low, int_high)
+        divisor_int = rng.randint(int_low, int_high)
+        quotient_int = rng.randint(int_low, int_high)
         dividend_int = divisor_int * quotient_int
-        dividend = Decimal(dividend_int) * scale
-        divisor = Decimal(divisor_int) * scale
-        return dividend, divisor
-    lhs_int = random.randint(int_low, int_high)
-    rhs_int = random.randint(int_low, int_high)
-    lhs = Decimal(lhs_int) * scale
-    rhs = Decimal(rhs_int) * scale
-    return lhs, rhs
+        return exact.from_scaled(dividend_int, FLOAT_PLACES), exact.from_scaled(divisor_int, FLOAT_PLACES)
+    lhs_int = rng.randint(int_low, int_high)
+    rhs_int = rng.randint(int_low, int_high)
+    return exact.from_scaled(lhs_int, FLOAT_PLACES), exact.from_scaled(rhs_int, FLOAT_PLACES)
+
+
+def gen_pair(variant: str, depth: int, rng=random):
+    """Operands for any variant: ``gen_int_pair`` or ``gen_float_pair``."""
+    if variant.startswith("int"):
+        return gen_int_pair(variant, depth, rng)
+    return gen_float_pair(variant, depth, rng)
+
+
+def slot_problem(seed, variant: str, depth: int, trial_index: int):
+    """
+    Operands of the ``trial_index``-th trial of a cell in the problem set ``seed``.
+    Each grid slot has its own RNG, so the problem doesn't depend on which other
+    slots were drawn, or in which order (shards, batches, work queues, resumes).
+    With ``seed`` None, draws from the module-level RNG.
+    """
+    rng = random.Random(f"{seed}:{variant}:{depth}:{trial_index}") if seed is not None else random
+    return gen_pair(variant, depth, rng)
 
 
 def compute_correct(variant: str, lhs, rhs):
@@ -60,16 +76,13 @@ def compute_correct(variant: str, lhs, rhs):
         if variant.endswith("div"):
             return lhs // rhs
     else:
-        # float variants using Decimal
+        # float variants: exact scaled-integer arithmetic, Decimal results
         if variant.endswith("add"):
-            return lhs + rhs
+            return exact.add(lhs, rhs)
         if variant.endswith("sub"):
-            return lhs - rhs
+            return exact.sub(lhs, rhs)
         if variant.endswith("mul"):
-            result = lhs * rhs
-            return result.quantize(Decimal("0.0000"))
+            return exact.quantize(exact.mul(lhs, rhs), RESULT_PLACES)
         if variant.endswith("div"):
-            result = lhs / rhs
-            # quantize to four decimal places
-            return result.quantize(Decimal("0.0000"))
+            return exact.div(lhs, rhs, RESULT_PLACES)
     raise ValueError(f"Unknown variant: {variant}") 
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""Hedged requests (``run.py --hedge``).
+
+On flaky providers a few requests per run hang for most of ``--timeout`` and
+set the run's makespan. With hedging, a request still outstanding after the
+``quantile`` latency of its variant × depth cell (p95 by default) gets a
+duplicate; the trial takes whichever reply comes first and the other is
+abandoned (its worker thread finishes in the background and is ignored).
+
+Thresholds come from successful requests of this run. A cell with fewer than
+``MIN_SAMPLES`` latencies uses the run-wide quantile, and nothing is hedged
+until the run has ``MIN_SAMPLES`` latencies at all. Duplicates are capped at
+``max_rate`` of dispatched requests.
+
+A hedged trial records ``hedged: true`` and ``hedge_cost``, which is added to its
+``cost``. When the duplicate is still running at write time (the usual case),
+its real usage is never seen, so its cost is estimated as the winner's: same
+prompt, similar answer length.
+"""
+
+import math
+from collections import defaultdict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+MIN_SAMPLES = 10
+
+Cell = Tuple[str, int]
+
+
+def quantile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank quantile of an ascending, non-empty list."""
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class HedgeOptions:
+    """Settings of ``runner.run(hedge=...)``."""
+    quantile: float = 0.95
+    max_rate: float = 0.1
+
+    def policy(self) -> "HedgePolicy":
+        return HedgePolicy(self.quantile, self.max_rate)
+
+
+class Settlement(NamedTuple):
+    """How a finished request of a hedge pair settles its trial (see ``HedgePolicy.settle``)."""
+    result: tuple  # the reply the trial keeps: (response, latency, exception, ...)
+    twin: Optional[Future]  # the other half of the pair, no longer tracked; None if unpaired
+    loser_running: bool  # the losing twin is still running; its cost is estimated
+    loser_response: Any  # the losing twin's reply when it already succeeded
+
+
+class HedgePolicy:
+    """When to fire a duplicate request, from the run's observed latencies.
+
+    It also pairs each hedged future with its duplicate until one of them
+    settles the trial; futures are those of the runner's thread pool and
+    their results are ``(response, latency, exception, ...)`` tuples.
+    """
+
+    def __init__(self, quantile: float = 0.95, max_rate: float = 0.1, min_samples: int = MIN_SAMPLES):
+        self.quantile = quantile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self._by_cell: Dict[Cell, List[float]] = defaultdict(list)
+        self._all: List[float] = []
+        self._cache: Dict[Optional[Cell], float] = {}
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+        self._twins: Dict[Future, Future] = {}  # both ways, while both halves are in flight
+        self.hedged: Set[Future] = set()  # futures that have been half of a pair
+        self._duplicates: Set[Future] = set()
+        self._abandoned: Set[Future] = set()  # losing twins still running in the pool
+
+    def observe(self, cell: Cell, latency: float) -> None:
+        """Record a successful request's latency."""
+        self._by_cell[cell].append(latency)
+        self._all.append(latency)
+        self._cache.pop(cell, None)
+        self._cache.pop(None, None)
+
+    def _quantile(self, key: Optional[Cell], values: List[float]) -> float:
+        if key not in self._cache:
+            self._cache[key] = quantile(sorted(values), self.quantile)
+        return self._cache[key]
+
+    def threshold(self, cell: Cell) -> Optional[float]:
+        """Seconds after which a request for ``cell`` is hedged; None while there is too little data."""
+        values = self._by_cell.get(cell, [])
+        if len(values) >= self.min_samples:
+            return self._quantile(cell, values)
+        if len(self._all) >= self.min_samples:
+            return self._quantile(None, self._all)
+        return None
+
+    def allow(self) -> bool:
+        """Is another duplicate within ``max_rate`` of the requests sent so far?"""
+        return self.hedges + 1 <= self.max_rate * self.requests
+
+    def pair(self, future: Future, duplicate: Future) -> None:
+        """Track ``duplicate`` as the hedge of the outstanding ``future``."""
+        self._twins[future], self._twins[duplicate] = duplicate, future
+        self.hedged.update((future, duplicate))
+        self._duplicates.add(duplicate)
+        self.hedges += 1
+
+    @property
+    def pairs(self) -> int:
+        """Hedge pairs in flight; each takes one request slot, not two."""
+        return len(self._twins) // 2
+
+    def running_losers(self) -> int:
+        """Abandoned twins still occupying a pool thread."""
+        self._abandoned = {f for f in self._abandoned if not f.done()}
+        return len(self._abandoned)
+
+    def settle(self, future: Future, result: tuple) -> Optional[Settlement]:
+        """Settle the trial of a finished ``future``; None while its twin may still succeed.
+
+        A success settles at once and abandons a running twin. A failure waits
+        for a running twin, and loses to a twin that already succeeded.
+        """
+        twin = self._twins.pop(future, None)
+        if twin is None:
+            return Settlement(result, None, False, None)
+        del self._twins[twin]
+        failed = result[2] is not None
+        if failed and not twin.done():
+            return None
+        loser_running, loser_response = False, None
+        if twin.done():
+            other = twin.result()
+            if failed and other[2] is None:
+                result, future = other, twin
+            elif other[2] is None:
+                loser_response = other[0]
+        else:
+            loser_running = True
+            self._abandoned.add(twin)
+        if result[2] is None and future in self._duplicates:
+            self.wins += 1
+        return Settlement(result, twin, loser_running, loser_response)
+
+    def summary(self) -> str:
+        share = self.hedges / self.requests if self.requests else 0.0
+        return (f"hedging: {self.hedges} duplicate requests ({share:.1%} of {self.requests}), "
+                f"{self.wins} finished first")
@@ -3,10 +3,21 @@ from typing import Any, Dict
 from llm_arithmetic.types import Trial
 
 
-def write_trial(trial: Trial, path: str):
+def trial_record(trial: Trial) -> Dict[str, Any]:
     """
-    Append a single trial record to a JSONL file.
+    The JSONL record for a trial (see ``write_trial``).
+    Fields that only some runs set (seed, shard, hedging, packing, cache tokens, ...)
+    are left out when unset, so an ordinary run's records keep the original schema;
+    readers use ``rec.get``.
     """
+    tokens = {
+        "prompt_tokens": trial.prompt_tokens,
+        "completion_tokens": trial.completion_tokens,
+    }
+    if trial.cached_tokens:
+        tokens["cached_tokens"] = trial.cached_tokens
+    if trial.cache_write_tokens:
+        tokens["cache_write_tokens"] = trial.cache_write_tokens
     record: Dict[str, Any] = {
         "model": trial.model,
         "variant": trial.variant,
@@ -17,16 +28,36 @@ def write_trial(trial: Trial, path: str):
         "parsed": trial.parsed,
         "classification": trial.classification,
         "error": trial.error,
-        "tokens": {
-            "prompt_tokens": trial.prompt_tokens,
-            "completion_tokens": trial.completion_tokens
-        },
+        "tokens": tokens,
         "cost": trial.cost,
         "timestamp": trial.timestamp,
         "attempts": trial.attempts,
         "failed_to_get_reply": trial.failed_to_get_reply,
         "extra_context": trial.extra_context
     }
+    optional = {
+        "stop_rule": trial.stop_rule,
+        "latency": round(trial.latency, 3) if trial.latency is not None else None,
+        "seed": trial.seed,
+        "trial_index": trial.trial_index,
+        "shard": trial.shard,
+        "error_class": trial.error_class,
+        "hedged": True if trial.hedged else None,
+        "hedge_cost": trial.hedge_cost if trial.hedged else None,
+        "endpoint": trial.endpoint,
+        "pack_size": trial.pack_size,
+        "pack_position": trial.pack_position,
+        "timeout": round(trial.timeout, 1) if trial.timeout is not None else None
+    }
+    record.update((key, value) for key, value in optional.items() if value is not None)
+    return record
+
+
+def write_trial(trial: Trial, path: str):
+    """
+    Append a single trial record to a JSONL file.
+    """
+    record = trial_record(trial)
     with open(path, "a") as f:
         f.write(json.dumps(record, default=str) + "\n")
 
@@ -0,0 +1,327 @@
+"""Live run metrics in Prometheus / OpenMetrics text format.
+
+A small thread-safe registry (counters, gauges, histograms with labels) that
+the runner updates as trials complete, plus two optional exporters so existing
+monitoring can scrape throughput and alert on stalls:
+
+- ``MetricsServer``: ``GET /metrics`` on a local port (``--metrics-port``);
+  OpenMetrics when the scraper asks for it, Prometheus text 0.0.4 otherwise.
+- ``TextfileExporter``: rewrites a ``.prom`` file atomically every few seconds
+  (``--metrics-textfile``) for node_exporter's textfile collector.
+
+No prometheus_client dependency: the exposition format is a few lines of text.
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, Optional, Tuple
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def items(self):
+        """Snapshot of (label values, value) pairs."""
+        with self._lock:
+            return list(self._values.items())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self, openmetrics: bool):
+        family = self.name[:-len("_total")] if openmetrics and self.name.endswith("_total") else self.name
+        lines = [f"# HELP {family} {self.help}", f"# TYPE {family} counter"]
+        for key, value in sorted(self.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_num(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self, openmetrics: bool):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(self.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_num(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def value(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return dict(state, counts=list(state["counts"])) if state else None
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Upper bucket bound containing the q-quantile (None without observations)."""
+        state = self.value(**labels)
+        if not state or not state["count"]:
+            return None
+        target = q * state["count"]
+        seen = 0
+        for bound, count in zip(self.buckets, state["counts"]):
+            seen += count
+            if seen >= target:
+                return bound
+        return math.inf
+
+    def render(self, openmetrics: bool):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, state in sorted(self.items(), key=lambda kv: kv[0]):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                le = f'le="{_num(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {state['count']}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(state['sum'])}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric):
+                raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self, openmetrics: bool = True) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render(openmetrics))
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class RunMetrics:
+    """The runner's metrics for one model run."""
+
+    def __init__(self, model: str, registry: Optional[Registry] = None):
+        self.model = model
+        self.registry = registry or Registry()
+        r = self.registry
+        self.trials = r.counter(
+            "llm_arith_trials_total", "Trials completed", ("model", "variant", "depth", "classification"))
+        self.requests = r.counter(
+            "llm_arith_requests_total", "Completion requests sent, by outcome", ("model", "outcome"))
+        self.retries = r.counter("llm_arith_retries_total", "Request retries", ("model",))
+        self.failed = r.counter(
+            "llm_arith_failed_replies_total", "Trials with no reply after all retries", ("model",))
+        self.tokens = r.counter("llm_arith_tokens_total", "Tokens used", ("model", "kind"))
+        self.cost = r.counter("llm_arith_cost_usd_total", "Cost in USD", ("model",))
+        self.latency = r.histogram(
+            "llm_arith_request_latency_seconds", "Completion request latency", ("model",))
+        self.in_flight = r.gauge("llm_arith_in_flight_requests", "Requests in flight", ("model",))
+        self.planned = r.gauge("llm_arith_trials_planned", "Trials planned for the run", ("model",))
+        self.resumed = r.gauge("llm_arith_trials_resumed", "Trials loaded from the resume file", ("model",))
+        self.last_trial = r.gauge(
+            "llm_arith_last_trial_timestamp_seconds", "Unix time of the last completed trial", ("model",))
+
+    def request_finished(self, seconds: float, ok: bool) -> None:
+        self.requests.inc(model=self.model, outcome="ok" if ok else "error")
+        self.latency.observe(seconds, model=self.model)
+
+    def trial_finished(self, variant: str, depth: int, classification: str, retries: int,
+                       failed: bool, prompt_tokens: int, completion_tokens: int,
+                       cached_tokens: int, cost: float) -> None:
+        m = self.model
+        self.trials.inc(model=m, variant=variant, depth=depth, classification=classification)
+        if retries:
+            self.retries.inc(retries, model=m)
+        if failed:
+            self.failed.inc(model=m)
+        self.tokens.inc(prompt_tokens, model=m, kind="prompt")
+        self.tokens.inc(completion_tokens, model=m, kind="completion")
+        if cached_tokens:
+            self.tokens.inc(cached_tokens, model=m, kind="cached")
+        self.cost.inc(cost, model=m)
+        self.last_trial.set(time.time(), model=m)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    server: "MetricsServer"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        openmetrics = "application/openmetrics-text" in (self.headers.get("Accept") or "")
+        body = self.server.registry.render(openmetrics=openmetrics).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """Serves ``/metrics`` from a background thread; use as a context manager."""
+
+    daemon_threads = True
+
+    def __init__(self, registry: Registry, port: int = 9464, host: str = "127.0.0.1"):
+        super().__init__((host, port), _MetricsHandler)
+        self.registry = registry
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def __enter__(self) -> "MetricsServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class TextfileExporter:
+    """Periodically writes the registry to ``path`` (tmp file + rename, so readers never see half a file)."""
+
+    def __init__(self, registry: Registry, path: str, interval: float = 5.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def write(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.registry.render(openmetrics=False))
+        os.replace(tmp, self.path)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def __enter__(self) -> "TextfileExporter":
+        self.write()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.write()
+
+
+@contextmanager
+def exporting(registry: Registry, port: Optional[int] = None, textfile: Optional[str] = None):
+    """Run the configured exporters for the duration of the block; yields a list of where to look."""
+    with ExitStack() as stack:
+        targets = []
+        if port is not None:
+            server = stack.enter_context(MetricsServer(registry, port=port))
+            targets.append(server.url)
+        if textfile:
+            stack.enter_context(TextfileExporter(registry, textfile))
+            targets.append(textfile)
+        yield targets
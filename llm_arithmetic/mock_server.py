@@ -0,0 +1,357 @@
+"""Local OpenAI-compatible mock LLM server for exercising the runner end to end.
+
+Monkeypatching ``litellm.completion`` (as ``tests/test_runner_mock.py`` does)
+bypasses networking, so it cannot show how the runner behaves with real
+latency, concurrency, rate limits, server errors or timeouts. This server
+speaks the ``/v1/chat/completions`` protocol (including ``stream: true``), so
+litellm talks to it over HTTP exactly as it would to a provider:
+
+    python -m llm_arithmetic.mock_server --port 8765 --latency lognormal:0.2:0.5 \\
+        --error-rate 0.02 --rate-limit-rate 0.05 --accuracy 2=1,6=0.8,10=0.3
+    uv run run.py --model openai/mock \\
+        --litellm-params '{"api_base": "http://127.0.0.1:8765/v1", "api_key": "mock"}'
+
+It answers the arithmetic prompt correctly with a per-depth probability
+(otherwise with a nearby wrong number), reports plausible token usage and
+keeps request counters for load tests (``scripts/load_test.py``).
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from llm_arithmetic import exact, gen
+
+_EXPR_RE = re.compile(r"(-?\d+(?:\.\d*)?)\s*([+\-×÷])\s*(-?\d+(?:\.\d*)?)\s*$")
+_PACKED_RE = re.compile(r"^\s*(\d+)\.\s+(-?\d+(?:\.\d*)?)\s*([+\-×÷])\s*(-?\d+(?:\.\d*)?)\s*$", re.MULTILINE)
+_OPS = {"+": "add", "-": "sub", "×": "mul", "÷": "div"}
+
+
+def parse_latency(spec: str):
+    """Build a latency sampler (seconds) from a spec string.
+
+    ``0.05`` constant, ``uniform:LOW:HIGH``, ``exp:MEAN`` or
+    ``lognormal:MEDIAN:SIGMA``.
+    """
+    kind, _, rest = str(spec).partition(":")
+    args = [float(x) for x in rest.split(":")] if rest else []
+    if not rest:
+        value = float(kind)
+        return lambda rng: value
+    if kind == "uniform" and len(args) == 2:
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "exp" and len(args) == 1:
+        return lambda rng: rng.expovariate(1 / args[0]) if args[0] > 0 else 0.0
+    if kind == "lognormal" and len(args) == 2:
+        return lambda rng: rng.lognormvariate(math.log(args[0]), args[1])
+    raise ValueError(f"Bad latency spec: {spec!r}")
+
+
+def parse_accuracy(spec: str) -> Dict[int, float]:
+    """Parse ``"2=1,6=0.8,10=0.3"`` into {depth: probability of a correct answer}."""
+    out = {}
+    for part in spec.split(","):
+        if part.strip():
+            depth, p = part.split("=")
+            out[int(depth)] = float(p)
+    return out
+
+
+@dataclass
+class MockConfig:
+    latency: str = "0"
+    latency_per_depth: float = 0.0  # extra seconds per digit of depth, like slower deep problems
+    error_rate: float = 0.0  # fraction of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # fraction answered with HTTP 429 + Retry-After
+    retry_after: float = 1.0
+    accuracy: Dict[int, float] = field(default_factory=dict)  # depth -> P(correct)
+    default_accuracy: float = 1.0
+    completion_tokens_per_depth: int = 0  # simulated reasoning tokens
+    seed: Optional[int] = None
+
+    def accuracy_for(self, depth: int) -> float:
+        """Accuracy at ``depth``; the nearest configured depth at or below it wins."""
+        known = [d for d in self.accuracy if d <= depth]
+        if not known:
+            return self.default_accuracy
+        return self.accuracy[max(known)]
+
+
+class MockStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "max_in_flight": self.max_in_flight,
+            }
+
+
+def answer_for(prompt_text: str, config: MockConfig, rng: random.Random):
+    """Return (answer_text, depth) for the arithmetic prompt in ``prompt_text``.
+
+    A packed prompt (numbered problems, ``prompt.make_packed_prompt``) gets
+    numbered answer lines and the deepest problem's depth.
+    """
+    packed = _PACKED_RE.findall(prompt_text)
+    if packed:
+        answers = [(n, *_answer(_question(a_str, op, b_str), config, rng)) for n, a_str, op, b_str in packed]
+        return "\n".join(f"{n}. {text}" for n, text, _ in answers), max(d for _, _, d in answers)
+    question = parse_question(prompt_text)
+    if question is None:
+        return "I can only do arithmetic.", 0
+    return _answer(question, config, rng)
+
+
+def parse_question(prompt_text: str):
+    """(variant, lhs, rhs, depth) of the problem a single-problem prompt ends with; None if there is none."""
+    m = _EXPR_RE.search(prompt_text.strip())
+    return _question(*m.groups()) if m else None
+
+
+def _question(a_str: str, op: str, b_str: str):
+    is_float = "." in a_str or "." in b_str
+    variant = f"{'float' if is_float else 'int'}_{_OPS[op]}"
+    lhs, rhs = (Decimal(a_str), Decimal(b_str)) if is_float else (int(a_str), int(b_str))
+    # the right operand always has exactly `depth` integer digits
+    depth = len(b_str.lstrip("-").split(".")[0])
+    return variant, lhs, rhs, depth
+
+
+def _answer(question, config: MockConfig, rng: random.Random):
+    variant, lhs, rhs, depth = question
+    correct = gen.compute_correct(variant, lhs, rhs)
+    if rng.random() < config.accuracy_for(depth):
+        return str(correct), depth
+    wrong = exact.add(correct, rng.choice([-1, 1]) * rng.randint(1, 10 ** max(1, depth // 2)))
+    return str(wrong), depth
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockLLMServer"
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid JSON"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        srv = self.server
+        srv.stats.add(requests=1, in_flight=1)
+        try:
+            self._complete(request)
+        finally:
+            srv.stats.add(in_flight=-1)
+
+    def _complete(self, request: dict):
+        srv = self.server
+        config = srv.config
+        with srv.rng_lock:
+            roll = srv.rng.random()
+            latency = srv.latency(srv.rng)
+        if roll < config.rate_limit_rate:
+            srv.stats.add(rate_limited=1)
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit exceeded (mock)", "type": "rate_limit_error"}},
+                headers={"Retry-After": f"{config.retry_after:g}"},
+            )
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            srv.stats.add(errors=1)
+            self._send_json(500, {"error": {"message": "Internal error (mock)", "type": "server_error"}})
+            return
+
+        messages = request.get("messages") or [{}]
+        content = messages[-1].get("content", "")
+        if isinstance(content, list):
+            content = " ".join(b.get("text", "") for b in content if isinstance(b, dict))
+        with srv.rng_lock:
+            answer, depth = answer_for(content, config, srv.rng)
+        time.sleep(max(0.0, latency + config.latency_per_depth * depth))
+
+        prompt_chars = sum(
+            len(m.get("content") if isinstance(m.get("content"), str) else json.dumps(m.get("content")))
+            for m in messages
+        )
+        usage = {
+            "prompt_tokens": max(1, prompt_chars // 4),
+            "completion_tokens": max(1, len(answer) // 3) + config.completion_tokens_per_depth * depth,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        model = request.get("model", "mock")
+        if request.get("stream"):
+            self._stream(completion_id, model, answer, usage)
+            return
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id: str, model: str, answer: str, usage: dict):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def chunk(delta, finish_reason=None, with_usage=False):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if with_usage:
+                payload["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+            self.wfile.flush()
+
+        chunk({"role": "assistant", "content": ""})
+        for i in range(0, len(answer), 4):
+            chunk({"content": answer[i:i + 4]})
+        chunk({}, finish_reason="stop", with_usage=True)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """Threaded mock server; use as a context manager to run it in the background."""
+
+    daemon_threads = True
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.config = config or MockConfig()
+        self.latency = parse_latency(self.config.latency)
+        self.rng = random.Random(self.config.seed)
+        self.rng_lock = threading.Lock()
+        self.stats = MockStats()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api_base(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def litellm_params(self) -> dict:
+        return {"api_base": self.api_base, "api_key": "mock"}
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(
+        latency=args.latency,
+        latency_per_depth=args.latency_per_depth,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        accuracy=parse_accuracy(args.accuracy),
+        completion_tokens_per_depth=args.completion_tokens_per_depth,
+        seed=args.seed,
+    )
+
+
+def add_mock_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--latency", default="0", help="Latency spec: 0.05 | uniform:LO:HI | exp:MEAN | lognormal:MEDIAN:SIGMA")
+    p.add_argument("--latency-per-depth", type=float, default=0.0, help="Extra seconds per digit of depth")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with HTTP 500")
+    p.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with HTTP 429")
+    p.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    p.add_argument("--accuracy", default="", help="Per-depth P(correct), e.g. 2=1,6=0.8,10=0.3")
+    p.add_argument("--completion-tokens-per-depth", type=int, default=0, help="Simulated reasoning tokens per digit")
+    p.add_argument("--seed", type=int, default=None)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Local OpenAI-compatible mock LLM server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    add_mock_arguments(p)
+    args = p.parse_args()
+    server = MockLLMServer(config_from_args(args), host=args.host, port=args.port)
+    print(f"Mock LLM server on {server.api_base} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats.as_dict()))
+
+
+if __name__ == "__main__":
+    main()
@@ -19,12 +19,16 @@ Extraction strategy (in priority order):
    number recognizer.
 
 The classification / error logic (Correct / Deviate / NaN, int vs. float
-quantization) is preserved unchanged.
+quantization) is preserved unchanged. Float answers are quantized and
+compared with the exact scaled-integer helpers in ``exact``, so deep answers
+are not limited by the 28-digit decimal context.
 """
 
 import re
 from decimal import Decimal, InvalidOperation
 
+from llm_arithmetic import exact
+
 # --- number token --------------------------------------------------------
 # sign, an integer part (optionally with a trailing dot like "15.") or a bare
 # fraction (".5"), and an optional scientific exponent.
@@ -77,6 +81,9 @@ def _last_boxed_content(s: str):
     return content
 
 
+_FRAC_RE = re.compile(r"\\[dt]?frac\s*")
+
+
 def _strip_fractions(s: str) -> str:
     """Remove LaTeX ``\\frac{A}{B}`` / ``\\dfrac`` / ``\\tfrac`` expressions.
 
@@ -87,9 +94,9 @@ def _strip_fractions(s: str) -> str:
     i = 0
     n = len(s)
     while i < n:
-        m = re.match(r"\\[dt]?frac\s*", s[i:])
+        m = _FRAC_RE.match(s, i)
         if m:
-            k = i + m.end()
+            k = m.end()
             if k < n and s[k] == "{":
                 j1 = _find_matching_brace(s, k)
                 if j1 != -1 and j1 + 1 < n and s[j1 + 1] == "{":
@@ -117,15 +124,17 @@ def _normalize(s: str) -> str:
     # Scientific notation, only in *unambiguous* forms that carry an explicit
     # exponent marker, so markdown like "**Answer:** 10400" is never mistaken
     # for "× 10^...". A real mantissa (digits) must precede the × sign.
+    # The mantissa starts where a digit run starts: a match can't begin after a
+    # digit, and trying every position of a long digit run is quadratic.
     #   "3.41×10¹⁷"  (superscript exponent)
     s = re.sub(
-        rf"(\d(?:[\d.]*\d)?)\s*{_MULT}\s*10\s*([{_SUP_CHARS}]+)",
+        rf"(?<!\d)(\d(?:[\d.]*\d)?)\s*{_MULT}\s*10\s*([{_SUP_CHARS}]+)",
         lambda m: m.group(1) + "e" + m.group(2).translate(_SUPERSCRIPT),
         s,
     )
     #   "3.41 × 10^17" / "5 * 10 ^ 8"  (caret exponent)
     s = re.sub(
-        rf"(\d(?:[\d.]*\d)?)\s*{_MULT}\s*10\s*\^\s*([+-]?\d+)",
+        rf"(?<!\d)(\d(?:[\d.]*\d)?)\s*{_MULT}\s*10\s*\^\s*([+-]?\d+)",
         r"\1e\2",
         s,
     )
@@ -185,6 +194,35 @@ def extract_number(raw: str):
     return _extract_number(body, prefer_first=False)
 
 
+# "3. 1234", "3) 1234", "**3.** 1234", "- 3: 1234"; the separator must be followed by
+# whitespace so a bare answer like "12.5" is not read as item 12
+_NUMBERED_LINE_RE = re.compile(r"^\s*(?:[-*]\s*)?(?:\*\*)?\(?(\d+)[.):](?:\*\*)?(?:\s+|$)(.*)$")
+
+
+def split_numbered_answers(raw: str, count: int) -> list:
+    """Split a reply to a packed prompt into ``count`` per-problem answer strings.
+
+    Lines are matched by their number (the first line for each number wins);
+    an echoed expression ("3. 12 + 30 = 42") keeps only what follows the last
+    ``=``. Problems without a numbered line get ``""``, which parses as NaN.
+    """
+    answers = [""] * count
+    if not raw:
+        return answers
+    text = _strip_think(raw)
+    for line in text.splitlines():
+        m = _NUMBERED_LINE_RE.match(line)
+        if not m:
+            continue
+        n = int(m.group(1))
+        if 1 <= n <= count and not answers[n - 1]:
+            content = m.group(2).strip()
+            answers[n - 1] = content.rsplit("=", 1)[1].strip() if "=" in content else content
+    if count == 1 and not answers[0]:
+        answers[0] = text.strip()
+    return answers
+
+
 def parse_response(raw: str, correct, variant: str):
     """
     Parse the raw model response, classify it, and compute error if any.
@@ -199,16 +237,15 @@ def parse_response(raw: str, correct, variant: str):
             parsed = int(num)
             error = parsed - correct
         else:
-            parsed = num.quantize(Decimal("0.0000"))
-            error = parsed - correct
+            parsed = exact.quantize(num, 4)
+            error = exact.abs_diff(parsed, correct)
         if parsed == correct:
             return parsed, "Correct", None
         # Deviate
-        error_val = abs(error)
         if variant.startswith("int"):
-            error_out = error_val
+            error_out = abs(error)
         else:
-            error_out = error_val.quantize(Decimal("0.0000"))
+            error_out = exact.quantize(error, 4)
         return parsed, "Deviate", str(error_out)
     except Exception:
         return None, "NaN", None
@@ -0,0 +1,85 @@
+"""Per-model token prices from ``data/models_metadata.csv`` and per-trial cost.
+
+Prices are USD per 1M tokens. ``1m_cached_prompt`` (prompt-cache reads) and
+``1m_cache_write`` (prompt-cache writes, e.g. Anthropic cache creation) are
+optional; when left empty those tokens are billed at the ``1m_prompt`` rate,
+so cost never looks cheaper than what we know the provider charges.
+"""
+
+import csv
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+
+@dataclass
+class Prices:
+    prompt: float = 0.0
+    completion: float = 0.0
+    cached_prompt: float = None
+    cache_write: float = None
+
+    def __post_init__(self):
+        if self.cached_prompt is None:
+            self.cached_prompt = self.prompt
+        if self.cache_write is None:
+            self.cache_write = self.prompt
+
+
+def _price(row: dict, column: str, default=0.0):
+    try:
+        return float(row[column])
+    except Exception as _:
+        return default
+
+
+def load_prices(metadata_file: str) -> Dict[str, Prices]:
+    """Read model -> Prices; an empty dict if the file doesn't exist."""
+    model_prices = {}
+    try:
+        with open(metadata_file, newline='') as mf:
+            reader = csv.DictReader(mf)
+            for row in reader:
+                model = row.get('model')
+                if not model:
+                    continue
+                model_prices[model] = Prices(
+                    prompt=_price(row, '1m_prompt'),
+                    completion=_price(row, '1m_completion'),
+                    cached_prompt=_price(row, '1m_cached_prompt', None),
+                    cache_write=_price(row, '1m_cache_write', None),
+                )
+    except FileNotFoundError:
+        model_prices = {}
+    return model_prices
+
+
+def cache_token_counts(usage) -> Tuple[int, int]:
+    """Return (cache_read_tokens, cache_write_tokens) from a litellm usage object or dict.
+
+    litellm reports cache reads as ``prompt_tokens_details.cached_tokens`` for
+    OpenAI, Anthropic and DeepSeek alike, and Anthropic cache creation as
+    ``cache_creation_input_tokens``; both are included in ``prompt_tokens``.
+    """
+    if not usage:
+        return 0, 0
+    get = usage.get if isinstance(usage, dict) else lambda k, d=None: getattr(usage, k, d)
+    details = get('prompt_tokens_details')
+    if isinstance(details, dict):
+        cached = details.get('cached_tokens')
+    else:
+        cached = getattr(details, 'cached_tokens', None)
+    if cached is None:
+        cached = get('cache_read_input_tokens')
+    written = get('cache_creation_input_tokens')
+    return int(cached or 0), int(written or 0)
+
+
+def trial_cost(prices: Prices, prompt_tokens: int, completion_tokens: int,
+               cached_tokens: int = 0, cache_write_tokens: int = 0) -> float:
+    uncached = max(0, prompt_tokens - cached_tokens - cache_write_tokens)
+    return (
+        uncached * prices.prompt
+        + cached_tokens * prices.cached_prompt
+        + cache_write_tokens * prices.cache_write
+        + completion_tokens * prices.completion
+    ) / 1_000_000
@@ -0,0 +1,153 @@
+"""Run completions in worker processes (``run.py --backend process``).
+
+With an in-process model behind litellm (a custom provider wrapping
+llama-cpp-python or transformers, say) each completion is CPU-bound Python
+and the runner's worker threads serialize on the GIL. The process backend
+sends every request attempt to a pool of worker processes instead: each
+process runs ``--worker-init module:function`` once at start-up (load the
+model, register the litellm custom provider), then serves completions for the
+whole run. Retries, tracing, metrics and writing stay in the parent, which
+receives a small picklable copy of each response.
+
+Workers are started with the ``spawn`` method (the parent has live threads
+for HTTP pools and exporters, which ``fork`` would copy mid-state), so the
+initializer and everything it needs must be importable by module path.
+
+``register_mock_provider`` is a ready-made initializer: a ``mock-local/*``
+provider that answers like the mock server after burning
+``LLM_ARITH_MOCK_CPU_MS`` of CPU, for trying the backend out.
+"""
+
+import importlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Optional
+
+BACKENDS = ("thread", "process")
+
+
+class WorkerCompletionError(Exception):
+    """A completion that failed in a worker process, with the original exception's class name."""
+
+    def __init__(self, error_class: str, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(error_class, message, status_code, retry_after)
+        self.error_class = error_class
+        self.message = message
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    def __str__(self) -> str:
+        return f"{self.error_class}: {self.message}"
+
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content):
+        self.message = _Message(content)
+
+
+class WorkerResponse:
+    """The parts of a litellm response the runner reads: ``choices[0].message.content`` and ``usage``."""
+
+    def __init__(self, content, usage: dict):
+        self.choices = [_Choice(content)]
+        self.usage = usage
+
+
+def _usage_dict(usage) -> dict:
+    if not usage:
+        return {}
+    get = usage.get if isinstance(usage, dict) else lambda k, d=None: getattr(usage, k, d)
+    out = {k: get(k) for k in ("prompt_tokens", "completion_tokens", "total_tokens",
+                               "cache_read_input_tokens", "cache_creation_input_tokens")}
+    details = get("prompt_tokens_details")
+    cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", None)
+    if cached is not None:
+        out["prompt_tokens_details"] = {"cached_tokens": cached}
+    return {k: v for k, v in out.items() if v is not None}
+
+
+def load_callable(spec: str) -> Callable:
+    """``"package.module:function"`` -> the function."""
+    module, _, name = spec.partition(":")
+    if not module or not name:
+        raise ValueError(f"Bad worker initializer {spec!r}; expected module:function")
+    return getattr(importlib.import_module(module), name)
+
+
+def _init_worker(init_spec: Optional[str]) -> None:
+    if init_spec:
+        load_callable(init_spec)()
+
+
+def complete(kwargs: dict) -> WorkerResponse:
+    """One ``litellm.completion`` call, executed in a worker process."""
+    import litellm
+
+    from llm_arithmetic.retry import retry_after
+
+    try:
+        response = litellm.completion(**kwargs)
+    except Exception as e:
+        # litellm's exceptions don't all survive pickling; send back what the parent needs
+        raise WorkerCompletionError(
+            type(e).__name__, str(e), getattr(e, "status_code", None), retry_after(e)
+        ) from None
+    try:
+        content = response.choices[0].message.content
+    except Exception:
+        content = None
+    return WorkerResponse(content, _usage_dict(getattr(response, "usage", None)))
+
+
+def process_pool(workers: int, init_spec: Optional[str] = None) -> ProcessPoolExecutor:
+    """Pool of ``workers`` spawned processes, each initialized with ``init_spec``."""
+    if init_spec:
+        load_callable(init_spec)  # fail fast in the parent on a typo
+    return ProcessPoolExecutor(
+        max_workers=max(1, workers),
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(init_spec,),
+    )
+
+
+def register_mock_provider() -> None:
+    """Worker initializer: register a CPU-bound ``mock-local/*`` litellm provider."""
+    import random
+
+    import litellm
+    from litellm import CustomLLM
+
+    from llm_arithmetic.mock_server import MockConfig, answer_for
+
+    cpu_sec = float(os.environ.get("LLM_ARITH_MOCK_CPU_MS", "20")) / 1000
+    config = MockConfig()
+    rng = random.Random()
+
+    class MockLocalLLM(CustomLLM):
+        def completion(self, *args, **kwargs):
+            messages = kwargs.get("messages") or []
+            prompt_text = messages[-1]["content"] if messages else ""
+            deadline = time.process_time() + cpu_sec
+            while time.process_time() < deadline:
+                pass
+            answer, _ = answer_for(prompt_text, config, rng)
+            return litellm.ModelResponse(
+                model=kwargs.get("model"),
+                choices=[{"index": 0, "finish_reason": "stop",
+                          "message": {"role": "assistant", "content": answer}}],
+                usage={"prompt_tokens": len(prompt_text) // 4, "completion_tokens": 4,
+                       "total_tokens": len(prompt_text) // 4 + 4},
+            )
+
+    litellm.custom_provider_map = [
+        p for p in litellm.custom_provider_map if p.get("provider") != "mock-local"
+    ] + [{"provider": "mock-local", "custom_handler": MockLocalLLM()}]
@@ -0,0 +1,170 @@
+"""Opt-in profiling for runs and report scripts.
+
+``profiled(kind, out_dir, name)`` wraps a whole execution with one of
+
+- ``cprofile``: deterministic CPU profile, saved as ``.prof`` (open with
+  ``python -m pstats`` or snakeviz); summary = top functions by cumulative time.
+  Only the main thread is profiled; runner worker threads just wait on HTTP.
+- ``tracemalloc``: Python allocations, snapshot saved as ``.tracemalloc``
+  (``tracemalloc.Snapshot.load``); summary = peak and top allocation sites.
+- ``pyinstrument``: statistical profiler (optional dependency), saved as
+  ``.html``; summary = its text call tree.
+
+The artifact is written to ``out_dir`` as ``profile_<name>_<timestamp>.<ext>``
+and the top-N hotspots are printed to stderr. Code can mark stages with
+``stage("load")``; their wall time (and, under tracemalloc, memory growth) is
+included in the summary. Without an active profile ``stage`` does nothing.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+KINDS = ("cprofile", "tracemalloc", "pyinstrument")
+EXTENSIONS = {"cprofile": "prof", "tracemalloc": "tracemalloc", "pyinstrument": "html"}
+
+_session = None
+
+
+class _Session:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.stages = {}  # name -> [seconds, memory delta bytes]
+
+    def add_stage(self, name: str, seconds: float, mem_delta: int) -> None:
+        totals = self.stages.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += mem_delta
+
+
+def _traced_memory() -> int:
+    import tracemalloc
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+@contextmanager
+def stage(name: str):
+    """Attribute the enclosed block to ``name`` in the active profile's summary."""
+    session = _session
+    if session is None:
+        yield
+        return
+    mem_before = _traced_memory() if session.kind == "tracemalloc" else 0
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        mem_after = _traced_memory() if session.kind == "tracemalloc" else 0
+        session.add_stage(name, time.perf_counter() - start, mem_after - mem_before)
+
+
+def artifact_path(out_dir: str, name: str, kind: str) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y-%m-%d_%H-%M-%S")
+    return os.path.join(out_dir, f"profile_{name}_{stamp}.{EXTENSIONS[kind]}")
+
+
+@contextmanager
+def profiled(kind: Optional[str], out_dir: str, name: str, top: int = 20):
+    """Profile the enclosed block with ``kind`` (no-op when ``kind`` is None)."""
+    global _session
+    if not kind:
+        yield None
+        return
+    if kind not in KINDS:
+        raise ValueError(f"Unknown profiler {kind!r}; expected one of {', '.join(KINDS)}")
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("--profile pyinstrument needs the pyinstrument package (pip install pyinstrument)") from None
+        profiler = Profiler()
+    elif kind == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+    else:
+        import tracemalloc
+        profiler = None
+        tracemalloc.start(25)
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = artifact_path(out_dir, name, kind)
+    session = _session = _Session(kind)
+    start = time.perf_counter()
+    if kind == "pyinstrument":
+        profiler.start()
+    elif kind == "cprofile":
+        profiler.enable()
+    try:
+        yield path
+    finally:
+        if kind == "pyinstrument":
+            profiler.stop()
+        elif kind == "cprofile":
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+        _session = None
+        lines = [f"[profile] {kind}: {name} took {elapsed:.2f}s; artifact {path}"]
+        lines += _stage_lines(session)
+        lines += _save_and_summarize(kind, profiler, path, top)
+        print("\n".join(lines), file=sys.stderr)
+
+
+def _stage_lines(session: _Session):
+    if not session.stages:
+        return []
+    out = ["[profile] stages:"]
+    for name, (seconds, mem_delta) in session.stages.items():
+        line = f"  {name:<12} {seconds:>9.3f}s"
+        if session.kind == "tracemalloc":
+            line += f" {mem_delta / 1024:>+12.1f} KiB"
+        out.append(line)
+    return out
+
+
+def _save_and_summarize(kind: str, profiler, path: str, top: int):
+    if kind == "cprofile":
+        import io
+        import pstats
+        profiler.dump_stats(path)
+        buf = io.StringIO()
+        pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(top)
+        body = buf.getvalue()
+        # keep the table, drop pstats' preamble
+        table = body[body.find("   ncalls"):] if "   ncalls" in body else body
+        return [f"[profile] top {top} by cumulative time:", table.rstrip()]
+    if kind == "tracemalloc":
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot.dump(path)
+        out = [f"[profile] peak traced memory {peak / (1024 * 1024):.1f} MiB; top {top} allocation sites:"]
+        for s in snapshot.statistics("lineno")[:top]:
+            frame = s.traceback[0]
+            out.append(f"  {s.size / 1024:>10.1f} KiB {s.count:>8} blocks  {frame.filename}:{frame.lineno}")
+        return out
+    with open(path, "w") as f:
+        f.write(profiler.output_html())
+    return [profiler.output_text(unicode=False, color=False, show_all=False).rstrip()]
+
+
+def add_profile_argument(parser) -> None:
+    parser.add_argument(
+        "--profile",
+        choices=KINDS,
+        default=None,
+        help="Profile the execution and write the artifact next to the results",
+    )
+
+
+def profile_from_argv(default: Optional[str] = None, description: Optional[str] = None) -> Optional[str]:
+    """``--profile`` for the globals-configured report scripts (their only CLI flag)."""
+    import argparse
+
+    p = argparse.ArgumentParser(description=description)
+    add_profile_argument(p)
+    p.set_defaults(profile=default)
+    return p.parse_args().profile
@@ -13,4 +13,38 @@ def make_prompt(lhs, op_symbol, rhs):
     return (
         "Compute the following and reply with just the numeric result (no explanation):\n"
         f"   {lhs} {op_symbol} {rhs}"
-    ) 
\ No newline at end of file
+    ) 
+
+
+def make_packed_prompt(problems):
+    """
+    Generate one prompt asking for several problems at once (``run.py --pack K``).
+    ``problems`` is a list of (lhs, op_symbol, rhs); answers are expected as
+    numbered lines, see ``parse.split_numbered_answers``.
+    """
+    lines = "\n".join(f"   {i}. {lhs} {op_symbol} {rhs}" for i, (lhs, op_symbol, rhs) in enumerate(problems, 1))
+    return (
+        "Compute each of the following and reply with just the numeric results, one per line, "
+        "numbered like the problems (e.g. \"1. 42\"), no explanation:\n"
+        f"{lines}"
+    )
+
+
+def mark_cache_prefix(messages):
+    """
+    Return a copy of the shared prefix messages with a prompt-caching breakpoint
+    (Anthropic-style ``cache_control``) on the last one, so the provider can cache
+    everything up to the arithmetic question. litellm drops the marker for
+    providers that cache automatically (OpenAI) or don't support it.
+    """
+    if not messages:
+        return []
+    marked = [dict(m) for m in messages]
+    content = marked[-1]["content"]
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content}]
+    else:
+        blocks = [dict(b) for b in content]
+    blocks[-1]["cache_control"] = {"type": "ephemeral"}
+    marked[-1]["content"] = blocks
+    return marked
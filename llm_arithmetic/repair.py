@@ -0,0 +1,152 @@
+"""Re-issue only the failed or empty trials of a results file (``run.py --repair``).
+
+When the provider flaked, a run ends up with some records that have
+``failed_to_get_reply: true`` or an empty ``raw_response``. Repair mode sends
+just those problems again, with their original operands, and writes the new
+records in place of the old ones. Fixing a run then costs a handful of calls
+rather than a full rerun.
+
+    uv run run.py --model openai/gpt-4o --repair results/openai_gpt-4o_2026-06-01_10-00.jsonl
+
+Pass the flags the run was made with (``--model-alias``, ``--system-prompt``,
+``--reasoning-effort``, ``--litellm-params``). ``--extra-context`` is checked
+against the records.
+
+The file is read as raw lines, and only lines that match a failure marker
+are JSON-decoded. Untouched records are copied back byte for byte.
+``RepairQueue`` looks like
+a work queue to the runner (see ``workqueue.QueueWorker``), so retries, the
+circuit breaker, concurrency and the other run options all apply. A new
+record replaces the old one only if it got a non-empty reply. The record
+keeps the original ``seed``, ``trial_index``, ``shard`` and ``stop_rule``.
+On exit, the repaired file is written to a temporary file next to the
+original and moved over it with ``os.replace``. A crash therefore leaves
+either the old file or the new one, never a mix. If the file changed during
+the repair (another run appending to it), the result goes to
+``<file>.repaired`` instead.
+"""
+
+import json
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from llm_arithmetic import gen, io as io_, types
+from llm_arithmetic.workqueue import decode_operand
+
+_BROKEN_RE = re.compile(rb'"failed_to_get_reply":\s*true|"raw_response":\s*(?:""|null)')
+# fields that place a trial in its run; the re-issued trial keeps the original's
+_KEPT = ("seed", "trial_index", "shard", "stop_rule")
+
+
+def scan(path: str) -> Tuple[List[bytes], Dict[int, dict]]:
+    """The file's lines, and {line number: record} for failed or empty trials."""
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    broken = {}
+    for n, line in enumerate(lines):
+        if not _BROKEN_RE.search(line):
+            continue
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if rec.get("failed_to_get_reply") or not rec.get("raw_response"):
+            broken[n] = rec
+    return lines, broken
+
+
+def _answered(rec: dict) -> bool:
+    return not rec["failed_to_get_reply"] and bool(rec["raw_response"])
+
+
+class RepairQueue:
+    """A work queue over the broken records of one results file; rewrites the file on exit."""
+
+    worker = "repair"
+    poll_sec = 0.0
+
+    def __init__(self, path: str, extra_context: int = 0):
+        self.path = path
+        self._stat = os.stat(path)
+        self.lines, self.broken = scan(path)
+        for rec in self.broken.values():
+            if rec.get("extra_context", 0) != extra_context:
+                raise ValueError(
+                    f"{path} was run with --extra-context {rec.get('extra_context', 0)}; "
+                    f"repair with the same value (got {extra_context})"
+                )
+        self._pending = sorted(self.broken)
+        self.results: Dict[int, dict] = {}
+        self.written: Optional[str] = None
+
+    def meta(self) -> dict:
+        recs = list(self.broken.values())
+        return {
+            "depths": sorted({r["depth"] for r in recs}),
+            "trials_per_cell": 1,
+            "model": recs[0]["model"] if recs else None,
+        }
+
+    def claim(self) -> Optional[dict]:
+        if not self._pending:
+            return None
+        n = self._pending.pop(0)
+        rec = self.broken[n]
+        variant = rec["variant"]
+        lhs, rhs = (decode_operand(variant, str(x)) for x in rec["operands"])
+        return {"id": n, "variant": variant, "depth": rec["depth"], "lhs": lhs, "rhs": rhs,
+                "correct": gen.compute_correct(variant, lhs, rhs)}
+
+    def complete(self, item_id: int, trial: types.Trial) -> bool:
+        record = io_.trial_record(trial)
+        original = self.broken[item_id]
+        record.update({key: original[key] for key in _KEPT if original.get(key) is not None})
+        self.results[item_id] = record
+        return True
+
+    def counts(self) -> dict:
+        done = len(self.results)
+        return {"pending": len(self._pending), "leased": 0, "done": done, "total": len(self.broken)}
+
+    def repaired(self) -> Dict[int, dict]:
+        return {n: rec for n, rec in self.results.items() if _answered(rec)}
+
+    def __enter__(self) -> "RepairQueue":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        fixed = self.repaired()
+        if not fixed:
+            return
+        st = os.stat(self.path)
+        changed = (st.st_size, st.st_mtime_ns) != (self._stat.st_size, self._stat.st_mtime_ns)
+        target = self.path + ".repaired" if changed else self.path
+        directory = os.path.dirname(os.path.abspath(target))
+        fd, tmp = tempfile.mkstemp(prefix=".repair-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for n, line in enumerate(self.lines):
+                    if n in fixed:
+                        line = (json.dumps(fixed[n], default=str) + "\n").encode()
+                    elif not line.endswith(b"\n"):
+                        line += b"\n"
+                    f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, self._stat.st_mode & 0o777)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.written = target
+
+    def summary(self) -> str:
+        fixed = len(self.repaired())
+        broken = len(self.broken)
+        if not broken:
+            return f"repair: no failed or empty trials in {self.path}"
+        where = f"; wrote {self.written}" if self.written else ""
+        return (f"repair: {fixed}/{broken} failed or empty trials answered, "
+                f"{broken - fixed} left as they were{where}")
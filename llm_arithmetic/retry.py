@@ -0,0 +1,283 @@
+"""Retry policy: which failures to retry, when, and when to stop sending at all.
+
+A failed request used to sleep on its worker thread through a doubling
+backoff, so a burst of 429s or 5xx stalled every slot of the pool for up to
+minutes. The runner now puts each failed trial into a ``RetryQueue`` due at
+``now + delay`` and keeps dispatching other trials; due retries go out ahead of
+new work as slots free up.
+
+The delay honours the provider's ``Retry-After`` / ``retry-after-ms`` header
+when there is one. Otherwise it is exponential backoff with jitter: attempt
+``n`` waits a uniform draw from ``[d/2, d]`` where ``d = base * 2**(n+1)``,
+capped at ``MAX_DELAY``. The jitter stops requests that failed together from
+all retrying at the same moment.
+
+Not every failure is worth retrying. ``classify_error`` sorts exceptions into
+error classes (``ERROR_CLASSES``). Auth errors, bad requests, context-length
+errors, unknown models and content filters fail the trial at once, because a
+retry would get the same answer. Rate limits, server errors, timeouts and
+network errors are retried. The class of a trial's last failed attempt is
+stored in its record as ``error_class``.
+
+``CircuitBreaker`` watches the outcome of the last ``window`` requests. When
+the failure share reaches ``threshold``, it stops all dispatching for
+``cooldown`` seconds. It then lets a single probe request through: a success
+closes the breaker, and a failure reopens it with double the cooldown. A dead
+endpoint therefore costs one request per cooldown instead of the full retry
+budget of every trial. Prompt-specific failures (bad request, context length,
+content filter) are not counted.
+"""
+
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+MAX_DELAY = 300.0
+
+# error class -> retried?
+ERROR_CLASSES = {
+    "rate_limit": True,
+    "server": True,
+    "timeout": True,
+    "network": True,
+    "other": True,
+    "auth": False,
+    "bad_request": False,
+    "context_length": False,
+    "content_filter": False,
+    "not_found": False,
+}
+# failures that say something about the prompt, not the endpoint's health
+PROMPT_ERRORS = {"bad_request", "context_length", "content_filter"}
+
+# exception class names (litellm / openai / httpx) -> error class; checked before status codes
+# because e.g. litellm's ContextWindowExceededError is a 400 BadRequestError
+_BY_NAME = {
+    "AuthenticationError": "auth",
+    "PermissionDeniedError": "auth",
+    "ContextWindowExceededError": "context_length",
+    "ContentPolicyViolationError": "content_filter",
+    "NotFoundError": "not_found",
+    "BadRequestError": "bad_request",
+    "UnprocessableEntityError": "bad_request",
+    "UnsupportedParamsError": "bad_request",
+    "RateLimitError": "rate_limit",
+    "Timeout": "timeout",
+    "APITimeoutError": "timeout",
+    "TimeoutError": "timeout",
+    "ReadTimeout": "timeout",
+    "ConnectTimeout": "timeout",
+    "APIConnectionError": "network",
+    "ConnectError": "network",
+    "ConnectionError": "network",
+    "RemoteProtocolError": "network",
+    "InternalServerError": "server",
+    "ServiceUnavailableError": "server",
+    "BadGatewayError": "server",
+}
+
+
+def classify_error(exc: BaseException) -> str:
+    """The ``ERROR_CLASSES`` key for a failed request."""
+    name = getattr(exc, "error_class", None) or type(exc).__name__
+    if name in _BY_NAME:
+        return _BY_NAME[name]
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        if status in (401, 403):
+            return "auth"
+        if status == 404:
+            return "not_found"
+        if status == 408:
+            return "timeout"
+        if status == 413:
+            return "context_length"
+        if status == 429:
+            return "rate_limit"
+        if 400 <= status < 500:
+            return "bad_request"
+        if status >= 500:
+            return "server"
+    if isinstance(exc, TimeoutError):
+        return "timeout"
+    if isinstance(exc, (ConnectionError, OSError)):
+        return "network"
+    return "other"
+
+
+def is_retryable(error_class: str) -> bool:
+    return ERROR_CLASSES.get(error_class, True)
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (``Retry-After`` / ``retry-after-ms``), if it said."""
+    explicit = getattr(exc, "retry_after", None)
+    if isinstance(explicit, (int, float)):
+        return float(explicit)
+    headers = getattr(exc, "litellm_response_headers", None)
+    if headers is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        headers = {str(k).lower(): v for k, v in headers.items()}
+    except AttributeError:
+        return None
+    if headers.get("retry-after-ms") is not None:
+        try:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, rng=random, cap: float = MAX_DELAY) -> float:
+    """Jittered exponential delay before retrying after failed attempt ``attempt`` (0-based)."""
+    ceiling = min(cap, base * 2 ** (attempt + 1))
+    return rng.uniform(ceiling / 2, ceiling)
+
+
+def retry_delay_for(exc: BaseException, attempt: int, base: float, rng=random, cap: float = MAX_DELAY) -> float:
+    """``Retry-After`` when the server sent one (capped at ``cap``), else ``backoff_delay``."""
+    asked = retry_after(exc)
+    if asked is not None:
+        return min(cap, asked)
+    return backoff_delay(attempt, base, rng, cap)
+
+
+@dataclass
+class RetryOptions:
+    """Attempts per trial and the circuit breaker in front of them (``runner.run(retry=...)``)."""
+    retries: int = 5
+    delay: float = 5.0  # backoff base, see ``backoff_delay``
+    breaker_threshold: float = 0.5
+    breaker_window: int = 20
+    breaker_cooldown: float = 30.0
+
+    def breaker(self) -> "CircuitBreaker":
+        return CircuitBreaker(self.breaker_threshold, self.breaker_window, self.breaker_cooldown)
+
+
+class RetryQueue:
+    """Min-heap of items keyed by the ``time.monotonic()`` at which they are due."""
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, delay: float, item: Any) -> float:
+        """Schedule ``item`` ``delay`` seconds from now; returns its due time."""
+        due = time.monotonic() + max(0.0, delay)
+        heapq.heappush(self._heap, (due, next(self._seq), item))
+        return due
+
+    def pop_due(self, now: Optional[float] = None) -> Optional[Any]:
+        """The earliest item if it is due, else None."""
+        now = time.monotonic() if now is None else now
+        if self._heap and self._heap[0][0] <= now:
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    def wait_time(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the next item is due (0 if overdue); None when empty."""
+        if not self._heap:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._heap[0][0] - now)
+
+
+class CircuitBreaker:
+    """Pause dispatching while too many recent requests fail (see module docstring).
+
+    Single-threaded: the runner's main loop calls ``allow`` before each dispatch
+    and ``record`` for each finished attempt. ``threshold`` 0 disables it.
+    """
+
+    def __init__(self, threshold: float = 0.5, window: int = 20, cooldown: float = 30.0,
+                 max_cooldown: float = 600.0):
+        self.threshold = threshold
+        self.window = max(1, window)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.trips = 0
+        self._outcomes = deque(maxlen=self.window)
+        self._open_until = None
+        self._probing = False
+        self.reason = None
+
+    @property
+    def state(self) -> str:
+        if self._open_until is None:
+            return "closed"
+        return "open" if time.monotonic() < self._open_until else "half_open"
+
+    def allow(self) -> bool:
+        """May a request be sent now? In half-open state, only the one probe."""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._probing)
+
+    def dispatched(self) -> None:
+        """Note a request sent after ``allow``; in half-open state it is the probe."""
+        if self.state == "half_open":
+            self._probing = True
+
+    def wait_time(self) -> Optional[float]:
+        """Seconds until the breaker lets a probe through; None unless open."""
+        if self.state != "open":
+            return None
+        return max(0.0, self._open_until - time.monotonic())
+
+    def record(self, ok: bool, error_class: Optional[str] = None) -> bool:
+        """Account one finished attempt; returns True if this trips (or re-trips) the breaker."""
+        if self.threshold <= 0 or (not ok and error_class in PROMPT_ERRORS):
+            return False
+        state = self.state
+        if state == "open":
+            return False  # stragglers sent before the trip
+        if state == "half_open":
+            if ok:
+                self._open_until = None
+                self._probing = False
+                self._outcomes.clear()
+                self.cooldown = self.base_cooldown
+                return False
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            return self._trip("probe request failed")
+        self._outcomes.append(ok)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) == self.window and failures >= self.threshold * self.window:
+            return self._trip(f"{failures}/{self.window} recent requests failed")
+        return False
+
+    def _trip(self, reason: str) -> bool:
+        self.reason = reason
+        self.trips += 1
+        self._probing = False
+        self._open_until = time.monotonic() + self.cooldown
+        return True
+
+    def describe(self) -> str:
+        return f"{self.reason}; pausing {self.cooldown:.0f}s before a probe request"
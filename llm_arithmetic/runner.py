@@ -1,29 +1,227 @@
 import os
 import json
 from datetime import datetime, timezone
-import csv
 import time
 import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import NamedTuple, Optional, Tuple
 
-def run(model: str, trials_per_cell: int, depths, output_dir: str, reasoning_effort: str = None, resume_file: str = None, retries: int = 5, retry_delay: float = 5.0, model_alias: str = None, litellm_params: dict = None, extra_context: int = 0, system_prompt: str = None, timeout_sec: int = 600):
+
+class Problem(NamedTuple):
+    """One question of a request."""
+    trial_id: object  # run-local int, or the queue's item id
+    variant: str
+    depth: int
+    lhs: object
+    rhs: object
+    correct: object
+    trial_index: Optional[int]  # grid slot of a seeded run
+
+
+class Request(NamedTuple):
+    """A request in flight or waiting out its retry backoff.
+
+    trial_id / variant / depth are those of its first problem; ``problems``
+    holds all ``pack`` of them (one unless packing).
+    """
+    trial_id: object
+    dispatched: float  # tracer time of the first attempt
+    variant: str
+    depth: int
+    problems: Tuple[Problem, ...]
+    ptext: str
+    attempt: int = 0
+    error_class: Optional[str] = None  # of the last failed attempt
+
+
+def read_response(response):
+    """(raw text, prompt_tokens, completion_tokens, cached_tokens, cache_write_tokens) of a completion.
+
+    ``response`` is a litellm response or anything shaped like one (``choices[0].message.content``
+    and a ``usage`` mapping); None means no reply. ``<think>`` blocks are removed from the text.
+    """
+    from llm_arithmetic import pricing
+
+    if response is None:
+        return '', 0, 0, 0, 0
+    usage = getattr(response, 'usage', {})
+    prompt_tokens = usage.get('prompt_tokens', 0)
+    completion_tokens = usage.get('completion_tokens', 0)
+    cached_tokens, cache_write_tokens = pricing.cache_token_counts(usage)
+    try:
+        raw = response.choices[0].message.content.strip()
+        raw = re.sub(
+            r"<think>.*?</think>",
+            "",
+            raw,
+            flags=re.DOTALL,
+        )
+    except Exception:
+        raw = ''
+    return raw, prompt_tokens, completion_tokens, cached_tokens, cache_write_tokens
+
+
+def split_evenly(total: int, parts: int) -> list:
+    """``total`` as ``parts`` integers that differ by at most one and sum to ``total``."""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def run(
+    model: str,
+    trials_per_cell: int,
+    depths,
+    output_dir: str,
+    reasoning_effort: str = None,
+    resume_file: str = None,
+    model_alias: str = None,
+    litellm_params: dict = None,
+    extra_context: int = 0,
+    system_prompt: str = None,
+    timeout_sec: int = 600,
+    retry=None,
+    ci_width: float = None,
+    min_trials: int = 5,
+    max_trials: int = None,
+    schedule: str = "interleave",
+    concurrency: int = 1,
+    pool_size: int = None,
+    http2: bool = True,
+    prompt_cache: bool = False,
+    metrics_port: int = None,
+    metrics_textfile: str = None,
+    trace: bool = False,
+    dashboard: bool = False,
+    work_queue=None,
+    seed: int = None,
+    shard=None,
+    backend: str = "thread",
+    worker_init: str = None,
+    batch_api: str = None,
+    batch_poll_sec: float = 30.0,
+    hedge=None,
+    endpoint_pool=None,
+    pack: int = 1,
+    adaptive_timeout=None,
+):
     """
     Execute the evaluation for the specified model, number of trials per cell, and digit depths.
     :param reasoning_effort: optional reasoning effort level ('low', 'medium', 'high')
     :param litellm_params: optional dictionary of parameters to pass directly to litellm.completion
+    :param retry: a ``retry.RetryOptions``: attempts per trial, backoff base and the circuit
+        breaker, which pauses the run for breaker_cooldown seconds when breaker_threshold of
+        the last breaker_window requests failed (see llm_arithmetic.retry; threshold 0 disables)
+    :param ci_width: enable adaptive sampling; a cell stops once the Wilson 95% interval on its
+        accuracy is narrower than this (after min_trials), and the saved budget of
+        len(VARIANTS) * len(depths) * trials_per_cell trials goes to the least certain cells
+    :param max_trials: per-cell cap when redistributing budget in adaptive mode
+    :param schedule: trial order across cells: 'interleave' (round-robin), 'random'
+        (stratified random rounds), 'variant' (fill each cell in turn) or 'longest'
+        (longest expected latency first, from this model's earlier runs in output_dir
+        and this run's requests; see llm_arithmetic.schedule)
+    :param concurrency: number of requests in flight at once
+    :param pool_size: connections kept in the shared keep-alive HTTP pool (default: max(10, concurrency))
+    :param http2: negotiate HTTP/2 on the shared pool where the provider supports it
+    :param prompt_cache: mark the shared prefix (system prompt + extra context) for provider
+        prompt caching (Anthropic-style cache_control; OpenAI caches automatically)
+    :param metrics_port: serve live Prometheus/OpenMetrics metrics on http://127.0.0.1:<port>/metrics
+    :param metrics_textfile: also rewrite the metrics to this .prom file every few seconds
+    :param trace: write per-trial phase spans (see llm_arithmetic.trace) to
+        output_dir/traces/<trial file name>
+    :param dashboard: show a live variant×depth dashboard instead of the progress bar
+    :param work_queue: a ``workqueue.QueueWorker``: take trials from the shared queue
+        (its published grid replaces trials_per_cell/depths) and record results there
+        instead of a local JSONL; ``repair.RepairQueue`` re-issues a file's failed trials the same way
+    :param seed: draw each grid slot's operands from a RNG seeded with (seed, variant, depth, k),
+        so the problem set is reproducible and identical across shards
+    :param shard: (i, N) to evaluate only shard i of N of the grid (needs seed); written to
+        output_dir/shards/ for scripts/merge_shards.py
+    :param backend: "thread" (default) or "process": run each completion in a pool of
+        `concurrency` worker processes (see llm_arithmetic.procpool) for CPU-bound local models
+    :param worker_init: "module:function" run once in each worker process (load the model,
+        register a litellm custom provider)
+    :param batch_api: "openai", "anthropic", "local" or "auto": submit the whole grid as one
+        provider batch job at batch prices instead of calling the model per trial
+        (see llm_arithmetic.batch); resumable with resume_file
+    :param batch_poll_sec: seconds between batch status checks
+    :param hedge: a ``hedge.HedgeOptions``: send a duplicate of any request still outstanding
+        after its cell's quantile latency and keep the first reply, for at most max_rate of
+        requests (see llm_arithmetic.hedge); None disables hedging
+    :param endpoint_pool: an ``endpoints.EndpointOptions`` for a list of api_base values in
+        litellm_params (one model on several servers, see llm_arithmetic.endpoints): eject an
+        endpoint after eject_after consecutive failures, health-check every health_interval seconds
+    :param pack: ask this many problems per request (numbered, see prompt.make_packed_prompt);
+        each still gets its own trial record, with the request's usage and cost split evenly
+    :param adaptive_timeout: a ``timeouts.TimeoutOptions``: time each request out after factor ×
+        the quantile latency of its cell (from earlier runs and this one), clamped to [floor,
+        timeout_sec], instead of timeout_sec everywhere (see llm_arithmetic.timeouts)
 
     Writes per-trial JSONL into output_dir
     """
     # Delayed imports to avoid circular issues or expensive LLM import
     from decimal import Decimal
     import litellm
-    from litellm import completion
-    from llm_arithmetic import gen, prompt, parse, types, io as io_
+    from llm_arithmetic import gen, prompt, parse, pricing, types, io as io_
     from llm_arithmetic.progress import RunProgress
+    from llm_arithmetic.sampling import StoppingRule
+    from llm_arithmetic.schedule import (
+        CellScheduler, answered_trials, load_latency_history, makespan_bound, shard_slots, trial_files,
+    )
+    from llm_arithmetic.client import shared_client
+    from llm_arithmetic.metrics import RunMetrics, exporting
+    from llm_arithmetic.trace import NullTracer, Tracer
+    from llm_arithmetic import procpool
+    from llm_arithmetic.endpoints import EndpointOptions, EndpointPool, probe_models
+    from llm_arithmetic.retry import RetryOptions, RetryQueue, classify_error, is_retryable, retry_delay_for
+
+    retry = retry or RetryOptions()
+    endpoint_pool = endpoint_pool or EndpointOptions()
 
     litellm.set_verbose = False
     if hasattr(litellm, "suppress_debug_info"):
         litellm.suppress_debug_info = True
 
+    if work_queue is not None:
+        if resume_file or ci_width:
+            raise ValueError("A queue worker cannot resume a file or stop adaptively; the queue tracks progress")
+        queue_meta = work_queue.meta()
+        depths = queue_meta["depths"]
+        trials_per_cell = queue_meta["trials_per_cell"]
+        model_alias = model_alias or queue_meta.get("model")
+
+    if shard is not None and seed is None:
+        raise ValueError("Sharding needs a seed so every shard draws from the same problem set")
+    if seed is not None and (ci_width or work_queue is not None):
+        raise ValueError("A seeded / sharded run covers a fixed grid; it cannot stop adaptively or use a queue")
+    shard_label = f"{shard[0]}/{shard[1]}" if shard else None
+
+    if backend not in procpool.BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {', '.join(procpool.BACKENDS)}")
+
+    # several api_base values: one logical model served by a pool of equivalent endpoints
+    endpoints = None
+    if litellm_params and isinstance(litellm_params.get("api_base"), (list, tuple)):
+        litellm_params = dict(litellm_params)
+        api_bases = list(litellm_params.pop("api_base"))
+        api_key = litellm_params.get("api_key")
+        endpoints = EndpointPool(
+            api_bases, eject_after=endpoint_pool.eject_after, health_interval=endpoint_pool.health_interval,
+            probe=lambda url: probe_models(url, api_key),
+        )
+        if batch_api:
+            raise ValueError("A batch job goes to one provider endpoint; pass a single api_base")
+
+    if batch_api and (ci_width or work_queue is not None or shard is not None):
+        raise ValueError("A batch job covers the whole grid at once; it cannot stop adaptively, use a queue or shard")
+    if pack < 1:
+        raise ValueError(f"pack must be at least 1, got {pack}")
+    if pack > 1 and batch_api:
+        raise ValueError("A batch job asks one problem per request; it cannot pack problems")
+
+    stop_rule = StoppingRule(ci_width, min_trials, max_trials) if ci_width else None
+    stop_label = stop_rule.describe() if stop_rule else None
+
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
 
@@ -38,40 +236,53 @@ def run(model: str, trials_per_cell: int, depths, output_dir: str, reasoning_eff
         except Exception:
             extra_context_messages = []
 
+    # Shared prefix resent before every question; optionally marked for provider prompt caching
+    prefix_messages = []
+    if system_prompt:
+        prefix_messages.append({"role": "system", "content": system_prompt})
+    if extra_context_messages:
+        prefix_messages.extend(extra_context_messages)
+    if prompt_cache:
+        prefix_messages = prompt.mark_cache_prefix(prefix_messages)
+
     # Load pricing metadata
-    metadata_file = os.path.join(os.getcwd(), "data/models_metadata.csv")
-    model_prices = {}
-    try:
-        with open(metadata_file) as mf:
-            reader = csv.DictReader(mf)
-            for row in reader:
-                m = row['model']
-                try:
-                    p_prompt = float(row['1m_prompt'])
-                except Exception as _:
-                    p_prompt = 0.0
-                try:
-                    p_completion = float(row['1m_completion'])
-                except Exception as _:
-                    p_completion = 0.0
-                model_prices[m] = (p_prompt, p_completion)
-    except FileNotFoundError:
-        model_prices = {}
+    model_prices = pricing.load_prices(os.path.join(os.getcwd(), "data/models_metadata.csv"))
     # Determine display model for logs and pricing lookup
     display_model = model_alias if model_alias else model
     # Pricing based on alias if provided, else actual model
     if model_alias:
-        prompt_price_per_m, completion_price_per_m = model_prices.get(display_model, model_prices.get(model, (0.0, 0.0)))
+        prices = model_prices.get(display_model, model_prices.get(model, pricing.Prices()))
     else:
-        prompt_price_per_m, completion_price_per_m = model_prices.get(model, (0.0, 0.0))
+        prices = model_prices.get(model, pricing.Prices())
 
     # Prepare file paths and stats container (resume or new)
     date = datetime.now(timezone.utc).strftime("%Y-%m-%d_%H-%M")
     sanitized_model = model.replace("/", "_")
     if resume_file:
         trial_file = resume_file
+    elif shard:
+        # kept out of output_dir itself so reports don't count shards next to the merged file
+        os.makedirs(os.path.join(output_dir, "shards"), exist_ok=True)
+        trial_file = os.path.join(
+            output_dir, "shards", f"{sanitized_model}_{date}_shard{shard[0]}of{shard[1]}.jsonl"
+        )
+    elif work_queue is not None:
+        # only names the trace; results go to the queue
+        trial_file = os.path.join(output_dir, f"{sanitized_model}_{date}_{work_queue.worker}.jsonl")
     else:
         trial_file = os.path.join(output_dir, f"{sanitized_model}_{date}.jsonl")
+
+    if batch_api:
+        from llm_arithmetic import batch
+
+        provider = batch.provider_for(model, batch_api)
+        client = batch.make_client(provider, model, output_dir, litellm_params, reasoning_effort)
+        batch.run_batch(
+            client, provider, trial_file, display_model, prices, depths, trials_per_cell,
+            prefix_messages, extra_context=extra_context, seed=seed, poll_sec=batch_poll_sec,
+        )
+        return
+
     stats = {}
 
     # Initialize stats for each variant and depth
@@ -98,13 +309,61 @@ def run(model: str, trials_per_cell: int, depths, output_dir: str, reasoning_eff
     global_total_retries = 0
     global_failed_replies = 0
 
+    # Grid slots this run evaluates: every trial index, or the shard's share
+    cells = [(v, d) for v in types.VARIANTS for d in depths]
+    slots = None
+    if seed is not None:
+        slots = shard_slots(cells, trials_per_cell, *(shard or (0, 1)))
+
     # Setup progress bar
-    total_tasks = len(types.VARIANTS) * len(depths) * trials_per_cell
+    if slots is not None:
+        total_tasks = sum(len(ks) for ks in slots.values())
+    elif work_queue is not None:
+        total_tasks = work_queue.counts()["total"]
+    else:
+        total_tasks = len(types.VARIANTS) * len(depths) * trials_per_cell
     # Initialize accumulated token and cost counters
     total_prompt_tokens = 0
     total_completion_tokens = 0
     total_cost = 0.0
-    with RunProgress(total=total_tasks) as progress:
+    metrics = RunMetrics(display_model)
+    metrics.planned.set(total_tasks, model=display_model)
+    if trace:
+        trace_dir = os.path.join(output_dir, "traces")
+        os.makedirs(trace_dir, exist_ok=True)
+        tracer = Tracer(
+            os.path.join(trace_dir, os.path.basename(trial_file)),
+            model=display_model, trial_file=trial_file, concurrency=concurrency,
+        )
+    else:
+        tracer = NullTracer()
+    next_trial_id = 0
+    if dashboard:
+        from llm_arithmetic.dashboard import LiveDashboard
+        progress_display = LiveDashboard(total_tasks, metrics, types.VARIANTS, depths)
+    else:
+        progress_display = RunProgress(total=total_tasks)
+    # hedging needs spare threads for duplicates and for losers still finishing
+    pool_workers = max(1, concurrency) * (2 if hedge is not None else 1)
+    with progress_display as progress, tracer, \
+            exporting(metrics.registry, port=metrics_port, textfile=metrics_textfile) as metrics_targets, \
+            ThreadPoolExecutor(max_workers=pool_workers) as pool, \
+            shared_client(
+                pool_size=pool_size or max(10, concurrency), http2=http2, timeout=timeout_sec
+            ) as conn_stats, \
+            (work_queue if work_queue is not None else nullcontext()), \
+            (procpool.process_pool(concurrency, worker_init) if backend == "process" else nullcontext()) as procs, \
+            (endpoints if endpoints is not None else nullcontext()):
+        if endpoints is not None:
+            endpoints.log = progress.log
+        for target in metrics_targets:
+            progress.log(f"Metrics: {target}")
+        if work_queue is not None:
+            counts = work_queue.counts()
+            progress.advance(counts["done"])
+            progress.log(
+                f"Worker {work_queue.worker}: {counts['done']}/{counts['total']} trials already recorded in the queue."
+            )
         if resume_file and os.path.exists(trial_file):
             trials = io_.read_trials(trial_file)
 
@@ -129,12 +388,22 @@ def run(model: str, trials_per_cell: int, depths, output_dir: str, reasoning_eff
                         f"Please ensure they match or start a new run."
                     )
 
+                if (last_trial.get('seed'), last_trial.get('shard')) != (seed, shard_label):
+                    raise ValueError(
+                        f"Resuming with a different seed/shard. "
+                        f"Resume file: seed={last_trial.get('seed')} shard={last_trial.get('shard')}, "
+                        f"current: seed={seed} shard={shard_label}. "
+                        f"Please ensure they match or start a new run."
+                    )
+
             for rec in trials:
                 v = rec.get('variant')
                 d = rec.get('depth')
                 key = f"depth_{d}"
                 cell = stats[v][key]
                 cell['total_trials'] += 1
+                if slots is not None and rec.get('trial_index') in slots[(v, d)]:
+                    slots[(v, d)].remove(rec['trial_index'])
                 cls = rec.get('classification')
                 if cls == 'Correct':
                     global_correct += 1
@@ -160,102 +429,320 @@ def run(model: str, trials_per_cell: int, depths, output_dir: str, reasoning_eff
                 total_cost += cost_val
             loaded = len(trials)
             progress.advance(loaded)
+            next_trial_id = loaded
+            metrics.resumed.set(loaded, model=display_model)
             progress.log(f"Resuming from {trial_file}: loaded {loaded}/{total_tasks} trials.")
             if loaded >= total_tasks:
                 progress.log(f"All {total_tasks} trials already completed; nothing to run.")
                 return
 
-        for variant in types.VARIANTS:
-            typ, op = variant.split("_")
-            for depth in depths:
-                cell = stats[variant][f"depth_{depth}"]
-                remaining = trials_per_cell - cell['total_trials']
-                for _ in range(remaining):
-                    if typ == "int":
-                        lhs, rhs = gen.gen_int_pair(variant, depth)
-                    else:
-                        lhs, rhs = gen.gen_float_pair(variant, depth)
-                    correct = gen.compute_correct(variant, lhs, rhs)
-                    op_symbol = prompt.OP_SYMBOLS[op]
-                    ptext = prompt.make_prompt(lhs, op_symbol, rhs)
-                    delay = retry_delay
-                    for attempt in range(retries):
-                        try:
-                            messages = []
-                            if system_prompt:
-                                messages.append({"role": "system", "content": system_prompt})
-                            if extra_context_messages:
-                                messages.extend(extra_context_messages)
-                            messages.append({"role": "user", "content": ptext})
-                            completion_kwargs = {
-                                "model": model,
-                                "messages": messages,
-                                "timeout": timeout_sec
-                            }
-                            if reasoning_effort:
-                                completion_kwargs["reasoning_effort"] = reasoning_effort
-                            if litellm_params:
-                                completion_kwargs.update(litellm_params)
-                            response = completion(**completion_kwargs)
-                            break
-                        except Exception as e:
-                            progress.log(
-                                f"retry {variant}@{depth} ({attempt + 1}/{retries}): {e}"
-                            )
-                            if attempt == retries - 1:
-                                response = None
-                            else:
-                                delay *= 2
-                                time.sleep(delay)
-                            continue
-                    failed_to_get_reply = (response is None)
-                    retries_used = attempt
-                    global_total_retries += retries_used
+        # earlier runs of this model, for latency estimates
+        longest_first = schedule == "longest" and work_queue is None
+        history = []
+        if longest_first or adaptive_timeout is not None:
+            history = answered_trials(trial_files(output_dir), display_model)
+        latencies = None
+        if longest_first:
+            latencies = load_latency_history(history)
+            progress.log(f"Longest-first schedule: {latencies.requests} earlier requests of {display_model} "
+                         f"in {output_dir}")
+        timeouts = None
+        if adaptive_timeout is not None:
+            timeouts = adaptive_timeout.policy(timeout_sec)
+            timeouts.seed(history)
+        scheduler = CellScheduler(
+            stats, types.VARIANTS, depths, trials_per_cell, order=schedule, stop_rule=stop_rule,
+            budgets={cell: stats[cell[0]][f"depth_{cell[1]}"]['total_trials'] + len(ks)
+                     for cell, ks in slots.items()} if slots is not None else None,
+            latencies=latencies,
+        )
+
+        def request(trial_id, variant, depth, ptext, attempt, limit):
+            """Send one attempt of a prompt; runs on a worker thread.
+
+            Returns (response or None, latency in seconds, exception or None, the
+            api_base used when balancing over an endpoint pool or None).
+            Failed attempts are retried by the main loop via ``retries_due``.
+            """
+            endpoint = endpoints.acquire() if endpoints is not None else None
+            where = {"endpoint": endpoint.url} if endpoint is not None else {}
+            started = time.monotonic()
+            span_start = tracer.now()
+            try:
+                messages = prefix_messages + [{"role": "user", "content": ptext}]
+                completion_kwargs = {
+                    "model": model,
+                    "messages": messages,
+                    "timeout": limit,
+                    # retries are ours; the provider SDK's own would sleep on this thread
+                    "max_retries": 0,
+                }
+                if reasoning_effort:
+                    completion_kwargs["reasoning_effort"] = reasoning_effort
+                if litellm_params:
+                    completion_kwargs.update(litellm_params)
+                if endpoint is not None:
+                    completion_kwargs["api_base"] = endpoint.url
+                if procs is not None:
+                    response = procs.submit(procpool.complete, completion_kwargs).result()
+                else:
+                    response = litellm.completion(**completion_kwargs)
+                latency = time.monotonic() - started
+                metrics.request_finished(latency, ok=True)
+                tracer.record(trial_id, "attempt", span_start, latency,
+                              variant=variant, depth=depth, attempt=attempt + 1, ok=True, **where)
+                if endpoint is not None:
+                    endpoints.release(endpoint, ok=True)
+                return response, latency, None, where.get("endpoint")
+            except Exception as e:
+                elapsed = time.monotonic() - started
+                metrics.request_finished(elapsed, ok=False)
+                tracer.record(trial_id, "attempt", span_start, elapsed,
+                              variant=variant, depth=depth, attempt=attempt + 1, ok=False,
+                              error_class=getattr(e, "error_class", type(e).__name__), error=str(e)[:300],
+                              **where)
+                if endpoint is not None:
+                    endpoints.release(endpoint, ok=False, error_class=classify_error(e))
+                return None, elapsed, e, where.get("endpoint")
+
+        in_flight = {}  # future -> Request
+        # failed requests waiting out their backoff; they don't hold a slot meanwhile
+        retries_due = RetryQueue()
+        breaker = retry.breaker()
+        hedging = hedge.policy() if hedge is not None else None
+        started = {}  # future -> time.monotonic() at dispatch
+        limits = {}  # future -> its request timeout
+        request_seconds = []  # every finished attempt, for the makespan report
+        run_started = time.monotonic()
+
+        def dispatch(entry):
+            limit = timeout_sec
+            if timeouts is not None:
+                # a retry after a timeout doubles the limit per earlier attempt (only the
+                # last failure's class is kept, so earlier failures count as timeouts too)
+                limit = timeouts.limit(
+                    (entry.variant, entry.depth), entry.attempt if entry.error_class == "timeout" else 0
+                )
+                timeouts.requests += 1
+            future = pool.submit(
+                request, entry.trial_id, entry.variant, entry.depth, entry.ptext, entry.attempt, limit
+            )
+            in_flight[future] = entry
+            started[future] = time.monotonic()
+            limits[future] = limit
+            breaker.dispatched()
+            if hedging is not None:
+                hedging.requests += 1
+            return future
+
+        def next_problem():
+            """Claim or generate the next problem; None when there is nothing to start now."""
+            nonlocal next_trial_id
+            if work_queue is not None:
+                item = work_queue.claim()
+                if item is None:
+                    return None
+                return Problem(item["id"], item["variant"], item["depth"], item["lhs"], item["rhs"], item["correct"], None)
+            next_cell = scheduler.next_cell()
+            if next_cell is None:
+                return None
+            variant, depth = next_cell
+            trial_id = next_trial_id
+            next_trial_id += 1
+            trial_index = slots[next_cell].pop(0) if slots is not None else None
+            with tracer.span(trial_id, "generate", variant=variant, depth=depth):
+                lhs, rhs = gen.slot_problem(seed, variant, depth, trial_index)
+                correct = gen.compute_correct(variant, lhs, rhs)
+            scheduler.assign(next_cell)
+            return Problem(trial_id, variant, depth, lhs, rhs, correct, trial_index)
+
+        def question(problem):
+            return problem.lhs, prompt.OP_SYMBOLS[problem.variant.split("_")[1]], problem.rhs
+
+        while True:
+            # Keep up to `concurrency` requests in flight; operands are generated
+            # here on the main thread so the draw order is deterministic
+            blocked = False
+            while len(in_flight) - (hedging.pairs if hedging is not None else 0) < max(1, concurrency):
+                if not breaker.allow():
+                    blocked = True
+                    break
+                entry = retries_due.pop_due()
+                if entry is not None:
+                    dispatch(entry)
+                    continue
+                problems = []
+                while len(problems) < pack:
+                    problem = next_problem()
+                    if problem is None:
+                        break
+                    problems.append(problem)
+                if not problems:
+                    break
+                if pack > 1:
+                    ptext = prompt.make_packed_prompt([question(p) for p in problems])
+                else:
+                    ptext = prompt.make_prompt(*question(problems[0]))
+                first = problems[0]
+                dispatch(Request(first.trial_id, tracer.now(), first.variant, first.depth, tuple(problems), ptext))
+            # Hedge requests outstanding past their cell's latency quantile
+            next_hedge = None
+            if hedging is not None and breaker.state == "closed":
+                busy = hedging.running_losers()
+                now = time.monotonic()
+                for future, entry in list(in_flight.items()):
+                    limit = hedging.threshold((entry.variant, entry.depth))
+                    if future in hedging.hedged or limit is None:
+                        continue
+                    wait_left = started[future] + limit - now
+                    if wait_left > 0:
+                        next_hedge = wait_left if next_hedge is None else min(next_hedge, wait_left)
+                    elif hedging.allow() and len(in_flight) + busy < pool_workers:
+                        hedging.pair(future, dispatch(entry))
+                        tracer.record(entry.trial_id, "hedge", tracer.now(), 0.0,
+                                      variant=entry.variant, depth=entry.depth, after=round(limit, 3))
+            metrics.in_flight.set(len(in_flight), model=display_model)
+            # while the breaker is open, nothing is sent until its cooldown ends
+            pause = breaker.wait_time()
+            if pause is None and not blocked:
+                pause = retries_due.wait_time()
+            if next_hedge is not None:
+                pause = next_hedge if pause is None else min(pause, next_hedge)
+            if not in_flight:
+                if blocked or retries_due:
+                    time.sleep(pause or 0)
+                    continue
+                if work_queue is not None and work_queue.counts()["leased"]:
+                    # other workers still hold leases; wait to pick up any that expire
+                    time.sleep(work_queue.poll_sec)
+                    continue
+                break
+            # wake up for the next due retry (or breaker probe) even if nothing in flight finishes by then
+            done, _ = wait(in_flight, timeout=pause, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future not in in_flight:
+                    continue  # settled together with its hedge twin
+                entry = in_flight.pop(future)
+                started.pop(future, None)
+                request_timeout = limits.pop(future, timeout_sec)
+                trial_id, dispatched, variant, depth, problems, ptext, attempt, error_class = entry
+                result = future.result()
+                request_seconds.append(result[1])
+                twin_running, twin_response = False, None
+                hedged = hedging is not None and future in hedging.hedged
+                if hedged:
+                    settled = hedging.settle(future, result)
+                    if settled is None:
+                        # the duplicate may still get a reply; it settles the trial
+                        breaker.record(False, classify_error(result[2]))
+                        continue
+                    result, twin, twin_running, twin_response = settled
+                    if twin is not None:
+                        in_flight.pop(twin)
+                        started.pop(twin, None)
+                        limits.pop(twin, None)
+                response, latency, exc, served_by = result
+                was_closed = breaker.state == "closed"
+                if exc is not None:
+                    error_class = classify_error(exc)
+                    if timeouts is not None and error_class == "timeout":
+                        timeouts.timeouts += 1
+                    if breaker.record(False, error_class):
+                        progress.log(f"circuit breaker open: {breaker.describe()}")
+                    if is_retryable(error_class) and attempt < retry.retries - 1:
+                        progress.log(
+                            f"retry {variant}@{depth} ({attempt + 1}/{retry.retries}, {error_class}): {exc}"
+                        )
+                        delay = retry_delay_for(exc, attempt, retry.delay)
+                        tracer.record(trial_id, "backoff", tracer.now(), delay, seconds=round(delay, 3))
+                        retries_due.push(delay, entry._replace(attempt=attempt + 1, error_class=error_class))
+                        continue
+                    progress.log(f"failed {variant}@{depth} ({attempt + 1}/{retry.retries}, {error_class}): {exc}")
+                    latency = None
+                else:
+                    breaker.record(True)
+                    if not was_closed and breaker.state == "closed":
+                        progress.log("circuit breaker closed: probe request succeeded")
+                    if hedging is not None:
+                        hedging.observe((variant, depth), latency)
+                    if timeouts is not None:
+                        timeouts.observe((variant, depth), latency)
+                failed_to_get_reply = (response is None)
+                retries_used = attempt
+                attempts_taken = attempt + 1
+                # retries belong to the request, however many problems it packs
+                global_total_retries += retries_used
+                raw, prompt_tokens, completion_tokens, cached_tokens, cache_write_tokens = read_response(response)
+                if latencies is not None and response is not None:
+                    latencies.observe((variant, depth), latency, completion_tokens)
+                cost = pricing.trial_cost(
+                    prices, prompt_tokens, completion_tokens, cached_tokens, cache_write_tokens
+                )
+                # the losing duplicate is billed too: its own usage if it already replied,
+                # else (still running) the winner's as an estimate
+                hedge_cost = 0.0
+                if twin_running:
+                    hedge_cost = cost
+                elif twin_response is not None:
+                    hedge_cost = pricing.trial_cost(prices, *read_response(twin_response)[1:])
+                # a packed reply is split into one answer per problem; usage and cost are shared evenly
+                k = len(problems)
+                answers = parse.split_numbered_answers(raw, k) if pack > 1 else [raw]
+                token_shares = zip(*(split_evenly(n, k) for n in (
+                    prompt_tokens, completion_tokens, cached_tokens, cache_write_tokens)))
+                for position, (problem, answer, tokens) in enumerate(zip(problems, answers, token_shares), 1):
+                    trial_id, variant, depth, lhs, rhs, correct, trial_index = problem
+                    trial_prompt_tokens, trial_completion_tokens, trial_cached_tokens, trial_cache_write_tokens = tokens
+                    trial_hedge_cost = hedge_cost / k
+                    trial_cost = cost / k + trial_hedge_cost
+                    if work_queue is None:
+                        scheduler.complete((variant, depth))
+                    cell = stats[variant][f"depth_{depth}"]
                     if failed_to_get_reply:
                         global_failed_replies += 1
-                    if response is None:
-                        prompt_tokens = 0
-                        completion_tokens = 0
-                        raw = ''
-                    else:
-                        usage = getattr(response, 'usage', {})
-                        prompt_tokens = usage.get('prompt_tokens', 0)
-                        completion_tokens = usage.get('completion_tokens', 0)
-                        try:
-                            raw = response.choices[0].message.content.strip()
-                            raw = re.sub(
-                                r"<think>.*?</think>",
-                                "",
-                                raw,
-                                flags=re.DOTALL,
-                            )
-                        except Exception:
-                            raw = ''
-                    cost = (prompt_tokens / 1_000_000) * prompt_price_per_m + (
-                        completion_tokens / 1_000_000
-                    ) * completion_price_per_m
-                    parsed, classification, error = parse.parse_response(raw, correct, variant)
+                    with tracer.span(trial_id, "parse", variant=variant, depth=depth):
+                        parsed, classification, error = parse.parse_response(answer, correct, variant)
                     timestamp = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
-                    attempts_taken = attempt + 1
                     trial = types.Trial(
                         model=display_model,
                         variant=variant,
                         depth=depth,
                         operands=[lhs, rhs],
                         correct=correct,
-                        raw_response=raw,
+                        raw_response=answer,
                         parsed=parsed,
                         classification=classification,
                         error=error,
-                        prompt_tokens=prompt_tokens,
-                        completion_tokens=completion_tokens,
-                        cost=cost,
+                        prompt_tokens=trial_prompt_tokens,
+                        completion_tokens=trial_completion_tokens,
+                        cached_tokens=trial_cached_tokens,
+                        cache_write_tokens=trial_cache_write_tokens,
+                        cost=trial_cost,
                         timestamp=timestamp,
                         attempts=attempts_taken,
                         failed_to_get_reply=failed_to_get_reply,
-                        extra_context=extra_context
+                        extra_context=extra_context,
+                        stop_rule=stop_label,
+                        latency=latency,
+                        seed=seed,
+                        trial_index=trial_index,
+                        shard=shard_label,
+                        error_class=error_class,
+                        hedged=hedged,
+                        hedge_cost=trial_hedge_cost,
+                        endpoint=served_by,
+                        pack_size=k if pack > 1 else None,
+                        pack_position=position if pack > 1 else None,
+                        timeout=request_timeout if timeouts is not None else None
                     )
-                    io_.write_trial(trial, trial_file)
+                    with tracer.span(trial_id, "write", variant=variant, depth=depth):
+                        if work_queue is not None:
+                            work_queue.complete(trial_id, trial)
+                        else:
+                            io_.write_trial(trial, trial_file)
+                    tracer.record(trial_id, "trial", dispatched, tracer.now() - dispatched,
+                                  variant=variant, depth=depth, attempts=attempts_taken,
+                                  classification=classification)
                     cell['total_trials'] += 1
                     if classification == 'Correct':
                         global_correct += 1
@@ -268,14 +755,41 @@ def run(model: str, trials_per_cell: int, depths, output_dir: str, reasoning_eff
                         cell['deviate_count'] += 1
                         cell['error_sum'] += Decimal(error)
                         global_error_sum += Decimal(error)
-                    cell['prompt_tokens_sum'] += prompt_tokens
-                    cell['completion_tokens_sum'] += completion_tokens
-                    cell['cost_sum'] += cost
-                    total_prompt_tokens += prompt_tokens
-                    total_completion_tokens += completion_tokens
-                    total_cost += cost
+                    cell['prompt_tokens_sum'] += trial_prompt_tokens
+                    cell['completion_tokens_sum'] += trial_completion_tokens
+                    cell['cost_sum'] += trial_cost
+                    total_prompt_tokens += trial_prompt_tokens
+                    total_completion_tokens += trial_completion_tokens
+                    total_cost += trial_cost
+                    metrics.trial_finished(
+                        variant, depth, classification, retries_used if position == 1 else 0, failed_to_get_reply,
+                        trial_prompt_tokens, trial_completion_tokens, trial_cached_tokens, trial_cost,
+                    )
                     progress.tick(
                         prompt_tokens=total_prompt_tokens,
                         completion_tokens=total_completion_tokens,
                         cost=total_cost,
-                    )
\ No newline at end of file
+                    )
+        if request_seconds:
+            achieved = time.monotonic() - run_started
+            ideal = makespan_bound(request_seconds, concurrency)
+            progress.log(
+                f"makespan: {achieved:.1f}s achieved vs {ideal:.1f}s ideal "
+                f"({sum(request_seconds):.1f}s of requests over {max(1, concurrency)} "
+                f"slot{'s' if concurrency > 1 else ''})"
+            )
+        if conn_stats:
+            progress.log(conn_stats.summary())
+        if hedging is not None:
+            progress.log(hedging.summary())
+        if timeouts is not None:
+            progress.log(timeouts.summary())
+        if endpoints is not None:
+            progress.log(endpoints.summary())
+        if stop_rule:
+            used = sum(c['total_trials'] for v in stats.values() for c in v.values())
+            if used < total_tasks:
+                progress.log(
+                    f"Adaptive sampling ({stop_label}): all cells converged after "
+                    f"{used}/{total_tasks} trials."
+                )
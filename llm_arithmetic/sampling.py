@@ -0,0 +1,73 @@
+"""Sequential stopping rules for adaptive per-cell sampling.
+
+A variant/depth cell that a model always (or never) gets right is pinned down
+after a handful of trials; spending the full ``trials_per_cell`` there buys
+nothing. A ``StoppingRule`` stops a cell once the Wilson score interval on its
+accuracy is narrower than a target width, so the saved budget can be spent on
+cells whose accuracy is still uncertain.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Two-sided 95% normal quantile.
+Z_95 = 1.959963984540054
+
+
+def wilson_interval(successes: int, n: int, z: float = Z_95) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion; (0, 1) when ``n == 0``."""
+    if n <= 0:
+        return 0.0, 1.0
+    p = successes / n
+    z2 = z * z
+    denom = 1 + z2 / n
+    centre = (p + z2 / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def interval_width(successes: int, n: int, z: float = Z_95) -> float:
+    low, high = wilson_interval(successes, n, z)
+    return high - low
+
+
+@dataclass
+class StoppingRule:
+    """Stop sampling a cell when its accuracy interval is tighter than ``width``.
+
+    ``min_trials`` guards against stopping on a lucky streak; ``max_trials``
+    caps how much redistributed budget a single uncertain cell may absorb
+    (``None`` means no cap beyond the run budget).
+    """
+
+    width: float
+    min_trials: int = 5
+    max_trials: Optional[int] = None
+    z: float = Z_95
+
+    def __post_init__(self):
+        if not 0 < self.width < 1:
+            raise ValueError(f"ci width must be in (0, 1), got {self.width}")
+        if self.min_trials < 1:
+            raise ValueError(f"min_trials must be >= 1, got {self.min_trials}")
+        if self.max_trials is not None and self.max_trials < self.min_trials:
+            raise ValueError("max_trials must be >= min_trials")
+
+    def width_of(self, correct: int, n: int) -> float:
+        return interval_width(correct, n, self.z)
+
+    def converged(self, correct: int, n: int) -> bool:
+        if n < self.min_trials:
+            return False
+        return self.width_of(correct, n) <= self.width
+
+    def capped(self, n: int) -> bool:
+        return self.max_trials is not None and n >= self.max_trials
+
+    def describe(self) -> str:
+        """Compact, parseable label stored with every trial of an adaptive run."""
+        label = f"wilson:width={self.width:g}:min={self.min_trials}"
+        if self.max_trials is not None:
+            label += f":max={self.max_trials}"
+        return label
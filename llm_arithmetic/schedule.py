@@ -0,0 +1,252 @@
+"""Order in which trials are dispatched across the variant × depth grid.
+
+Filling one cell after another (``variant`` order, the historical behaviour)
+means an interrupted run has complete data for ``int_*`` and nothing for
+``float_*``, and any drift in provider latency or quality over the run lands on
+the later variants. The interleaved orders spread every round of trials over the
+whole grid instead:
+
+- ``interleave``: round-robin, every cell gets its n-th trial before any cell
+  gets its (n+1)-th, in grid order within a round;
+- ``random``: stratified random, same rounds but a random cell order within each.
+
+With concurrency this also mixes cheap shallow prompts with expensive deep ones
+rather than sending a burst of depth-10 ``float_div`` requests at once.
+
+``longest`` trades that spread for wall time. Deep ``float_mul`` / ``float_div``
+requests to a reasoning model can take 10-50x as long as depth-2 ``int_add``, and
+whichever is dispatched last sets the end of a concurrent run. Sending the cells
+with the longest expected latency first (LPT scheduling) leaves short requests to
+fill the slots at the end. Expected latencies come from a ``LatencyModel``: prior
+runs of the same model (``load_latency_history``), updated with this run's
+requests as they finish.
+"""
+
+import glob
+import os
+import random
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+ORDERS = ("interleave", "random", "variant", "longest")
+
+Cell = Tuple[str, int]
+
+
+class LatencyModel:
+    """Expected seconds per request for each cell.
+
+    A cell's estimate is the mean latency of its requests. Trial files written
+    before latencies were recorded only have token counts. For those cells the
+    estimate is mean completion tokens times the seconds per token seen in
+    requests that have both. Without any latency at all, mean completion tokens
+    rank the cells on their own. Cells with no data get the mean of the others,
+    and with no data anywhere deeper cells come first.
+    """
+
+    def __init__(self):
+        # cell -> [sum, count]
+        self._seconds: Dict[Cell, List[float]] = defaultdict(lambda: [0.0, 0])
+        self._tokens: Dict[Cell, List[float]] = defaultdict(lambda: [0.0, 0])
+        self._paired_seconds = 0.0
+        self._paired_tokens = 0
+        self.requests = 0
+
+    def observe(self, cell: Cell, latency: Optional[float] = None, completion_tokens: Optional[int] = None) -> None:
+        """Record one successful request (either measurement may be missing)."""
+        self.requests += 1
+        if latency is not None:
+            self._seconds[cell][0] += latency
+            self._seconds[cell][1] += 1
+        if completion_tokens:
+            self._tokens[cell][0] += completion_tokens
+            self._tokens[cell][1] += 1
+            if latency is not None:
+                self._paired_seconds += latency
+                self._paired_tokens += completion_tokens
+
+    def _known(self, cell: Cell, any_seconds: bool) -> Optional[float]:
+        total, n = self._seconds.get(cell, (0.0, 0))
+        if n:
+            return total / n
+        total, n = self._tokens.get(cell, (0.0, 0))
+        if not n:
+            return None
+        if self._paired_tokens:
+            return total / n * self._paired_seconds / self._paired_tokens
+        if not any_seconds:
+            return total / n  # tokens only: the same (relative) unit for every cell
+        return None
+
+    def estimates(self, cells: List[Cell]) -> Dict[Cell, float]:
+        """Expected latency of each of ``cells``, gaps filled as in the class docstring."""
+        any_seconds = any(n for _, n in self._seconds.values())
+        known = {c: self._known(c, any_seconds) for c in cells}
+        values = [k for k in known.values() if k is not None]
+        fill = sum(values) / len(values) if values else None
+        return {c: k if k is not None else (fill if fill is not None else float(c[1])) for c, k in known.items()}
+
+
+def answered_trials(paths: List[str], model: str) -> List[dict]:
+    """Records of ``model``'s answered trials in ``paths`` (JSONL trial files)."""
+    from llm_arithmetic import io as io_
+
+    answered = []
+    for path in paths:
+        try:
+            records = io_.read_trials(path)
+        except (OSError, ValueError):
+            continue
+        if not records or records[0].get("model") != model:
+            continue  # one model per trial file
+        answered.extend(
+            rec for rec in records
+            if rec.get("model") == model and not rec.get("failed_to_get_reply")
+        )
+    return answered
+
+
+def load_latency_history(records: List[dict]) -> LatencyModel:
+    """A ``LatencyModel`` from trial records (see ``answered_trials``)."""
+    history = LatencyModel()
+    for rec in records:
+        history.observe(
+            (rec["variant"], rec["depth"]), rec.get("latency"),
+            (rec.get("tokens") or {}).get("completion_tokens"),
+        )
+    return history
+
+
+def trial_files(output_dir: str) -> List[str]:
+    """Trial files directly in ``output_dir`` (not shards or traces)."""
+    return sorted(glob.glob(os.path.join(output_dir, "*.jsonl")))
+
+
+def makespan_bound(durations: List[float], workers: int) -> float:
+    """Shortest possible wall time for requests of these ``durations`` on ``workers`` slots.
+
+    No schedule beats the busier of: all request time spread evenly over the
+    slots, or the single longest request.
+    """
+    if not durations:
+        return 0.0
+    return max(sum(durations) / max(1, workers), max(durations))
+
+
+class CellScheduler:
+    """Pick the cell for the next trial given completed stats and in-flight trials.
+
+    ``stats`` is the runner's ``stats[variant][f"depth_{d}"]`` dict and is read
+    live, so adaptive stopping sees every trial as soon as it is recorded. Call
+    ``assign`` when a trial is dispatched and ``complete`` once it is recorded.
+    """
+
+    def __init__(
+        self,
+        stats: Dict[str, Dict[str, dict]],
+        variants: List[str],
+        depths: List[int],
+        trials_per_cell: int,
+        order: str = "interleave",
+        stop_rule=None,
+        rng: Optional[random.Random] = None,
+        budgets: Optional[Dict[Cell, int]] = None,
+        latencies: Optional[LatencyModel] = None,
+    ):
+        if order not in ORDERS:
+            raise ValueError(f"Unknown schedule order: {order!r} (expected one of {ORDERS})")
+        self.stats = stats
+        self.cells: List[Cell] = [(v, d) for v in variants for d in depths]
+        self.trials_per_cell = trials_per_cell
+        # per-cell trial budgets (a shard's share of the grid); default trials_per_cell each
+        self.budgets = budgets or {cell: trials_per_cell for cell in self.cells}
+        self.budget = sum(self.budgets.values())
+        self.order = order
+        self.stop_rule = stop_rule
+        self.rng = rng or random.Random()
+        self.in_flight: Dict[Cell, int] = {cell: 0 for cell in self.cells}
+        # expected latency per cell, for the ``longest`` order
+        self.latencies = latencies if latencies is not None else LatencyModel()
+
+    def _done(self, cell: Cell) -> dict:
+        variant, depth = cell
+        return self.stats[variant][f"depth_{depth}"]
+
+    def assigned(self, cell: Cell) -> int:
+        return self._done(cell)['total_trials'] + self.in_flight[cell]
+
+    def _stopped(self, cell: Cell) -> bool:
+        if not self.stop_rule:
+            return False
+        done = self._done(cell)
+        return (
+            self.stop_rule.converged(done['correct_count'], done['total_trials'])
+            or self.stop_rule.capped(self.assigned(cell))
+        )
+
+    def next_cell(self) -> Optional[Cell]:
+        """Return the cell for the next trial, or None when nothing is left to dispatch."""
+        open_cells = [
+            c for c in self.cells
+            if self.assigned(c) < self.budgets[c] and not self._stopped(c)
+        ]
+        if open_cells:
+            if self.order == "variant":
+                return open_cells[0]
+            if self.order == "longest":
+                expected = self.latencies.estimates(self.cells)
+                return max(open_cells, key=lambda c: (expected[c], -self.assigned(c)))
+            fewest = min(self.assigned(c) for c in open_cells)
+            round_cells = [c for c in open_cells if self.assigned(c) == fewest]
+            if self.order == "random":
+                return self.rng.choice(round_cells)
+            return round_cells[0]
+        if not self.stop_rule:
+            return None
+        # Adaptive: spend the budget saved on converged cells, widest interval
+        # first (spreading concurrent trials over cells rather than piling onto one)
+        if sum(self.assigned(c) for c in self.cells) >= self.budget:
+            return None
+        uncertain = [c for c in self.cells if not self._stopped(c)]
+        if not uncertain:
+            return None
+        return min(
+            uncertain,
+            key=lambda c: (
+                self.in_flight[c],
+                -self.stop_rule.width_of(
+                    self._done(c)['correct_count'], self._done(c)['total_trials']
+                ),
+            ),
+        )
+
+    def assign(self, cell: Cell) -> None:
+        self.in_flight[cell] += 1
+
+    def complete(self, cell: Cell) -> None:
+        self.in_flight[cell] -= 1
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """``"i/N"`` (0 <= i < N) -> (i, N)."""
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Bad shard {spec!r}; expected i/N, e.g. 0/4") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Bad shard {spec!r}; need 0 <= i < N")
+    return index, count
+
+
+def shard_slots(cells: List[Cell], trials_per_cell: int, index: int = 0, count: int = 1) -> Dict[Cell, List[int]]:
+    """Trial indices of each cell that belong to shard ``index`` of ``count``.
+
+    The grid's slots are numbered round by round (slot = k * len(cells) + cell
+    position, for the k-th trial of a cell) and dealt out modulo ``count``, so
+    shards are disjoint, cover the grid, and each gets a slice of every round.
+    """
+    n = len(cells)
+    return {
+        cell: [k for k in range(trials_per_cell) if (k * n + pos) % count == index]
+        for pos, cell in enumerate(cells)
+    }
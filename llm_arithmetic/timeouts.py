@@ -0,0 +1,91 @@
+"""Per-cell request timeouts (``run.py --adaptive-timeout``).
+
+A single ``--timeout`` has to fit the slowest cell: 600 s is long enough for
+a depth-10 ``float_div`` with high reasoning effort, but a hung depth-2
+``int_add`` request then holds its slot for ten minutes. With adaptive
+timeouts, each variant × depth cell gets ``factor`` times the ``quantile``
+(p99 by default) of its successful request latencies, clamped to
+``[floor, ceiling]``. The ceiling is ``--timeout``.
+
+Latencies come from this model's earlier runs in the output directory (trial
+files that recorded ``latency``) and from this run's requests as they finish.
+A cell with fewer than ``MIN_SAMPLES`` latencies uses the ceiling. Only
+successes are observed, so the quantile can underestimate a cell whose slow
+requests keep timing out. To avoid that, a retry after a timeout doubles the
+limit for each attempt so far, up to the ceiling. A legitimately long request
+therefore gets through on a later attempt.
+
+A timed-out attempt has ``error_class`` ``timeout``, and every trial records
+the ``timeout`` of its last attempt.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from llm_arithmetic.hedge import quantile
+
+MIN_SAMPLES = 20
+
+Cell = Tuple[str, int]
+
+
+@dataclass
+class TimeoutOptions:
+    """Settings of ``runner.run(adaptive_timeout=...)``; the ceiling is the run's ``timeout_sec``."""
+    quantile: float = 0.99
+    factor: float = 3.0
+    floor: float = 30.0
+
+    def policy(self, ceiling: float) -> "TimeoutPolicy":
+        return TimeoutPolicy(ceiling, self.quantile, self.factor, self.floor)
+
+
+class TimeoutPolicy:
+    """Request timeout per cell from its observed latencies."""
+
+    def __init__(self, ceiling: float, quantile: float = 0.99, factor: float = 3.0, floor: float = 30.0,
+                 min_samples: int = MIN_SAMPLES):
+        self.ceiling = ceiling
+        self.quantile = quantile
+        self.factor = factor
+        self.floor = min(floor, ceiling)
+        self.min_samples = min_samples
+        self._by_cell: Dict[Cell, List[float]] = defaultdict(list)
+        self._cache: Dict[Cell, float] = {}
+        self.requests = 0
+        self.timeouts = 0
+
+    def observe(self, cell: Cell, latency: float) -> None:
+        """Record a successful request's latency."""
+        self._by_cell[cell].append(latency)
+        self._cache.pop(cell, None)
+
+    def seed(self, records: List[dict]) -> None:
+        """Observe the latencies of earlier trials (see ``schedule.answered_trials``)."""
+        for rec in records:
+            if rec.get("latency") is not None:
+                self.observe((rec["variant"], rec["depth"]), rec["latency"])
+
+    def _base(self, cell: Cell) -> float:
+        values = self._by_cell.get(cell, [])
+        if len(values) < self.min_samples:
+            return self.ceiling
+        if cell not in self._cache:
+            limit = self.factor * quantile(sorted(values), self.quantile)
+            self._cache[cell] = min(self.ceiling, max(self.floor, limit))
+        return self._cache[cell]
+
+    def limit(self, cell: Cell, timed_out: int = 0) -> float:
+        """Timeout in seconds for a request of ``cell`` after ``timed_out`` earlier timeouts."""
+        return min(self.ceiling, self._base(cell) * 2 ** timed_out)
+
+    def limits(self) -> Optional[Tuple[float, float]]:
+        """(shortest, longest) limit over the cells with enough data; None if there are none."""
+        bases = [self._base(c) for c, v in self._by_cell.items() if len(v) >= self.min_samples]
+        return (min(bases), max(bases)) if bases else None
+
+    def summary(self) -> str:
+        span = self.limits()
+        limits = f"{span[0]:.0f}-{span[1]:.0f}s" if span else f"{self.ceiling:.0f}s everywhere"
+        return f"timeouts: {self.timeouts} of {self.requests} requests timed out; per-cell limits {limits}"
@@ -0,0 +1,134 @@
+"""Structured JSONL trace of a run: one span per trial phase.
+
+Every line is a JSON object. The first is a header (``{"event": "run", ...}``),
+the rest are spans::
+
+    {"trial": 17, "span": "attempt", "start": 12.034, "dur": 1.92,
+     "variant": "int_mul", "depth": 6, "attempt": 1, "ok": false,
+     "error_class": "RateLimitError", "error": "..."}
+
+``start`` is seconds since the run started (monotonic clock) and ``dur`` is in
+seconds; spans of one trial share its ``trial`` id. A resumed run appends to
+its trace with another header (``"session": 1, 2, ...``) whose ``offset`` is
+the wall-clock time since the first session started, and its spans start
+from there, so sessions follow each other instead of overlapping. Span names used by the
+runner: ``generate``, ``attempt``, ``backoff``, ``parse``, ``write`` and
+``trial`` (dispatch to record, including time queued behind other requests),
+plus a zero-length ``hedge`` when ``--hedge`` sends a duplicate request.
+``scripts/trace_summary.py`` summarizes a trace.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+
+class Tracer:
+    """Thread-safe JSONL span writer; use as a context manager."""
+
+    def __init__(self, path: str, **run_attrs):
+        self.path = path
+        self._lock = threading.Lock()
+        started_at = datetime.now(timezone.utc)
+        session, offset = 0, 0.0
+        if os.path.exists(path):
+            header, spans = read_trace(path)
+            if header:
+                # a resumed run: continue after the earlier sessions' clock
+                session = len(header["sessions"])
+                first = datetime.fromisoformat(header["started_at"].replace("Z", "+00:00"))
+                offset = max([(started_at - first).total_seconds()] + [s["start"] + s["dur"] for s in spans])
+        self._t0 = time.monotonic() - offset
+        self._file = open(path, "a")
+        self._emit({
+            "event": "run",
+            "started_at": started_at.isoformat().replace("+00:00", "Z"),
+            "session": session,
+            "offset": round(offset, 6),
+            **run_attrs,
+        })
+
+    def now(self) -> float:
+        """Seconds since the run started."""
+        return time.monotonic() - self._t0
+
+    def _emit(self, record: dict) -> None:
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def record(self, trial: int, span: str, start: float, dur: float, **attrs) -> None:
+        self._emit({"trial": trial, "span": span, "start": round(start, 6), "dur": round(dur, 6), **attrs})
+
+    @contextmanager
+    def span(self, trial: int, span: str, **attrs):
+        """Record the enclosed block; ``attrs`` yielded so the block can add to it."""
+        start = self.now()
+        try:
+            yield attrs
+        finally:
+            self.record(trial, span, start, self.now() - start, **attrs)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "Tracer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class NullTracer:
+    """Stands in for ``Tracer`` when tracing is off."""
+
+    path: Optional[str] = None
+
+    def now(self) -> float:
+        return 0.0
+
+    def record(self, *args, **kwargs) -> None:
+        pass
+
+    @contextmanager
+    def span(self, trial: int, span: str, **attrs):
+        yield attrs
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "NullTracer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+def read_trace(path: str):
+    """Return (header, spans) from a trace file, skipping unparsable lines.
+
+    ``header`` is the first session's, with every session's header (one per
+    resume) under ``"sessions"``.
+    """
+    header, spans, sessions = {}, [], []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if rec.get("event") == "run":
+                sessions.append(rec)
+            elif "span" in rec:
+                spans.append(rec)
+    if sessions:
+        header = dict(sessions[0], sessions=sessions)
+    return header, spans
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Any, List
+from typing import Any, List, Optional
 
 # Define the 8 variants: int and float operations
 VARIANTS = [
@@ -7,6 +7,16 @@ VARIANTS = [
     "float_add", "float_sub", "float_mul", "float_div"
 ]
 
+
+def parse_depths(s: str) -> List[int]:
+    """Parse depths: '2-10' (inclusive range) or '2,5,8' (explicit list)."""
+    s = s.strip()
+    if "-" in s and "," not in s:
+        start, end = s.split("-", 1)
+        return list(range(int(start), int(end) + 1))
+    return [int(x.strip()) for x in s.split(",")]
+
+
 @dataclass
 class Trial:
     model: str
@@ -24,4 +34,18 @@ class Trial:
     timestamp: str
     attempts: int
     failed_to_get_reply: bool
-    extra_context: int = 0
\ No newline at end of file
+    extra_context: int = 0
+    stop_rule: Optional[str] = None
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+    latency: Optional[float] = None  # seconds for the successful request attempt
+    seed: Optional[int] = None  # problem-set seed (operands drawn per grid slot)
+    trial_index: Optional[int] = None  # k for the cell's k-th trial when seeded
+    shard: Optional[str] = None  # "i/N" when the run evaluated one shard of the grid
+    error_class: Optional[str] = None  # retry.ERROR_CLASSES key of the last failed request attempt
+    hedged: bool = False  # a duplicate request was sent (see hedge.py)
+    hedge_cost: float = 0.0  # the duplicate's cost, included in cost
+    endpoint: Optional[str] = None  # api_base that served the trial when balancing over several
+    pack_size: Optional[int] = None  # problems asked in the same request (--pack)
+    pack_position: Optional[int] = None  # 1-based number of this problem in that request
+    timeout: Optional[float] = None  # seconds allowed for the last attempt (--adaptive-timeout)
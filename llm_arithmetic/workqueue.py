@@ -0,0 +1,380 @@
+"""Spread one evaluation over several worker machines through a lease queue.
+
+The coordinator publishes the whole trial grid (operands generated up front,
+so every worker evaluates the same problem set) into a SQLite file. Workers
+claim one trial at a time under a lease, run it against their own endpoint
+and write the trial record back. A worker renews its leases while it is alive;
+when one crashes, its leases expire and the trials are handed to the next
+worker that asks. A trial is recorded once: the first result wins.
+
+    python scripts/work_queue.py publish queue.db --depths 2-10 --trials 20 --model-label qwen3-32b
+    python scripts/work_queue.py serve queue.db --host 0.0.0.0 --port 8780   # for workers on other machines
+    uv run run.py --model openai/qwen3-32b --queue http://coordinator:8780 --concurrency 8 \\
+        --litellm-params '{"api_base": "http://localhost:8000/v1"}'
+    python scripts/work_queue.py export queue.db --output-dir results
+
+Workers on the same machine (or a filesystem with working POSIX locks) can
+open ``queue.db`` directly instead of going through ``serve``. The HTTP API
+has no authentication, so ``QueueServer`` listens on 127.0.0.1 unless given
+another host; expose it only on a network you trust.
+"""
+
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from llm_arithmetic import gen, io as io_, types
+
+DEFAULT_LEASE_SEC = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    variant TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    lhs TEXT NOT NULL,
+    rhs TEXT NOT NULL,
+    correct TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    claims INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (status, id);
+"""
+
+
+def decode_operand(variant: str, value: str):
+    return int(value) if variant.startswith("int") else Decimal(value)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """SQLite-backed trial queue; safe to share between threads and processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        db = sqlite3.connect(path, timeout=30)
+        try:
+            db.executescript(_SCHEMA)
+        finally:
+            db.close()
+
+    @contextmanager
+    def _tx(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def publish(self, depths: List[int], trials_per_cell: int, model: Optional[str] = None,
+                seed: Optional[int] = None) -> int:
+        """Generate and enqueue the grid; returns the number of trials added.
+
+        Operands come from ``gen.slot_problem`` under ``seed`` (a random one if
+        None), which is stored in the queue's meta, so the same seed reproduces
+        the problem set of a seeded ``run.py --seed`` run. Rows go in round by
+        round (every cell's n-th trial before any (n+1)-th), so claims in id
+        order interleave cells like ``--schedule interleave``.
+        """
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        rows = []
+        for k in range(trials_per_cell):
+            for variant in types.VARIANTS:
+                for depth in depths:
+                    lhs, rhs = gen.slot_problem(seed, variant, depth, k)
+                    correct = gen.compute_correct(variant, lhs, rhs)
+                    rows.append((variant, depth, str(lhs), str(rhs), str(correct)))
+        meta = {
+            "model": model,
+            "depths": list(depths),
+            "trials_per_cell": trials_per_cell,
+            "seed": seed,
+            "variants": list(types.VARIANTS),
+            "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        }
+        with self._tx() as db:
+            if db.execute("SELECT COUNT(*) FROM items").fetchone()[0]:
+                raise ValueError(f"{self.path} already holds a published grid")
+            db.executemany("INSERT INTO items (variant, depth, lhs, rhs, correct) VALUES (?, ?, ?, ?, ?)", rows)
+            db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                           [(k, json.dumps(v)) for k, v in meta.items()])
+        return len(rows)
+
+    def meta(self) -> dict:
+        with self._tx() as db:
+            return {k: json.loads(v) for k, v in db.execute("SELECT key, value FROM meta")}
+
+    def claim(self, worker: str, lease_sec: float = DEFAULT_LEASE_SEC) -> Optional[dict]:
+        """Lease the oldest pending (or expired) trial to ``worker``; None when there is none."""
+        now = time.time()
+        with self._tx() as db:
+            row = db.execute(
+                "SELECT id, variant, depth, lhs, rhs, correct FROM items "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE items SET status = 'leased', worker = ?, lease_expires = ?, claims = claims + 1 "
+                "WHERE id = ?",
+                (worker, now + lease_sec, row[0]),
+            )
+        keys = ("id", "variant", "depth", "lhs", "rhs", "correct")
+        return dict(zip(keys, row))
+
+    def complete(self, item_id: int, worker: str, record: dict) -> bool:
+        """Store the trial record; False if the trial was already recorded (by anyone)."""
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE items SET status = 'done', worker = ?, result = ?, finished_at = ?, lease_expires = NULL "
+                "WHERE id = ? AND status != 'done'",
+                (worker, json.dumps(record, default=str), time.time(), item_id),
+            )
+            return cur.rowcount == 1
+
+    def renew(self, worker: str, lease_sec: float = DEFAULT_LEASE_SEC) -> int:
+        """Extend every lease ``worker`` holds; returns how many."""
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE items SET lease_expires = ? WHERE worker = ? AND status = 'leased'",
+                (time.time() + lease_sec, worker),
+            )
+            return cur.rowcount
+
+    def release(self, worker: str) -> int:
+        """Give back ``worker``'s unfinished leases (clean shutdown)."""
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE items SET status = 'pending', worker = NULL, lease_expires = NULL "
+                "WHERE worker = ? AND status = 'leased'",
+                (worker,),
+            )
+            return cur.rowcount
+
+    def counts(self) -> dict:
+        """{"pending", "leased", "expired", "done", "total"}."""
+        with self._tx() as db:
+            by_status = dict(db.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall())
+            expired = db.execute(
+                "SELECT COUNT(*) FROM items WHERE status = 'leased' AND lease_expires < ?", (time.time(),)
+            ).fetchone()[0]
+        counts = {s: by_status.get(s, 0) for s in ("pending", "leased", "done")}
+        counts["expired"] = expired
+        counts["total"] = sum(by_status.values())
+        return counts
+
+    def workers(self) -> dict:
+        """{worker: trials recorded} for finished trials."""
+        with self._tx() as db:
+            return dict(db.execute(
+                "SELECT worker, COUNT(*) FROM items WHERE status = 'done' GROUP BY worker ORDER BY worker"
+            ).fetchall())
+
+    def records(self) -> List[dict]:
+        """Recorded trials in grid order."""
+        with self._tx() as db:
+            return [json.loads(r) for (r,) in db.execute("SELECT result FROM items WHERE status = 'done' ORDER BY id")]
+
+    def export(self, path: str) -> int:
+        """Append the recorded trials to a results JSONL; returns how many."""
+        records = self.records()
+        with open(path, "a") as f:
+            for rec in records:
+                f.write(json.dumps(rec, default=str) + "\n")
+        return len(records)
+
+
+class _QueueHandler(BaseHTTPRequestHandler):
+    server: "QueueServer"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        q = self.server.queue
+        if self.path == "/meta":
+            self._reply(q.meta())
+        elif self.path == "/counts":
+            self._reply(q.counts())
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        q = self.server.queue
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            req = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self.send_error(400, "Invalid JSON")
+            return
+        if self.path == "/claim":
+            self._reply(q.claim(req["worker"], req.get("lease_sec", DEFAULT_LEASE_SEC)))
+        elif self.path == "/complete":
+            self._reply(q.complete(req["id"], req["worker"], req["record"]))
+        elif self.path == "/renew":
+            self._reply(q.renew(req["worker"], req.get("lease_sec", DEFAULT_LEASE_SEC)))
+        elif self.path == "/release":
+            self._reply(q.release(req["worker"]))
+        else:
+            self.send_error(404)
+
+
+class QueueServer(ThreadingHTTPServer):
+    """Serves a ``WorkQueue`` as JSON over HTTP for workers on other machines."""
+
+    daemon_threads = True
+
+    def __init__(self, queue: WorkQueue, host: str = "127.0.0.1", port: int = 8780):
+        super().__init__((host, port), _QueueHandler)
+        self.queue = queue
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{'127.0.0.1' if host == '0.0.0.0' else host}:{port}"
+
+    def __enter__(self) -> "QueueServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class RemoteQueue:
+    """Client for ``QueueServer`` with the same methods workers use on ``WorkQueue``."""
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _call(self, path: str, payload: Optional[dict] = None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return json.loads(resp.read())
+
+    def meta(self) -> dict:
+        return self._call("/meta")
+
+    def counts(self) -> dict:
+        return self._call("/counts")
+
+    def claim(self, worker: str, lease_sec: float = DEFAULT_LEASE_SEC) -> Optional[dict]:
+        return self._call("/claim", {"worker": worker, "lease_sec": lease_sec})
+
+    def complete(self, item_id: int, worker: str, record: dict) -> bool:
+        return self._call("/complete", {"id": item_id, "worker": worker,
+                                        "record": json.loads(json.dumps(record, default=str))})
+
+    def renew(self, worker: str, lease_sec: float = DEFAULT_LEASE_SEC) -> int:
+        return self._call("/renew", {"worker": worker, "lease_sec": lease_sec})
+
+    def release(self, worker: str) -> int:
+        return self._call("/release", {"worker": worker})
+
+
+def open_queue(spec: str):
+    """``http(s)://…`` → ``RemoteQueue``, anything else → ``WorkQueue`` file (must exist)."""
+    if spec.startswith(("http://", "https://")):
+        return RemoteQueue(spec)
+    if not os.path.exists(spec):
+        raise FileNotFoundError(f"No work queue at {spec}; publish one with scripts/work_queue.py publish")
+    return WorkQueue(spec)
+
+
+class QueueWorker:
+    """The runner's side of a queue: claims, records and keeps its leases alive.
+
+    Use as a context manager; while active a background thread renews this
+    worker's leases every ``lease_sec / 3`` seconds, and on exit any trials
+    still leased are released for other workers.
+    """
+
+    def __init__(self, store, worker: Optional[str] = None, lease_sec: float = DEFAULT_LEASE_SEC,
+                 poll_sec: float = 2.0):
+        self.store = store
+        self.worker = worker or default_worker_id()
+        self.lease_sec = lease_sec
+        self.poll_sec = poll_sec
+        self._stop = threading.Event()
+        self._thread = None
+
+    def meta(self) -> dict:
+        return self.store.meta()
+
+    def claim(self) -> Optional[dict]:
+        item = self.store.claim(self.worker, self.lease_sec)
+        if item is None:
+            return None
+        return dict(
+            item,
+            lhs=decode_operand(item["variant"], item["lhs"]),
+            rhs=decode_operand(item["variant"], item["rhs"]),
+            correct=decode_operand(item["variant"], item["correct"]),
+        )
+
+    def complete(self, item_id: int, trial: types.Trial) -> bool:
+        return self.store.complete(item_id, self.worker, io_.trial_record(trial))
+
+    def counts(self) -> dict:
+        return self.store.counts()
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.lease_sec / 3):
+            try:
+                self.store.renew(self.worker, self.lease_sec)
+            except Exception:
+                pass  # a missed renewal only risks a duplicate; the next one may succeed
+
+    def __enter__(self) -> "QueueWorker":
+        self._thread = threading.Thread(target=self._heartbeat, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._stop.set()
+        self._thread.join()
+        try:
+            self.store.release(self.worker)
+        except Exception:
+            pass  # unreachable coordinator: the leases expire on their own
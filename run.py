@@ -1,10 +1,11 @@
-from llm_arithmetic.runner import run
-from dotenv import load_dotenv
 import argparse
 import os
 import json
 
-load_dotenv()
+from llm_arithmetic.types import parse_depths
+
+# Heavy imports (litellm via llm_arithmetic.runner, dotenv, rich) are deferred
+# until after argument parsing so `--help` starts fast; see tests/test_startup.py.
 
 # Edit these defaults when not passing CLI flags.
 DEFAULTS = {
@@ -13,27 +14,55 @@ DEFAULTS = {
     "output_dir": "results",
     "reasoning_effort": None,
     "resume_file": None,
+    "repair": None,  # results JSONL whose failed / empty trials are re-issued and replaced
     "extra_context": 0,
     "retries": 3,
     "retry_delay": 5.0,
+    "timeout": 600,  # seconds per request; the ceiling with adaptive_timeout
     "model_alias": None,
     "litellm_params": None,
     "system_prompt": None,
+    "ci_width": None,  # e.g. 0.3 enables adaptive per-cell early stopping
+    "min_trials": 5,
+    "max_trials": None,
+    "schedule": "interleave",  # interleave | random | variant | longest
+    "concurrency": 1,
+    "pool_size": None,  # shared HTTP keep-alive pool; None = max(10, concurrency)
+    "http2": True,
+    "prompt_cache": False,
+    "profile": None,  # cprofile | tracemalloc | pyinstrument
+    "metrics_port": None,  # e.g. 9464 serves http://127.0.0.1:9464/metrics
+    "metrics_textfile": None,  # e.g. /var/lib/node_exporter/textfile/llm_arith.prom
+    "trace": False,  # per-trial span log under <output_dir>/traces/
+    "dashboard": False,  # live variant x depth grid instead of the progress bar
+    "queue": None,  # work as a queue worker: queue.db path or http://coordinator:8780
+    "worker_id": None,  # default <hostname>-<pid>
+    "lease_sec": 60.0,
+    "seed": None,  # reproducible problem set; required with --shard
+    "shard": None,  # "i/N": evaluate shard i (0-based) of N; merge with scripts/merge_shards.py
+    "backend": "thread",  # thread | process (CPU-bound in-process models)
+    "worker_init": None,  # module:function run in each worker process, e.g. to load a local model
+    "batch_api": None,  # openai | anthropic | local | auto: one provider batch job at batch prices
+    "batch_poll_sec": 30.0,
+    "breaker_threshold": 0.5,  # pause when this share of the last breaker_window requests failed; 0 = off
+    "breaker_window": 20,
+    "breaker_cooldown": 30.0,  # seconds before a probe request; doubles while probes keep failing
+    "hedge": False,  # duplicate requests outstanding past their cell's latency quantile
+    "hedge_quantile": 0.95,
+    "hedge_max_rate": 0.1,  # at most this share of requests get a duplicate
+    "eject_after": 3,  # with several api_base values: consecutive failures before an endpoint is ejected
+    "health_interval": 10.0,  # seconds between endpoint health checks; 0 = off
+    "pack": 1,  # problems asked per request; >1 amortises the prompt over several problems
+    "adaptive_timeout": False,  # per-cell timeouts: timeout_factor × the cell's timeout_quantile latency
+    "timeout_quantile": 0.99,
+    "timeout_factor": 3.0,
+    "timeout_floor": 30.0,  # never time out sooner than this
 }
 # LITELLM_PARAMS examples:
 # {"thinking": {"type": "enabled", "budget_tokens": 1024}}
 # {"thinking": {"type": "enabled", "budget_tokens": 0}}
 
 
-def parse_depths(s: str) -> list[int]:
-    """Parse depths: '2-10' (inclusive range) or '2,5,8' (explicit list)."""
-    s = s.strip()
-    if "-" in s and "," not in s:
-        start, end = s.split("-", 1)
-        return list(range(int(start), int(end) + 1))
-    return [int(x.strip()) for x in s.split(",")]
-
-
 def parse_litellm_params(value):
     if value is None:
         return None
@@ -49,7 +78,7 @@ def parse_args():
     p = argparse.ArgumentParser(description="Run LLM arithmetic evaluation suite")
     p.add_argument(
         "--model",
-        default=os.getenv("MODEL"),
+        default=None,
         help="Model id (or set MODEL in .env)",
     )
     p.add_argument("--trials", type=int, default=DEFAULTS["trials"], help="Trials per cell")
@@ -66,6 +95,12 @@ def parse_args():
         help="Reasoning effort level",
     )
     p.add_argument("--resume-file", default=DEFAULTS["resume_file"], help="JSONL file to resume")
+    p.add_argument(
+        "--repair",
+        default=DEFAULTS["repair"],
+        help="Results JSONL to repair: re-issue only its failed or empty trials (same operands) "
+        "and replace those records in place",
+    )
     p.add_argument(
         "--extra-context",
         type=int,
@@ -73,7 +108,8 @@ def parse_args():
         help="k tokens of dialog from data/dialog_{k}k.json",
     )
     p.add_argument("--retries", type=int, default=DEFAULTS["retries"], help="API retries")
-    p.add_argument("--retry-delay", type=float, default=DEFAULTS["retry_delay"], help="Retry delay (seconds)")
+    p.add_argument("--retry-delay", type=float, default=DEFAULTS["retry_delay"], help="Base retry backoff (seconds; doubled per attempt, jittered, Retry-After wins)")
+    p.add_argument("--timeout", type=int, default=DEFAULTS["timeout"], help="Request timeout (seconds)")
     p.add_argument("--model-alias", default=DEFAULTS["model_alias"], help="Display/pricing alias")
     p.add_argument(
         "--litellm-params",
@@ -85,6 +121,224 @@ def parse_args():
         default=DEFAULTS["system_prompt"],
         help='System prompt (e.g. "/no_think" for Qwen 3)',
     )
+    p.add_argument(
+        "--ci-width",
+        type=float,
+        default=DEFAULTS["ci_width"],
+        help="Adaptive sampling: stop a cell once its 95%% Wilson interval on accuracy is "
+        "narrower than this (e.g. 0.3); saved trials go to uncertain cells",
+    )
+    p.add_argument(
+        "--min-trials",
+        type=int,
+        default=DEFAULTS["min_trials"],
+        help="Adaptive sampling: trials per cell before it may stop",
+    )
+    p.add_argument(
+        "--max-trials",
+        type=int,
+        default=DEFAULTS["max_trials"],
+        help="Adaptive sampling: cap on trials per cell when redistributing budget",
+    )
+    p.add_argument(
+        "--schedule",
+        choices=["interleave", "random", "variant", "longest"],
+        default=DEFAULTS["schedule"],
+        help="Trial order across cells: round-robin, stratified random, variant-major, or longest "
+        "expected latency first (from earlier runs of the model in --output-dir)",
+    )
+    p.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULTS["concurrency"],
+        help="Requests in flight at once",
+    )
+    p.add_argument(
+        "--pool-size",
+        type=int,
+        default=DEFAULTS["pool_size"],
+        help="Connections in the shared keep-alive HTTP pool (default: max(10, concurrency))",
+    )
+    p.add_argument(
+        "--no-http2",
+        dest="http2",
+        action="store_false",
+        default=DEFAULTS["http2"],
+        help="Disable HTTP/2 on the shared pool",
+    )
+    p.add_argument(
+        "--prompt-cache",
+        action="store_true",
+        default=DEFAULTS["prompt_cache"],
+        help="Mark the system prompt + extra context prefix for provider prompt caching",
+    )
+    p.add_argument(
+        "--profile",
+        choices=["cprofile", "tracemalloc", "pyinstrument"],
+        default=DEFAULTS["profile"],
+        help="Profile the run; writes profile_run_<date>.<ext> to the output dir and prints hotspots",
+    )
+    p.add_argument(
+        "--metrics-port",
+        type=int,
+        default=DEFAULTS["metrics_port"],
+        help="Serve live Prometheus/OpenMetrics metrics on http://127.0.0.1:<port>/metrics",
+    )
+    p.add_argument(
+        "--metrics-textfile",
+        default=DEFAULTS["metrics_textfile"],
+        help="Also write the metrics to this .prom file (node_exporter textfile collector)",
+    )
+    p.add_argument(
+        "--trace",
+        action="store_true",
+        default=DEFAULTS["trace"],
+        help="Write a JSONL trace of per-trial phases to <output-dir>/traces/ (see scripts/trace_summary.py)",
+    )
+    p.add_argument(
+        "--dashboard",
+        action="store_true",
+        default=DEFAULTS["dashboard"],
+        help="Show a live accuracy grid, throughput, latency and ETA instead of the progress bar",
+    )
+    p.add_argument(
+        "--queue",
+        default=DEFAULTS["queue"],
+        help="Run as a worker on a shared work queue (queue.db or http://host:port from scripts/work_queue.py); "
+        "the queue's grid replaces --trials/--depths",
+    )
+    p.add_argument(
+        "--worker-id",
+        default=DEFAULTS["worker_id"],
+        help="Name of this worker in the queue (default <hostname>-<pid>)",
+    )
+    p.add_argument(
+        "--lease-sec",
+        type=float,
+        default=DEFAULTS["lease_sec"],
+        help="Lease length for claimed queue trials; leases of a crashed worker are reissued after this",
+    )
+    p.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULTS["seed"],
+        help="Seed the problem set: each variant/depth/trial slot gets the same operands on every run",
+    )
+    p.add_argument(
+        "--shard",
+        default=DEFAULTS["shard"],
+        help="Evaluate only shard i/N (0-based, e.g. 0/4) of the grid; needs --seed. "
+        "Combine shard files with scripts/merge_shards.py",
+    )
+    p.add_argument(
+        "--backend",
+        choices=["thread", "process"],
+        default=DEFAULTS["backend"],
+        help="Run completions on threads (network APIs) or in --concurrency worker processes "
+        "(CPU-bound in-process models)",
+    )
+    p.add_argument(
+        "--worker-init",
+        default=DEFAULTS["worker_init"],
+        help="module:function called once in each worker process, e.g. to load a model and register "
+        "a litellm custom provider (see llm_arithmetic/procpool.py)",
+    )
+    p.add_argument(
+        "--batch-api",
+        nargs="?",
+        const="auto",
+        choices=["auto", "openai", "anthropic", "local"],
+        default=DEFAULTS["batch_api"],
+        help="Submit the whole grid as one provider batch job (about half price, results within 24h) "
+        "and wait for it; 'local' is an offline stand-in. Resume an interrupted wait with --resume-file",
+    )
+    p.add_argument(
+        "--batch-poll-sec",
+        type=float,
+        default=DEFAULTS["batch_poll_sec"],
+        help="Seconds between batch status checks",
+    )
+    p.add_argument(
+        "--breaker-threshold",
+        type=float,
+        default=DEFAULTS["breaker_threshold"],
+        help="Pause the run when this share of the last --breaker-window requests failed (0 disables)",
+    )
+    p.add_argument(
+        "--breaker-window",
+        type=int,
+        default=DEFAULTS["breaker_window"],
+        help="Number of recent requests the circuit breaker looks at",
+    )
+    p.add_argument(
+        "--breaker-cooldown",
+        type=float,
+        default=DEFAULTS["breaker_cooldown"],
+        help="Seconds to pause before a probe request once the breaker trips (doubles per failed probe)",
+    )
+    p.add_argument(
+        "--hedge",
+        action="store_true",
+        default=DEFAULTS["hedge"],
+        help="Send a duplicate of requests still outstanding after their cell's --hedge-quantile latency; "
+        "the first reply wins",
+    )
+    p.add_argument(
+        "--hedge-quantile",
+        type=float,
+        default=DEFAULTS["hedge_quantile"],
+        help="Latency quantile of the variant/depth cell after which a request is hedged",
+    )
+    p.add_argument(
+        "--hedge-max-rate",
+        type=float,
+        default=DEFAULTS["hedge_max_rate"],
+        help="Cap on duplicate requests as a share of all requests",
+    )
+    p.add_argument(
+        "--eject-after",
+        type=int,
+        default=DEFAULTS["eject_after"],
+        help="With a list of api_base values in --litellm-params: consecutive failures before an "
+        "endpoint is taken out of rotation",
+    )
+    p.add_argument(
+        "--health-interval",
+        type=float,
+        default=DEFAULTS["health_interval"],
+        help="Seconds between endpoint health checks (GET <api_base>/models; 0 disables)",
+    )
+    p.add_argument(
+        "--pack",
+        type=int,
+        default=DEFAULTS["pack"],
+        help="Ask this many numbered problems per request; each still becomes its own trial",
+    )
+    p.add_argument(
+        "--adaptive-timeout",
+        action="store_true",
+        default=DEFAULTS["adaptive_timeout"],
+        help="Time requests out per variant/depth cell at --timeout-factor × its --timeout-quantile "
+        "latency (earlier runs and this one), between --timeout-floor and --timeout",
+    )
+    p.add_argument(
+        "--timeout-quantile",
+        type=float,
+        default=DEFAULTS["timeout_quantile"],
+        help="Latency quantile of the cell that adaptive timeouts scale",
+    )
+    p.add_argument(
+        "--timeout-factor",
+        type=float,
+        default=DEFAULTS["timeout_factor"],
+        help="Adaptive timeout = this × the cell's latency quantile",
+    )
+    p.add_argument(
+        "--timeout-floor",
+        type=float,
+        default=DEFAULTS["timeout_floor"],
+        help="Shortest adaptive timeout (seconds)",
+    )
     return p.parse_args()
 
 
@@ -99,9 +353,46 @@ def build_settings(args) -> dict:
         "EXTRA_CONTEXT": args.extra_context,
         "RETRIES": args.retries,
         "RETRY_DELAY": args.retry_delay,
+        "TIMEOUT": args.timeout,
         "MODEL_ALIAS": args.model_alias,
         "LITELLM_PARAMS": args.litellm_params,
         "SYSTEM_PROMPT": args.system_prompt,
+        "CI_WIDTH": args.ci_width,
+        "MIN_TRIALS": args.min_trials,
+        "MAX_TRIALS": args.max_trials,
+        "SCHEDULE": args.schedule,
+        "CONCURRENCY": args.concurrency,
+        "POOL_SIZE": args.pool_size,
+        "HTTP2": args.http2,
+        "PROMPT_CACHE": args.prompt_cache,
+        "PROFILE": args.profile,
+        "METRICS_PORT": args.metrics_port,
+        "METRICS_TEXTFILE": args.metrics_textfile,
+        "TRACE": args.trace,
+        "DASHBOARD": args.dashboard,
+        "QUEUE": args.queue,
+        "REPAIR": args.repair,
+        "WORKER_ID": args.worker_id,
+        "LEASE_SEC": args.lease_sec,
+        "SEED": args.seed,
+        "SHARD": args.shard,
+        "BACKEND": args.backend,
+        "WORKER_INIT": args.worker_init,
+        "BATCH_API": args.batch_api,
+        "BATCH_POLL_SEC": args.batch_poll_sec,
+        "BREAKER_THRESHOLD": args.breaker_threshold,
+        "BREAKER_WINDOW": args.breaker_window,
+        "BREAKER_COOLDOWN": args.breaker_cooldown,
+        "HEDGE": args.hedge,
+        "HEDGE_QUANTILE": args.hedge_quantile,
+        "HEDGE_MAX_RATE": args.hedge_max_rate,
+        "EJECT_AFTER": args.eject_after,
+        "HEALTH_INTERVAL": args.health_interval,
+        "PACK": args.pack,
+        "ADAPTIVE_TIMEOUT": args.adaptive_timeout,
+        "TIMEOUT_QUANTILE": args.timeout_quantile,
+        "TIMEOUT_FACTOR": args.timeout_factor,
+        "TIMEOUT_FLOOR": args.timeout_floor,
     }
 
 
@@ -116,14 +407,56 @@ def default_settings() -> dict:
         "EXTRA_CONTEXT": DEFAULTS["extra_context"],
         "RETRIES": DEFAULTS["retries"],
         "RETRY_DELAY": DEFAULTS["retry_delay"],
+        "TIMEOUT": DEFAULTS["timeout"],
         "MODEL_ALIAS": DEFAULTS["model_alias"],
         "LITELLM_PARAMS": DEFAULTS["litellm_params"],
         "SYSTEM_PROMPT": DEFAULTS["system_prompt"],
+        "CI_WIDTH": DEFAULTS["ci_width"],
+        "MIN_TRIALS": DEFAULTS["min_trials"],
+        "MAX_TRIALS": DEFAULTS["max_trials"],
+        "SCHEDULE": DEFAULTS["schedule"],
+        "CONCURRENCY": DEFAULTS["concurrency"],
+        "POOL_SIZE": DEFAULTS["pool_size"],
+        "HTTP2": DEFAULTS["http2"],
+        "PROMPT_CACHE": DEFAULTS["prompt_cache"],
+        "PROFILE": DEFAULTS["profile"],
+        "METRICS_PORT": DEFAULTS["metrics_port"],
+        "METRICS_TEXTFILE": DEFAULTS["metrics_textfile"],
+        "TRACE": DEFAULTS["trace"],
+        "DASHBOARD": DEFAULTS["dashboard"],
+        "QUEUE": DEFAULTS["queue"],
+        "REPAIR": DEFAULTS["repair"],
+        "WORKER_ID": DEFAULTS["worker_id"],
+        "LEASE_SEC": DEFAULTS["lease_sec"],
+        "SEED": DEFAULTS["seed"],
+        "SHARD": DEFAULTS["shard"],
+        "BACKEND": DEFAULTS["backend"],
+        "WORKER_INIT": DEFAULTS["worker_init"],
+        "BATCH_API": DEFAULTS["batch_api"],
+        "BATCH_POLL_SEC": DEFAULTS["batch_poll_sec"],
+        "BREAKER_THRESHOLD": DEFAULTS["breaker_threshold"],
+        "BREAKER_WINDOW": DEFAULTS["breaker_window"],
+        "BREAKER_COOLDOWN": DEFAULTS["breaker_cooldown"],
+        "HEDGE": DEFAULTS["hedge"],
+        "HEDGE_QUANTILE": DEFAULTS["hedge_quantile"],
+        "HEDGE_MAX_RATE": DEFAULTS["hedge_max_rate"],
+        "EJECT_AFTER": DEFAULTS["eject_after"],
+        "HEALTH_INTERVAL": DEFAULTS["health_interval"],
+        "PACK": DEFAULTS["pack"],
+        "ADAPTIVE_TIMEOUT": DEFAULTS["adaptive_timeout"],
+        "TIMEOUT_QUANTILE": DEFAULTS["timeout_quantile"],
+        "TIMEOUT_FACTOR": DEFAULTS["timeout_factor"],
+        "TIMEOUT_FLOOR": DEFAULTS["timeout_floor"],
     }
 
 
 def main():
     args = parse_args()
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if args.model is None:
+        args.model = os.getenv("MODEL")
     settings = build_settings(args)
 
     if not settings["MODEL"]:
@@ -131,22 +464,96 @@ def main():
 
     litellm_params = parse_litellm_params(settings["LITELLM_PARAMS"])
 
+    shard = None
+    if settings["SHARD"]:
+        from llm_arithmetic.schedule import parse_shard
+
+        shard = parse_shard(settings["SHARD"])
+        if settings["SEED"] is None:
+            raise ValueError("--shard needs --seed (the same on every shard) so shards share one problem set")
+
     print_params(settings)
 
-    run(
-        model=settings["MODEL"],
-        trials_per_cell=settings["TRIALS"],
-        depths=settings["DEPTHS"],
-        output_dir=settings["OUTPUT_DIR"],
-        reasoning_effort=settings["REASONING_EFFORT"],
-        resume_file=settings["RESUME_FILE"],
-        retries=settings["RETRIES"],
-        retry_delay=settings["RETRY_DELAY"],
-        model_alias=settings["MODEL_ALIAS"],
-        litellm_params=litellm_params,
-        extra_context=settings["EXTRA_CONTEXT"],
-        system_prompt=settings["SYSTEM_PROMPT"],
-    )
+    from llm_arithmetic.profiling import profiled
+
+    work_queue = None
+    if settings["QUEUE"]:
+        from llm_arithmetic.workqueue import QueueWorker, open_queue
+
+        work_queue = QueueWorker(
+            open_queue(settings["QUEUE"]), worker=settings["WORKER_ID"], lease_sec=settings["LEASE_SEC"]
+        )
+    if settings["REPAIR"]:
+        if work_queue is not None or settings["BATCH_API"] or shard is not None or settings["SEED"] is not None:
+            raise ValueError("--repair re-issues the trials of one file; it can't be combined with "
+                             "--queue, --batch-api, --shard or --seed")
+        from llm_arithmetic.repair import RepairQueue
+
+        work_queue = RepairQueue(settings["REPAIR"], extra_context=settings["EXTRA_CONTEXT"])
+        if not work_queue.broken:
+            print(work_queue.summary())
+            return
+
+    with profiled(settings["PROFILE"], settings["OUTPUT_DIR"], "run"):
+        from llm_arithmetic.endpoints import EndpointOptions
+        from llm_arithmetic.hedge import HedgeOptions
+        from llm_arithmetic.retry import RetryOptions
+        from llm_arithmetic.runner import run
+        from llm_arithmetic.timeouts import TimeoutOptions
+
+        run(
+            model=settings["MODEL"],
+            trials_per_cell=settings["TRIALS"],
+            depths=settings["DEPTHS"],
+            output_dir=settings["OUTPUT_DIR"],
+            reasoning_effort=settings["REASONING_EFFORT"],
+            resume_file=settings["RESUME_FILE"],
+            retry=RetryOptions(
+                retries=settings["RETRIES"],
+                delay=settings["RETRY_DELAY"],
+                breaker_threshold=settings["BREAKER_THRESHOLD"],
+                breaker_window=settings["BREAKER_WINDOW"],
+                breaker_cooldown=settings["BREAKER_COOLDOWN"],
+            ),
+            timeout_sec=settings["TIMEOUT"],
+            model_alias=settings["MODEL_ALIAS"],
+            litellm_params=litellm_params,
+            extra_context=settings["EXTRA_CONTEXT"],
+            system_prompt=settings["SYSTEM_PROMPT"],
+            ci_width=settings["CI_WIDTH"],
+            min_trials=settings["MIN_TRIALS"],
+            max_trials=settings["MAX_TRIALS"],
+            schedule=settings["SCHEDULE"],
+            concurrency=settings["CONCURRENCY"],
+            pool_size=settings["POOL_SIZE"],
+            http2=settings["HTTP2"],
+            prompt_cache=settings["PROMPT_CACHE"],
+            metrics_port=settings["METRICS_PORT"],
+            metrics_textfile=settings["METRICS_TEXTFILE"],
+            trace=settings["TRACE"],
+            dashboard=settings["DASHBOARD"],
+            work_queue=work_queue,
+            seed=settings["SEED"],
+            shard=shard,
+            backend=settings["BACKEND"],
+            worker_init=settings["WORKER_INIT"],
+            batch_api=settings["BATCH_API"],
+            batch_poll_sec=settings["BATCH_POLL_SEC"],
+            hedge=HedgeOptions(
+                quantile=settings["HEDGE_QUANTILE"], max_rate=settings["HEDGE_MAX_RATE"]
+            ) if settings["HEDGE"] else None,
+            endpoint_pool=EndpointOptions(
+                eject_after=settings["EJECT_AFTER"], health_interval=settings["HEALTH_INTERVAL"]
+            ),
+            pack=settings["PACK"],
+            adaptive_timeout=TimeoutOptions(
+                quantile=settings["TIMEOUT_QUANTILE"],
+                factor=settings["TIMEOUT_FACTOR"],
+                floor=settings["TIMEOUT_FLOOR"],
+            ) if settings["ADAPTIVE_TIMEOUT"] else None,
+        )
+    if settings["REPAIR"]:
+        print(work_queue.summary())
 
 
 def print_params(settings: dict):
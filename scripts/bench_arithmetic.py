@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Throughput of problem generation, correct answers and answer checking vs depth.
+
+For each depth and variant, times ``gen.gen_*_pair`` + ``gen.compute_correct``
++ ``parse.parse_response``. Half of the checked answers are off by one, so the
+error path runs too. The numbers come from the exact scaled-integer engine
+(``llm_arithmetic.exact``). The "legacy" columns redo the float variants
+with the previous 28-digit ``Decimal`` code and report the share of problems
+it still got exactly right. From depth 13 that share drops for ``float_mul``
+and ``float_div``.
+
+Usage:
+    python scripts/bench_arithmetic.py                          # depths 2,5,10,20,50,100,200,500
+    python scripts/bench_arithmetic.py --depths 10,100,1000 --problems 500
+    python scripts/bench_arithmetic.py --save                   # store in data/benchmarks/arithmetic.json
+"""
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import platform
+from decimal import Decimal, InvalidOperation, localcontext
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_arithmetic import exact, gen, parse, types  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FILE = os.path.join(REPO_ROOT, "data", "benchmarks", "arithmetic.json")
+FLOAT_VARIANTS = [v for v in types.VARIANTS if v.startswith("float")]
+
+
+def legacy_float(variant, depth, rng):
+    """The pre-``exact`` float path: Decimal operands and results in a 28-digit context."""
+    with localcontext() as ctx:
+        ctx.prec = 28
+        scale = Decimal("0.01")
+        low, high = 10 ** (depth - 1) * 100, (10 ** depth - 1) * 100
+        if variant == "float_div":
+            divisor, quotient = rng.randint(low, high), rng.randint(low, high)
+            lhs, rhs = Decimal(divisor * quotient) * scale, Decimal(divisor) * scale
+        else:
+            lhs, rhs = Decimal(rng.randint(low, high)) * scale, Decimal(rng.randint(low, high)) * scale
+        op = variant.split("_")[1]
+        if op == "add":
+            return lhs + rhs
+        if op == "sub":
+            return lhs - rhs
+        if op == "mul":
+            return (lhs * rhs).quantize(Decimal("0.0000"))
+        return (lhs / rhs).quantize(Decimal("0.0000"))
+
+
+def bench_cell(variant, depth, problems, seed=0):
+    """Problems per second through generate + correct + check, for one variant at one depth."""
+    rng = random.Random(f"{seed}:{variant}:{depth}")
+    pair = gen.gen_int_pair if variant.startswith("int") else gen.gen_float_pair
+    start = time.perf_counter()
+    for k in range(problems):
+        lhs, rhs = pair(variant, depth, rng)
+        correct = gen.compute_correct(variant, lhs, rhs)
+        answer = str(correct) if k % 2 else str(exact.add(correct, 1))
+        parse.parse_response(answer, correct, variant)
+    return problems / (time.perf_counter() - start)
+
+
+def legacy_exact_share(variant, depth, problems, seed=0):
+    """Share of problems whose legacy correct answer equals the exact one."""
+    exact_rng, legacy_rng = random.Random(f"{seed}:{variant}:{depth}"), random.Random(f"{seed}:{variant}:{depth}")
+    right = 0
+    for _ in range(problems):
+        try:
+            right += legacy_float(variant, depth, legacy_rng) == gen.compute_correct(
+                variant, *gen.gen_float_pair(variant, depth, exact_rng))
+        except InvalidOperation:
+            pass
+    return right / problems
+
+
+def bench(depths, problems, legacy=True):
+    rows = []
+    for depth in depths:
+        row = {"depth": depth, "problems_per_sec": {}, "legacy": {}}
+        for variant in types.VARIANTS:
+            row["problems_per_sec"][variant] = round(bench_cell(variant, depth, problems))
+        if legacy:
+            for variant in FLOAT_VARIANTS:
+                row["legacy"][variant] = round(legacy_exact_share(variant, depth, problems), 3)
+        rows.append(row)
+    return rows
+
+
+def main():
+    p = argparse.ArgumentParser(description="Arithmetic engine throughput vs depth")
+    p.add_argument("--depths", default="2,5,10,20,50,100,200,500", help="Digit depths, comma-separated")
+    p.add_argument("--problems", type=int, default=2000, help="Problems per variant and depth")
+    p.add_argument("--no-legacy", action="store_true", help="Skip the comparison with the 28-digit Decimal path")
+    p.add_argument("--save", action="store_true", help=f"Write results to {os.path.relpath(RESULTS_FILE, REPO_ROOT)}")
+    args = p.parse_args()
+
+    depths = [int(x) for x in args.depths.split(",")]
+    header = f"{'depth':>6}" + "".join(f" {v:>10}" for v in types.VARIANTS)
+    if not args.no_legacy:
+        header += "   legacy exact: " + " ".join(f"{v.split('_')[1]:>5}" for v in FLOAT_VARIANTS)
+    print("problems/s (generate + correct + check)")
+    print(header)
+    rows = []
+    for depth in depths:
+        (row,) = bench([depth], args.problems, legacy=not args.no_legacy)
+        rows.append(row)
+        line = f"{depth:>6}" + "".join(f" {row['problems_per_sec'][v]:>10,}" for v in types.VARIANTS)
+        if row["legacy"]:
+            line += "                 " + " ".join(f"{row['legacy'][v]:>5.0%}" for v in FLOAT_VARIANTS)
+        print(line, flush=True)
+
+    if args.save:
+        os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+        with open(RESULTS_FILE, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "problems": args.problems,
+                "results": rows,
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nSaved to {os.path.relpath(RESULTS_FILE, REPO_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
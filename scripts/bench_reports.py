@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Scaling benchmark for the report scripts on synthetic corpora.
+
+For each corpus size, generates a synthetic results directory with
+scripts/gen_corpus.py, then runs report.py, heatmap.py and heatmap_accuracy.py
+against it (RESULTS_DIR global overridden) each in a fresh interpreter, and
+records wall time and peak RSS of that process. Rendering goes to /dev/null.
+
+Usage:
+    python scripts/bench_reports.py                          # 10, 100, 1000 runs
+    python scripts/bench_reports.py --runs 100,1000,5000 --trials 10
+    python scripts/bench_reports.py --save                   # store in data/benchmarks/reports.json
+"""
+import sys
+import os
+import json
+import argparse
+import platform
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from gen_corpus import generate_corpus  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FILE = os.path.join(REPO_ROOT, "data", "benchmarks", "reports.json")
+SCRIPTS = ["report.py", "heatmap.py", "heatmap_accuracy.py"]
+RUNS_PER_MODEL = 4
+
+# Runs one script's main() with RESULTS_DIR pointed at the corpus; prints
+# {"sec": ..., "rss_mb": ...} on stderr.
+_CHILD = """
+import json, resource, runpy, sys, time
+path, results_dir = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+ns = runpy.run_path(path, run_name="bench")
+ns["main"].__globals__["RESULTS_DIR"] = results_dir
+ns["main"]()
+sec = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+rss_mb = rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+print(json.dumps({"sec": round(sec, 3), "rss_mb": round(rss_mb, 1)}), file=sys.stderr)
+"""
+
+
+def time_script(script, results_dir):
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD, os.path.join(REPO_ROOT, "scripts", script), results_dir],
+        cwd=REPO_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "COLUMNS": "200"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{script} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stderr.strip().splitlines()[-1])
+
+
+def main():
+    p = argparse.ArgumentParser(description="Time and peak memory of the report scripts vs corpus size")
+    p.add_argument("--runs", default="10,100,1000", help="Corpus sizes in runs (files), comma-separated")
+    p.add_argument("--trials", type=int, default=10, help="Trials per variant/depth cell")
+    p.add_argument("--response-chars", type=int, default=40)
+    p.add_argument("--save", action="store_true", help=f"Write results to {os.path.relpath(RESULTS_FILE, REPO_ROOT)}")
+    args = p.parse_args()
+
+    rows = []
+    header = f"{'runs':>6} {'trials':>9} {'size MB':>8}" + "".join(f" {s:>24}" for s in SCRIPTS)
+    print(header)
+    for runs in [int(x) for x in args.runs.split(",")]:
+        with tempfile.TemporaryDirectory() as corpus:
+            models = max(1, runs // RUNS_PER_MODEL)
+            files, trials = generate_corpus(corpus, models=models, runs_per_model=runs // models or 1,
+                                            trials=args.trials, response_chars=args.response_chars)
+            size_mb = sum(os.path.getsize(os.path.join(corpus, f)) for f in os.listdir(corpus)) / 1e6
+            row = {"runs": files, "trials": trials, "size_mb": round(size_mb, 1), "scripts": {}}
+            for script in SCRIPTS:
+                row["scripts"][script] = time_script(script, corpus)
+        rows.append(row)
+        cells = "".join(
+            f" {row['scripts'][s]['sec']:>12.2f}s {row['scripts'][s]['rss_mb']:>7.0f}MB" for s in SCRIPTS
+        )
+        print(f"{files:>6} {trials:>9} {size_mb:>8.1f}{cells}", flush=True)
+
+    if args.save:
+        os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+        with open(RESULTS_FILE, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "trials_per_cell": args.trials,
+                "results": rows,
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nSaved to {os.path.relpath(RESULTS_FILE, REPO_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
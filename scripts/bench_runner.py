@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Benchmark the runner's own per-trial overhead.
+
+Runs ``runner.run`` against an instantaneous fake ``litellm.completion`` and
+times every stage of the trial loop by wrapping the functions the runner calls
+(operand generation, Decimal compute, prompt building, scheduling, parsing,
+pricing, Trial construction, JSONL writing, progress updates). Whatever is
+left of the wall clock is the runner's own bookkeeping (thread pool dispatch,
+stats updates). The fake's own time is reported but not counted as overhead.
+
+Usage:
+    python scripts/bench_runner.py                       # 10k trials, compare to stored baseline
+    python scripts/bench_runner.py --trials 1000000      # 1M trials
+    python scripts/bench_runner.py --concurrency 64      # dispatch through the thread pool
+    python scripts/bench_runner.py --allocations         # + tracemalloc peak / memory growth by file (slow)
+    python scripts/bench_runner.py --save-baseline       # record the result as the baseline
+
+Baselines live in data/benchmarks/runner.json keyed by --label; a run exits
+with status 1 when the overhead per trial exceeds the baseline by more than
+--tolerance. Timings are machine-specific: re-record the baseline on the
+machine you compare on.
+"""
+import sys
+import os
+import io
+import json
+import time
+import argparse
+import platform
+import tempfile
+import threading
+import contextlib
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(REPO_ROOT, "data", "benchmarks", "runner.json")
+
+
+class StageTimer:
+    """Accumulates calls and seconds per stage; safe to use from worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self._patched = []
+
+    def wrap(self, owner, attr, stage):
+        original = getattr(owner, attr)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.calls[stage] += 1
+                    self.seconds[stage] += elapsed
+
+        setattr(owner, attr, timed)
+        self._patched.append((owner, attr, original))
+        return original
+
+    def restore(self):
+        while self._patched:
+            owner, attr, original = self._patched.pop()
+            setattr(owner, attr, original)
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeChoice:
+    def __init__(self, message):
+        self.message = message
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.choices = [FakeChoice(FakeMessage(content))]
+        self.usage = {"prompt_tokens": 40, "completion_tokens": 8}
+
+
+def make_fake_completion(compute_correct, accuracy):
+    """Instantaneous completion answering correctly ~``accuracy`` of the time.
+
+    The rest alternates between a deviating number and a non-numeric reply so
+    every parse/classification path is exercised.
+    """
+    from llm_arithmetic.mock_server import parse_question
+
+    counter = [0]
+
+    def fake_completion(model, messages, **kwargs):
+        counter[0] += 1
+        variant, lhs, rhs, _ = parse_question(messages[-1]["content"])
+        correct = compute_correct(variant, lhs, rhs)
+        if (counter[0] % 100) < accuracy * 100:
+            return FakeResponse(str(correct))
+        if counter[0] % 2:
+            return FakeResponse(f"The answer is {correct + 1}")
+        return FakeResponse("I am not sure.")
+
+    return fake_completion
+
+
+def instrument(timer):
+    """Wrap the runner's collaborators; returns the unwrapped compute_correct for the fake."""
+    from llm_arithmetic import gen, prompt, parse, pricing, types, io as io_
+    from llm_arithmetic.progress import RunProgress
+    from llm_arithmetic.schedule import CellScheduler
+
+    compute_correct = timer.wrap(gen, "compute_correct", "compute_correct")
+    timer.wrap(gen, "gen_int_pair", "generate")
+    timer.wrap(gen, "gen_float_pair", "generate")
+    timer.wrap(prompt, "make_prompt", "prompt")
+    timer.wrap(CellScheduler, "next_cell", "schedule")
+    timer.wrap(CellScheduler, "assign", "schedule")
+    timer.wrap(CellScheduler, "complete", "schedule")
+    timer.wrap(parse, "parse_response", "parse")
+    timer.wrap(pricing, "trial_cost", "pricing")
+    timer.wrap(pricing, "cache_token_counts", "pricing")
+    timer.wrap(types, "Trial", "trial_record")
+    timer.wrap(io_, "write_trial", "write_jsonl")
+    timer.wrap(RunProgress, "tick", "progress")
+    return compute_correct
+
+
+def bench(trials, depths, concurrency, accuracy, allocations):
+    timer = StageTimer()
+    try:
+        compute_correct = instrument(timer)
+        return _bench(timer, make_fake_completion(compute_correct, accuracy),
+                      trials, depths, concurrency, allocations)
+    finally:
+        timer.restore()
+
+
+def _bench(timer, fake, trials, depths, concurrency, allocations):
+    import litellm
+    from unittest import mock
+    from llm_arithmetic.runner import run
+
+    def run_once(trials_per_cell, depths):
+        with tempfile.TemporaryDirectory() as output_dir, \
+                mock.patch.object(litellm, "completion", _timed_fake(timer, fake)), \
+                contextlib.redirect_stderr(io.StringIO()):
+            start = time.perf_counter()
+            run(
+                model="bench/fake",
+                trials_per_cell=trials_per_cell,
+                depths=depths,
+                output_dir=output_dir,
+                concurrency=concurrency,
+            )
+            return time.perf_counter() - start
+
+    # warm-up: pulls in the runner's lazy imports so they don't count as overhead
+    run_once(1, depths[:1])
+    timer.calls.clear()
+    timer.seconds.clear()
+
+    trials_per_cell = max(1, -(-trials // (8 * len(depths))))
+    tracemalloc = None
+    if allocations:
+        import tracemalloc
+        tracemalloc.start(10)
+        before = tracemalloc.take_snapshot()
+    wall = run_once(trials_per_cell, depths)
+
+    n = trials_per_cell * 8 * len(depths)
+    stages = {stage: timer.seconds[stage] for stage in timer.seconds}
+    fake_sec = stages.pop("fake_completion", 0.0)
+    overhead = wall - fake_sec
+    stages["runner_other"] = max(0.0, overhead - sum(stages.values()))
+    result = {
+        "trials": n,
+        "concurrency": concurrency,
+        "wall_sec": round(wall, 3),
+        "fake_completion_sec": round(fake_sec, 3),
+        "overhead_us_per_trial": round(overhead / n * 1e6, 1),
+        "stages_us_per_trial": {k: round(v / n * 1e6, 1) for k, v in sorted(stages.items(), key=lambda kv: -kv[1])},
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+    if tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        diff = tracemalloc.take_snapshot().compare_to(before, "filename")
+        tracemalloc.stop()
+        result["allocations"] = {
+            "peak_kb": round(peak / 1024, 1),
+            "growth_bytes_per_trial": round(sum(d.size_diff for d in diff) / n, 1),
+            "growth_by_file_kb": {
+                _short_path(d.traceback[0].filename): round(d.size_diff / 1024, 1)
+                for d in diff[:10] if d.size_diff
+            },
+        }
+    return result
+
+
+def _short_path(filename):
+    if filename.startswith(REPO_ROOT):
+        return os.path.relpath(filename, REPO_ROOT)
+    return filename
+
+
+def _timed_fake(timer, fake):
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fake(*args, **kwargs)
+        finally:
+            with timer._lock:
+                timer.calls["fake_completion"] += 1
+                timer.seconds["fake_completion"] += time.perf_counter() - start
+    return timed
+
+
+def load_baselines():
+    try:
+        with open(BASELINE_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def print_result(result, baseline):
+    print(f"Trials:     {result['trials']} (concurrency {result['concurrency']})")
+    print(f"Wall:       {result['wall_sec']:.2f}s (fake completion {result['fake_completion_sec']:.2f}s)")
+    line = f"Overhead:   {result['overhead_us_per_trial']:.1f} µs/trial"
+    if baseline:
+        ratio = result["overhead_us_per_trial"] / baseline["overhead_us_per_trial"]
+        line += f"  (baseline {baseline['overhead_us_per_trial']:.1f} µs, x{ratio:.2f})"
+    print(line)
+    print()
+    print(f"{'stage':<16}{'µs/trial':>10}{'baseline':>10}")
+    base_stages = (baseline or {}).get("stages_us_per_trial", {})
+    for stage, us in result["stages_us_per_trial"].items():
+        base = base_stages.get(stage)
+        print(f"{stage:<16}{us:>10.1f}{(f'{base:.1f}' if base is not None else '-'):>10}")
+    if "allocations" in result:
+        alloc = result["allocations"]
+        print()
+        print(f"Peak traced memory: {alloc['peak_kb']:.0f} KiB; "
+              f"growth {alloc['growth_bytes_per_trial']:.0f} B/trial, by file:")
+        for name, kb in alloc["growth_by_file_kb"].items():
+            print(f"  {kb:>10.1f} KiB  {name}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark runner overhead per trial")
+    p.add_argument("--trials", type=int, default=10_000, help="Approximate number of trials (rounded up to full cells)")
+    p.add_argument("--depths", default="2-10", help="Range like 2-10 or list 2,4,8")
+    p.add_argument("--concurrency", type=int, default=1)
+    p.add_argument("--accuracy", type=float, default=0.8, help="Fraction of fake replies that are correct")
+    p.add_argument("--allocations", action="store_true", help="Trace allocations with tracemalloc (much slower)")
+    p.add_argument("--label", default="default", help="Baseline key")
+    p.add_argument("--save-baseline", action="store_true")
+    p.add_argument("--tolerance", type=float, default=0.25, help="Allowed overhead regression vs baseline")
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args()
+
+    from llm_arithmetic.types import parse_depths
+
+    result = bench(args.trials, parse_depths(args.depths), args.concurrency, args.accuracy, args.allocations)
+    baselines = load_baselines()
+    baseline = baselines.get(args.label)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_result(result, baseline)
+
+    if args.save_baseline:
+        baselines[args.label] = {k: v for k, v in result.items() if k != "allocations"}
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline '{args.label}' saved to {os.path.relpath(BASELINE_FILE, REPO_ROOT)}")
+    elif baseline and result["overhead_us_per_trial"] > baseline["overhead_us_per_trial"] * (1 + args.tolerance):
+        print(f"\nRegression: overhead above baseline by more than {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Generate a synthetic results corpus for scaling tests of the report scripts.
+
+Writes ``synthetic_<model>_<date>.jsonl`` files in the ``io.write_trial`` schema, one per
+run, with operands and correct answers from ``llm_arithmetic.gen`` and
+Correct / Deviate / NaN outcomes drawn per cell. By default every model gets a
+"skill" depth and its accuracy falls off around it (so heatmaps look like real
+ones); ``--mix`` forces a fixed classification mix instead.
+
+Usage:
+    python scripts/gen_corpus.py --out /tmp/corpus                      # 20 models x 3 runs
+    python scripts/gen_corpus.py --out /tmp/corpus --models 500 --runs-per-model 4 --trials 10
+    python scripts/gen_corpus.py --out /tmp/corpus --mix 0.6,0.3,0.1 --response-chars 2000
+
+Point report.py / heatmap*.py at the corpus via their RESULTS_DIR global (or
+use scripts/bench_reports.py). Never point --out at the real results/
+directory: reports can't tell the synthetic runs apart.
+"""
+import sys
+import os
+import json
+import math
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_arithmetic import gen, types, io as io_  # noqa: E402
+
+FAMILIES = ["gpt", "claude", "gemini", "deepseek", "qwen", "llama", "mistral", "grok"]
+SETTINGS = ["", "-low", "-medium", "-high", "-4k", "-thinking"]
+FILLER = (
+    "Let me work through this step by step, carrying digits and checking each "
+    "partial result before writing the final answer. "
+)
+
+
+def outcome_probs(skill, depth, mix, nan_rate):
+    """(P(Correct), P(Deviate), P(NaN)) for a cell."""
+    if mix:
+        return mix
+    p_correct = 1 / (1 + math.exp(depth - skill))
+    p_nan = nan_rate
+    return p_correct * (1 - p_nan), (1 - p_correct) * (1 - p_nan), p_nan
+
+
+def make_trial(rng, model, variant, depth, probs, response_chars, timestamp, extra_context):
+    typ = variant.split("_")[0]
+    lhs, rhs = gen.gen_pair(variant, depth, rng)
+    correct = gen.compute_correct(variant, lhs, rhs)
+    roll = rng.random()
+    if roll < probs[0]:
+        parsed, classification, error = correct, "Correct", None
+    elif roll < probs[0] + probs[1]:
+        offset = rng.randint(1, 10 ** max(1, depth - 1))
+        if typ == "int":
+            parsed = correct + rng.choice([-1, 1]) * offset
+            error = str(abs(parsed - correct))
+        else:
+            parsed = (correct + rng.choice([-1, 1]) * Decimal(offset) / 100).quantize(Decimal("0.0000"))
+            error = str(abs(parsed - correct).quantize(Decimal("0.0000")))
+        classification = "Deviate"
+    else:
+        parsed, classification, error = None, "NaN", None
+    answer = str(parsed) if parsed is not None else "I cannot compute this reliably."
+    filler_len = int(rng.expovariate(1 / response_chars)) if response_chars else 0
+    raw = (FILLER * (filler_len // len(FILLER) + 1))[:filler_len] + answer
+    prompt_tokens = 40 + extra_context * 1000
+    completion_tokens = max(1, len(raw) // 4)
+    return types.Trial(
+        model=model,
+        variant=variant,
+        depth=depth,
+        operands=[lhs, rhs],
+        correct=correct,
+        raw_response=raw,
+        parsed=parsed,
+        classification=classification,
+        error=error,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cost=(prompt_tokens * 2 + completion_tokens * 8) / 1_000_000,
+        timestamp=timestamp.isoformat().replace("+00:00", "Z"),
+        attempts=1,
+        failed_to_get_reply=classification == "NaN" and rng.random() < 0.05,
+        extra_context=extra_context,
+    )
+
+
+def generate_corpus(out_dir, models=20, runs_per_model=3, trials=10, depths=range(1, 11),
+                    mix=None, nan_rate=0.03, response_chars=40, seed=0):
+    """Write the corpus; returns (files, trials) written."""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    files = written = 0
+    for m in range(models):
+        family = FAMILIES[m % len(FAMILIES)]
+        skill = rng.uniform(3, 14)
+        for r in range(runs_per_model):
+            setting = SETTINGS[(m + r) % len(SETTINGS)]
+            model = f"{family}-synthetic-{m:04d}{setting}"
+            extra_context = 4 if setting == "-4k" else 0
+            when = start + timedelta(days=rng.randint(0, 600), minutes=r)
+            path = os.path.join(out_dir, f"synthetic_{model}_{when.strftime('%Y-%m-%d_%H-%M')}.jsonl")
+            with open(path, "w") as f:
+                for variant in types.VARIANTS:
+                    for depth in depths:
+                        probs = outcome_probs(skill, depth, mix, nan_rate)
+                        for _ in range(trials):
+                            when += timedelta(seconds=rng.uniform(0.5, 20))
+                            trial = make_trial(rng, model, variant, depth, probs,
+                                               response_chars, when, extra_context)
+                            f.write(json.dumps(io_.trial_record(trial), default=str) + "\n")
+                            written += 1
+            files += 1
+    return files, written
+
+
+def main():
+    p = argparse.ArgumentParser(description="Generate a synthetic results/*.jsonl corpus")
+    p.add_argument("--out", required=True, help="Output directory (not results/)")
+    p.add_argument("--models", type=int, default=20)
+    p.add_argument("--runs-per-model", type=int, default=3)
+    p.add_argument("--trials", type=int, default=10, help="Trials per variant/depth cell")
+    p.add_argument("--depths", default="1-10", help="Range like 1-10 or list 2,4,8")
+    p.add_argument("--mix", default=None, help="Fixed Correct,Deviate,NaN fractions, e.g. 0.6,0.3,0.1")
+    p.add_argument("--nan-rate", type=float, default=0.03)
+    p.add_argument("--response-chars", type=int, default=40, help="Mean raw response length")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    repo_results = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "results")
+    if os.path.abspath(args.out) == repo_results:
+        p.error("refusing to write synthetic runs into results/")
+    mix = None
+    if args.mix:
+        mix = tuple(float(x) for x in args.mix.split(","))
+        if len(mix) != 3 or abs(sum(mix) - 1) > 1e-6:
+            p.error("--mix needs three fractions summing to 1")
+    files, written = generate_corpus(
+        args.out, args.models, args.runs_per_model, args.trials, types.parse_depths(args.depths),
+        mix=mix, nan_rate=args.nan_rate, response_chars=args.response_chars, seed=args.seed,
+    )
+    print(f"Wrote {written} trials in {files} files to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,9 @@
 import json
 import os
-from colorsys import hls_to_rgb
-from rich.console import Console
-from rich.table import Table
-from rich.text import Text
-from rich.style import Style
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_arithmetic.profiling import profile_from_argv, profiled, stage  # noqa: E402
 # Configuration (set at top)
 # Use None to include all models
 MODEL_FILTER = None  # e.g. "claude-3-7-sonnet-20250219"
@@ -12,6 +11,8 @@ MODEL_FILTER = None  # e.g. "claude-3-7-sonnet-20250219"
 METRICS = ["accuracy", "deviate_rate", "nan_rate"]
 # Path to raw logs directory
 RESULTS_DIR = os.path.join(os.getcwd(), 'results')
+# Profiler: "cprofile" | "tracemalloc" | "pyinstrument" (or --profile); artifact goes to RESULTS_DIR
+PROFILE = None
 
 def load_logs(results_dir):
     logs = []
@@ -32,6 +33,10 @@ def load_logs(results_dir):
     return logs
 
 def build_heatmap(cells, title, metric="accuracy"):
+    from rich.table import Table
+    from rich.text import Text
+    from llm_arithmetic.dashboard import heat_text
+
     # Determine categories and depth levels
     categories = sorted(cells.keys())
     depth_nums = set()
@@ -67,37 +72,17 @@ def build_heatmap(cells, title, metric="accuracy"):
             if not stats:
                 row.append(Text("-", style="dim"))
             else:
-                val = stats.get(metric, 0)
-                display_pct = val * 100
-                # Choose hue: high good for accuracy, low good for rates, with progressive scale for nan_rate
-                if metric == "accuracy":
-                    hue_val = val
-                elif metric == "nan_rate":
-                    # power mapping for nan_rate: steep initial shading, flatten near high values
-                    exponent = 0.3
-                    hue_val = 1 - (val ** exponent)
-                else:
-                    hue_val = 1 - val
-                hue = hue_val * 120  # 0 to 120 degrees
-                # highlight best cases: accuracy == 100% or rate metrics == 0%
-                if metric == "accuracy" and val == 1.0:
-                    text = Text(f"{display_pct:.1f}%", style=Style(bold=True))
-                elif metric != "accuracy" and val == 0.0:
-                    text = Text(f"{display_pct:.1f}%", style=Style(bold=True))
-                else:
-                    # shading: darker reds to brighter greens based on hue_val
-                    lightness = 0.3 + 0.4 * hue_val
-                    r, g, b = hls_to_rgb(hue/360, lightness, 1)
-                    bg = f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
-                    text = Text(f"{display_pct:.1f}%", style=Style(color="white", bgcolor=bg))
-                row.append(text)
+                row.append(heat_text(stats.get(metric, 0), metric))
         table.add_row(*row)
     return table
 
 
 def main():
+    from rich.console import Console
+
     # Load logs from configured directory
-    logs = load_logs(RESULTS_DIR)
+    with stage("load"):
+        logs = load_logs(RESULTS_DIR)
     if not logs:
         print(f"No log records found in {RESULTS_DIR}")
         return
@@ -230,4 +215,6 @@ def main():
             ))
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    PROFILE = profile_from_argv(PROFILE, "Per-model variant x depth heatmaps")
+    with profiled(PROFILE, RESULTS_DIR, "heatmap"):
+        main()
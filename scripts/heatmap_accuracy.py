@@ -1,14 +1,14 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 import json
 from colorsys import hls_to_rgb
-from rich.console import Console
-from rich.table import Table
-from rich.text import Text
-from rich.style import Style
 from enum import Enum
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_arithmetic.profiling import profile_from_argv, profiled, stage  # noqa: E402
+
 class SortBy(Enum):
     MODEL = 'model'
     ACCURACY = 'accuracy'
@@ -23,6 +23,8 @@ MAX_DEPTH = 10
 
 # Path to raw logs directory
 RESULTS_DIR = os.path.join(os.getcwd(), 'results')
+# Profiler: "cprofile" | "tracemalloc" | "pyinstrument" (or --profile); artifact goes to RESULTS_DIR
+PROFILE = None
 
 def load_logs(results_dir, min_depth, max_depth):
     stats = {}
@@ -73,6 +75,11 @@ def build_heatmap(data, categories):
     """
     Build and print heatmap table of accuracy for each model (rows) and category (columns).
     """
+    from rich.console import Console
+    from rich.table import Table
+    from rich.text import Text
+    from rich.style import Style
+
     console = Console()
     console.print(f"\n[bold]Min Depth: {MIN_DEPTH if MIN_DEPTH is not None else 'all'}[/bold]")
     console.print(f"[bold]Max Depth: {MAX_DEPTH if MAX_DEPTH is not None else 'all'}[/bold]")
@@ -131,11 +138,15 @@ def build_heatmap(data, categories):
     console.print(table)
 
 def main():
-    data, categories = load_logs(RESULTS_DIR, MIN_DEPTH, MAX_DEPTH)
+    with stage("load"):
+        data, categories = load_logs(RESULTS_DIR, MIN_DEPTH, MAX_DEPTH)
     if not data:
         print(f"No log records found in {RESULTS_DIR}")
         return
-    build_heatmap(data, categories)
+    with stage("render"):
+        build_heatmap(data, categories)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    PROFILE = profile_from_argv(PROFILE, "Cross-model accuracy by depth")
+    with profiled(PROFILE, RESULTS_DIR, "heatmap_accuracy"):
+        main()
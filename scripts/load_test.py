@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Load-test the runner against the bundled mock LLM server.
+
+Starts ``llm_arithmetic.mock_server`` in-process (or targets ``--api-base``),
+drives ``runner.run`` through litellm over real HTTP and reports throughput
+and the harness' own resource use, so runner overhead can be compared across
+changes without spending tokens.
+
+Usage:
+    python scripts/load_test.py                                  # 8 variants x depths 2-6 x 5 trials
+    python scripts/load_test.py --concurrency 16 --trials 20 --latency lognormal:0.1:0.5
+    python scripts/load_test.py --rate-limit-rate 0.05 --error-rate 0.02 --retry-delay 0.1
+    python scripts/load_test.py --json                           # machine-readable result
+
+Reported:
+    - trials/sec (wall clock)
+    - CPU seconds (user + system) of this process and its CPU utilisation
+    - peak RSS (ru_maxrss) of this process
+    - server-side counters (requests, injected 429/500s, max in-flight)
+"""
+import sys
+import os
+import json
+import time
+import glob
+import argparse
+import logging
+import resource
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_arithmetic.mock_server import MockLLMServer, add_mock_arguments, config_from_args  # noqa: E402
+from llm_arithmetic.types import parse_depths  # noqa: E402
+
+
+def read_trials(output_dir):
+    trials = []
+    for path in glob.glob(os.path.join(output_dir, "*.jsonl")):
+        with open(path) as f:
+            trials.extend(json.loads(line) for line in f if line.strip())
+    return trials
+
+
+def load_test(args, api_base=None):
+    from llm_arithmetic.retry import RetryOptions
+    from llm_arithmetic.runner import run
+
+    litellm_params = {"api_base": api_base or args.api_base, "api_key": "mock"}
+    with tempfile.TemporaryDirectory() as output_dir:
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        start = time.perf_counter()
+        run(
+            model=args.model,
+            trials_per_cell=args.trials,
+            depths=parse_depths(args.depths),
+            output_dir=output_dir,
+            retry=RetryOptions(retries=args.retries, delay=args.retry_delay),
+            litellm_params=litellm_params,
+            timeout_sec=args.timeout,
+            schedule=args.schedule,
+            concurrency=args.concurrency,
+        )
+        wall = time.perf_counter() - start
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        trials = read_trials(output_dir)
+
+    cpu = (usage.ru_utime - usage_before.ru_utime) + (usage.ru_stime - usage_before.ru_stime)
+    correct = sum(1 for t in trials if t.get("classification") == "Correct")
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {
+        "trials": len(trials),
+        "correct": correct,
+        "wall_sec": round(wall, 3),
+        "trials_per_sec": round(len(trials) / wall, 2) if wall else 0.0,
+        "cpu_sec": round(cpu, 3),
+        "cpu_util": round(cpu / wall, 3) if wall else 0.0,
+        "peak_rss_mb": round(rss_mb, 1),
+        "concurrency": args.concurrency,
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Load-test runner.run against the mock LLM server")
+    p.add_argument("--api-base", default=None, help="Use an already running server instead of an in-process one")
+    p.add_argument("--model", default="openai/mock")
+    p.add_argument("--trials", type=int, default=5)
+    p.add_argument("--depths", default="2-6", help="Range like 2-6 or list 2,4,8")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--schedule", default="interleave")
+    p.add_argument("--retries", type=int, default=5)
+    p.add_argument("--retry-delay", type=float, default=0.1)
+    p.add_argument("--timeout", type=int, default=60)
+    p.add_argument("--json", action="store_true", help="Print the result as JSON only")
+    add_mock_arguments(p)
+    args = p.parse_args()
+
+    if args.json:
+        logging.disable(logging.INFO)
+        os.environ.setdefault("TQDM_DISABLE", "1")
+
+    if args.api_base:
+        result = load_test(args)
+    else:
+        with MockLLMServer(config_from_args(args)) as server:
+            result = load_test(args, api_base=server.api_base)
+            result["server"] = server.stats.as_dict()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print()
+    print(f"Trials:        {result['trials']} ({result['correct']} correct) at concurrency {result['concurrency']}")
+    print(f"Throughput:    {result['trials_per_sec']:.2f} trials/sec over {result['wall_sec']:.2f}s")
+    print(f"CPU:           {result['cpu_sec']:.2f}s ({result['cpu_util']:.0%} of one core)")
+    print(f"Peak RSS:      {result['peak_rss_mb']:.1f} MB")
+    if "server" in result:
+        s = result["server"]
+        print(f"Server:        {s['requests']} requests, {s['rate_limited']} x 429, "
+              f"{s['errors']} x 500, max {s['max_in_flight']} in flight")
+
+
+if __name__ == "__main__":
+    main()
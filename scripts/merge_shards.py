@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Validate and combine shard files from ``run.py --seed S --shard i/N`` into one run file.
+
+Usage:
+    python scripts/merge_shards.py results/shards/openai_gpt-4o_*_shard*of4.jsonl
+    python scripts/merge_shards.py SHARDS... --trials 20 --depths 2-10     # check against the intended grid
+    python scripts/merge_shards.py SHARDS... --output results/gpt-4o_merged.jsonl
+    python scripts/merge_shards.py SHARDS... --allow-missing                # write even if slots are missing
+
+Checks:
+    - every file has the same model, extra_context, seed and shard count (absent or repeated shards are reported)
+    - each trial's operands are the ones its seed gives for its (variant, depth, trial index) slot
+    - duplicate slots (e.g. a shard re-run after a partial failure): the first is kept, the rest dropped
+    - missing slots of the grid (depths and trials per cell inferred unless given)
+
+On success, writes the trials in canonical grid order (round by round, like
+``--schedule interleave``) and prints the recomputed per-cell stats. Exits 1
+without writing when a check fails (missing slots only with ``--allow-missing``).
+"""
+import sys
+import os
+import json
+import argparse
+from collections import defaultdict
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_arithmetic import gen, io as io_, types  # noqa: E402
+
+
+def expected_operands(seed, variant, depth, trial_index):
+    lhs, rhs = gen.slot_problem(seed, variant, depth, trial_index)
+    return [str(lhs), str(rhs)]
+
+
+def merge(files, depths=None, trials=None):
+    """Merge {path: [records]}; returns a dict of merged records, problems and stats."""
+    errors, warnings = [], []
+    first = {}
+    shard_files = defaultdict(list)
+    slots = {}
+    duplicates = 0
+    for path, recs in files.items():
+        if not recs:
+            warnings.append(f"{path}: no trials")
+            continue
+        problem = None
+        for rec in recs:
+            if rec.get("trial_index") is None:
+                problem = "trial without trial_index (not a seeded run)"
+                break
+            for key in ("model", "extra_context", "seed"):
+                value = rec.get(key)
+                if key == "extra_context":
+                    value = value or 0
+                ref, ref_path = first.setdefault(key, (value, path))
+                if value != ref:
+                    problem = f"{key}={value!r} but {ref_path} has {ref!r}"
+                    break
+            if problem:
+                break
+        if problem:
+            errors.append(f"{path}: {problem}")
+            continue
+        shard = recs[0].get("shard") or "0/1"
+        shard_files[shard].append(path)
+
+    seed = first.get("seed", (None,))[0]
+    if seed is None and not errors:
+        errors.append("no seed recorded; only runs with --seed can be merged")
+    counts = {int(s.split("/")[1]) for s in shard_files}
+    if len(counts) > 1:
+        errors.append(f"shard counts differ: {sorted(counts)}")
+    for shard, paths in sorted(shard_files.items()):
+        if len(paths) > 1:
+            warnings.append(f"shard {shard} appears in {len(paths)} files: {', '.join(paths)}")
+    if len(counts) == 1:
+        (count,) = counts
+        present = {int(s.split("/")[0]) for s in shard_files}
+        absent = [i for i in range(count) if i not in present]
+        if absent:
+            warnings.append(f"no files for shard(s) {', '.join(f'{i}/{count}' for i in absent)}")
+    if errors:
+        return {"errors": errors, "warnings": warnings, "records": [], "missing": [], "duplicates": 0}
+
+    for path, recs in files.items():
+        for rec in recs:
+            slot = (rec["variant"], rec["depth"], rec["trial_index"])
+            if slot in slots:
+                duplicates += 1
+                continue
+            if [str(x) for x in rec.get("operands", [])] != expected_operands(seed, *slot):
+                errors.append(f"{path}: operands of {slot} don't match seed {seed}")
+                continue
+            slots[slot] = rec
+    if duplicates:
+        warnings.append(f"dropped {duplicates} duplicate trial(s), kept the first of each")
+
+    depths = depths or sorted({d for _, d, _ in slots})
+    trials = trials or (max(k for _, _, k in slots) + 1 if slots else 0)
+    cells = [(v, d) for v in types.VARIANTS for d in depths]
+    order = [(v, d, k) for k in range(trials) for v, d in cells]
+    missing = [slot for slot in order if slot not in slots]
+    extra = [slot for slot in slots if slot[1] not in depths or slot[2] >= trials]
+    if extra:
+        errors.append(f"{len(extra)} trial(s) outside the {len(depths)} depths x {trials} trials grid")
+    records = [slots[slot] for slot in order if slot in slots]
+    return {
+        "errors": errors,
+        "warnings": warnings,
+        "records": records,
+        "missing": missing,
+        "duplicates": duplicates,
+        "depths": depths,
+        "trials": trials,
+        "stats": cell_stats(records),
+    }
+
+
+def cell_stats(records):
+    """{(variant, depth): {"n", "correct", "nan", "deviate", "cost"}} plus a "total" entry."""
+    stats = defaultdict(lambda: {"n": 0, "correct": 0, "nan": 0, "deviate": 0, "cost": 0.0})
+    for rec in records:
+        for key in ((rec["variant"], rec["depth"]), "total"):
+            s = stats[key]
+            s["n"] += 1
+            cls = rec.get("classification")
+            s["correct" if cls == "Correct" else "nan" if cls == "NaN" else "deviate"] += 1
+            s["cost"] += rec.get("cost") or 0.0
+    return dict(stats)
+
+
+def print_stats(result):
+    stats = result["stats"]
+    depths = result["depths"]
+    print(f"{'variant':<10}" + "".join(f"{'d' + str(d):>8}" for d in depths))
+    for variant in types.VARIANTS:
+        row = f"{variant:<10}"
+        for d in depths:
+            s = stats.get((variant, d))
+            row += f"{100 * s['correct'] / s['n']:>7.1f}%" if s else f"{'-':>8}"
+        print(row)
+    total = stats.get("total")
+    if total:
+        print(f"\n{total['n']} trials: {total['correct']} correct, {total['deviate']} deviate, "
+              f"{total['nan']} NaN; accuracy {100 * total['correct'] / total['n']:.2f}%; cost ${total['cost']:.4f}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Validate and merge run.py --shard outputs")
+    p.add_argument("shards", nargs="+", help="Shard JSONL files")
+    p.add_argument("--trials", type=int, default=None, help="Trials per cell of the intended grid")
+    p.add_argument("--depths", default=None, help="Depths of the intended grid ('2-10' or '2,5,8')")
+    p.add_argument("--output", default=None, help="Merged file (default results/<model>_<date>.jsonl)")
+    p.add_argument("--allow-missing", action="store_true", help="Write the merge even if grid slots are missing")
+    args = p.parse_args()
+
+    files = {path: io_.read_trials(path) for path in args.shards}
+    result = merge(files, types.parse_depths(args.depths) if args.depths else None, args.trials)
+    for w in result["warnings"]:
+        print(f"Warning: {w}", file=sys.stderr)
+    for e in result["errors"]:
+        print(f"Error: {e}", file=sys.stderr)
+    if result["missing"]:
+        shown = ", ".join(f"{v}@{d}#{k}" for v, d, k in result["missing"][:10])
+        more = f" (+{len(result['missing']) - 10} more)" if len(result["missing"]) > 10 else ""
+        print(f"Missing {len(result['missing'])} trial(s): {shown}{more}", file=sys.stderr)
+    if result["errors"] or (result["missing"] and not args.allow_missing):
+        sys.exit(1)
+
+    print_stats(result)
+    output = args.output
+    if output is None:
+        model = result["records"][0]["model"].replace("/", "_")
+        date = datetime.now(timezone.utc).strftime("%Y-%m-%d_%H-%M")
+        output = os.path.join("results", f"{model}_{date}.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        for rec in result["records"]:
+            f.write(json.dumps(rec, default=str) + "\n")
+    print(f"\nWrote {len(result['records'])} trials to {output}")
+
+
+if __name__ == "__main__":
+    main()
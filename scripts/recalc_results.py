@@ -28,6 +28,7 @@ from decimal import Decimal
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from llm_arithmetic.parse import parse_response  # noqa: E402
+from llm_arithmetic.profiling import add_profile_argument, profiled, stage  # noqa: E402
 
 RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "results")
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -144,9 +145,16 @@ def overall_counts(per_model_old, per_model_new):
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--write", action="store_true", help="rewrite results/*.jsonl in place (.bak backups)")
+    add_profile_argument(ap)
     args = ap.parse_args()
 
-    res = analyse(write=args.write)
+    with profiled(args.profile, RESULTS_DIR, "recalc_results"):
+        report(args)
+
+
+def report(args):
+    with stage("analyse"):
+        res = analyse(write=args.write)
     transition = res["transition"]
     total = res["total"]
     old, new = overall_counts(res["per_model_old"], res["per_model_new"])
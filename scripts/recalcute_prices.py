@@ -1,30 +1,18 @@
-import csv
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_arithmetic.pricing import Prices, load_prices, trial_cost  # noqa: E402
 
 METADATA_FILE = "data/models_metadata.csv"
 TRIAL_FILE = "results/azure_anthropic.claude-3-7-sonnet-20250219-v1:0_2025-05-17_11-46.jsonl"
 
 def load_metadata(metadata_file):
-    """Load model pricing metadata from CSV and return dict of model->(prompt_rate, completion_rate)."""
-    model_prices = {}
-    try:
-        with open(metadata_file, newline='') as mf:
-            reader = csv.DictReader(mf)
-            for row in reader:
-                model = row.get('model')
-                try:
-                    p = float(row.get('1m_prompt', 0.0))
-                except Exception as _:
-                    p = 0.0
-                try:
-                    c = float(row.get('1m_completion', 0.0))
-                except Exception as _:
-                    c = 0.0
-                if model:
-                    model_prices[model] = (p, c)
-    except FileNotFoundError:
+    """Load model pricing metadata from CSV and return dict of model->Prices."""
+    if not os.path.exists(metadata_file):
         print(f"Metadata file not found: {metadata_file}")
-    return model_prices
+    return load_prices(metadata_file)
 
 
 def load_trials(trial_file):
@@ -61,11 +49,14 @@ def main():
     # Recalculate cost for each trial
     for record in trial_records:
         model_name = record.get('model')
-        prompt_tok = record.get('tokens', {}).get('prompt_tokens', 0)
-        completion_tok = record.get('tokens', {}).get('completion_tokens', 0)
-        prompt_rate, completion_rate = price_dict.get(model_name, (0.0, 0.0))
-        calculated_cost = (prompt_tok / 1_000_000) * prompt_rate + (completion_tok / 1_000_000) * completion_rate
-        record['cost'] = calculated_cost
+        tokens = record.get('tokens', {})
+        record['cost'] = trial_cost(
+            price_dict.get(model_name, Prices()),
+            tokens.get('prompt_tokens', 0),
+            tokens.get('completion_tokens', 0),
+            tokens.get('cached_tokens', 0),
+            tokens.get('cache_write_tokens', 0),
+        )
 
     # Save updated trials file
     save_trials(TRIAL_FILE, trial_records)
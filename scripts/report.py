@@ -2,11 +2,12 @@
 import json
 import math
 import os
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
+import sys
 from enum import Enum
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_arithmetic.profiling import profile_from_argv, profiled, stage  # noqa: E402
+
 class SortBy(Enum):
     MODEL = 'model'
     CORRECT = 'accuracy'
@@ -20,6 +21,7 @@ SORT_BY = SortBy.MODEL
 MODEL = None  # Model name to filter (string) or None for last record
 RESULTS_DIR = os.path.join(os.getcwd(), "results")
 MIN_DEPTH = 5  # Minimum digit depth to include in report (integer) or None to include all
+PROFILE = None  # "cprofile" | "tracemalloc" | "pyinstrument" (or --profile); artifact goes to RESULTS_DIR
 
 def format_number(val):
     """Format a number; use scientific notation (4 decimals) when it has more than 10 digits."""
@@ -134,15 +136,26 @@ def load_results():
             'model': trials[0].get('model', ''),
             'date': "_".join(os.path.splitext(fname)[0].split("_")[-2:]),
             'cells': cells_stats,
-            'raw_trial_count': len(trials)
+            'raw_trial_count': len(trials),
+            # Adaptive runs stop cells early, so trial counts differ by design
+            'stop_rule': trials[0].get('stop_rule')
         })
     return recs
 
+def _mean_rates(rates):
+    """Column means of a non-empty list of (accuracy, nan_rate, deviate_rate)."""
+    return tuple(sum(col) / len(rates) for col in zip(*rates))
+
 def filter_record_by_depth(record, min_depth):
     """
     Return (overall, per_category) metrics for the record filtered by min_depth.
+    Counts are always raw trials. In adaptive runs (unequal trial counts per cell)
+    accuracy / nan_rate / deviate_rate are the mean of the per-cell rates, so a cell
+    that absorbed extra trials doesn't dominate them.
     """
     cells = record.get('cells', {})
+    equal_weight = bool(record.get('stop_rule'))
+    cell_rates = []  # (accuracy, nan_rate, deviate_rate) of every cell, for equal weighting
     total_trials = total_correct = total_nan = total_dev = 0
     total_error_sum = 0.0
     total_prompt_tokens = total_completion_tokens = total_cost = 0.0
@@ -152,6 +165,7 @@ def filter_record_by_depth(record, min_depth):
         var_total_trials = var_correct = var_nan = var_dev = 0
         var_error_sum = var_prompt_tokens = var_completion_tokens = var_cost = 0.0
         var_general_error_sum = 0.0 # New: Sum for general error per variant
+        var_cell_rates = []
         for key, stats in depth_dict.items():
             try:
                 depth = int(key.split('_')[1])
@@ -168,6 +182,8 @@ def filter_record_by_depth(record, min_depth):
             general_avg_error = float(stats.get('general_avg_error', "0")) # New: get general avg error
             general_error_sum = (c + d) * general_avg_error # New: calculate general error sum
 
+            if t > 0:
+                var_cell_rates.append((c / t, n / t, d / t))
             var_total_trials += t
             var_correct += c
             var_nan += n
@@ -181,6 +197,9 @@ def filter_record_by_depth(record, min_depth):
             per_accuracy = var_correct / var_total_trials
             per_nan_rate = var_nan / var_total_trials
             per_dev_rate = var_dev / var_total_trials
+            if equal_weight:
+                per_accuracy, per_nan_rate, per_dev_rate = _mean_rates(var_cell_rates)
+            cell_rates.extend(var_cell_rates)
             per_avg_error = var_error_sum / var_dev if var_dev > 0 else 0.0
             per_general_avg_error = var_general_error_sum / (var_correct + var_dev) if (var_correct + var_dev) > 0 else 0.0 # New: calculate per-variant general avg error
             new_per_cat[variant] = {
@@ -207,6 +226,8 @@ def filter_record_by_depth(record, min_depth):
     overall_accuracy = total_correct / total_trials if total_trials > 0 else 0.0
     overall_nan_rate = total_nan / total_trials if total_trials > 0 else 0.0
     overall_dev_rate = total_dev / total_trials if total_trials > 0 else 0.0
+    if equal_weight and cell_rates:
+        overall_accuracy, overall_nan_rate, overall_dev_rate = _mean_rates(cell_rates)
     overall_avg_error = total_error_sum / total_dev if total_dev > 0 else 0.0
     overall_general_avg_error = total_general_error_sum / (total_correct + total_dev) if (total_correct + total_dev) > 0 else 0.0 # New: calculate overall general avg error
     new_overall = {
@@ -223,7 +244,13 @@ def filter_record_by_depth(record, min_depth):
     return new_overall, new_per_cat
 
 def main():
-    recs = load_results()
+    # rich is only needed for rendering; keep module import cheap
+    from rich.console import Console
+    from rich.table import Table
+    from rich.panel import Panel
+
+    with stage("load"):
+        recs = load_results()
     if not recs:
         print(f"No records found in {RESULTS_DIR}")
         return
@@ -243,9 +270,11 @@ def main():
             overall_vals, _ = (filter_record_by_depth(rec, MIN_DEPTH)
                                if MIN_DEPTH is not None else (rec.get('overall', {}), {}))
             acc = overall_vals.get('accuracy', 0.0)
-            incomplete = rec.get('raw_trial_count', 0) < expected_trials
+            incomplete = (rec.get('raw_trial_count', 0) < expected_trials
+                          and not rec.get('stop_rule'))
             return (incomplete, -acc)
-        sorted_recs = sorted(recs, key=_sort_key)
+        with stage("aggregate"):
+            sorted_recs = sorted(recs, key=_sort_key)
         table = Table(title="Models Overview")
         table.add_column("Model", style="cyan")
         # table.add_column("Date", style="magenta")
@@ -296,8 +325,13 @@ def main():
                                   for stats in cells.get(cat, {}).values()))
                 for cat in categories
             ]
-            # valid if all counts equal
-            verification = "Valid" if len(set(counts)) == 1 else "Invalid"
+            # valid if all counts equal; adaptive runs differ by design
+            if len(set(counts)) == 1:
+                verification = "Valid"
+            elif rec.get('stop_rule'):
+                verification = "Adaptive"
+            else:
+                verification = "Invalid"
             verif_table.add_row(file, model, *counts, verification)
         console.print(verif_table)
         # Detailed per-model cards (sorted)
@@ -407,4 +441,6 @@ def main():
         console.print(table)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    PROFILE = profile_from_argv(PROFILE, "Models overview and per-model report")
+    with profiled(PROFILE, RESULTS_DIR, "report"):
+        main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Summarize where time went in a run from its trace (``run.py --trace``).
+
+Usage:
+    python scripts/trace_summary.py results/traces/openai_gpt-4o_2026-01-01_12-00.jsonl
+    python scripts/trace_summary.py TRACE --slowest 20     # list more of the slowest trials
+    python scripts/trace_summary.py TRACE --json           # machine-readable summary
+
+Prints:
+    - per-span totals: count, total / mean / p50 / p95 / max seconds
+    - request attempts by outcome and error class
+    - latency by depth (successful attempts)
+    - effective request concurrency (attempt time / wall time; the wall time of a
+      resumed run is the sum over its sessions, without the downtime in between)
+    - the slowest trials with their attempt history
+"""
+import sys
+import os
+import json
+import argparse
+from bisect import bisect_right
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_arithmetic.trace import read_trace  # noqa: E402
+
+SPAN_ORDER = ["trial", "generate", "attempt", "backoff", "parse", "write"]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def describe(values):
+    return {
+        "count": len(values),
+        "total": sum(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def summarize(spans, slowest=10, offsets=(0.0,)):
+    """``offsets``: start of each session (see ``trace.Tracer``), ascending."""
+    by_span = defaultdict(list)
+    outcomes = defaultdict(int)
+    latency_by_depth = defaultdict(list)
+    attempts_by_trial = defaultdict(list)
+    trials = {}
+    bounds = {}  # session -> (first start, last end)
+    for s in spans:
+        by_span[s["span"]].append(s["dur"])
+        session = max(0, bisect_right(offsets, s["start"]) - 1)
+        lo, hi = bounds.get(session, (s["start"], s["start"] + s["dur"]))
+        bounds[session] = (min(lo, s["start"]), max(hi, s["start"] + s["dur"]))
+        if s["span"] == "attempt":
+            outcomes["ok" if s.get("ok") else s.get("error_class", "error")] += 1
+            attempts_by_trial[s["trial"]].append(s)
+            if s.get("ok"):
+                latency_by_depth[s.get("depth")].append(s["dur"])
+        elif s["span"] == "trial":
+            trials[s["trial"]] = s
+    wall = sum(hi - lo for lo, hi in bounds.values())
+    attempt_time = sum(by_span.get("attempt", []))
+    order = SPAN_ORDER + sorted(set(by_span) - set(SPAN_ORDER))
+    slow = sorted(trials.values(), key=lambda t: -t["dur"])[:slowest]
+    return {
+        "wall": wall,
+        "sessions": len(bounds),
+        "trials": len(trials),
+        "spans": {name: describe(by_span[name]) for name in order if name in by_span},
+        "attempt_outcomes": dict(sorted(outcomes.items(), key=lambda kv: -kv[1])),
+        "latency_by_depth": {d: describe(v) for d, v in sorted(latency_by_depth.items(), key=lambda kv: kv[0] or 0)},
+        "effective_concurrency": attempt_time / wall if wall else 0.0,
+        "slowest": [
+            {
+                "trial": t["trial"],
+                "variant": t.get("variant"),
+                "depth": t.get("depth"),
+                "dur": t["dur"],
+                "classification": t.get("classification"),
+                "attempts": [
+                    (round(a["dur"], 3), "ok" if a.get("ok") else a.get("error_class", "error"))
+                    for a in sorted(attempts_by_trial[t["trial"]], key=lambda a: a["start"])
+                ],
+            }
+            for t in slow
+        ],
+    }
+
+
+def print_summary(header, summary):
+    if header:
+        resumed = f", {summary['sessions']} sessions" if summary["sessions"] > 1 else ""
+        print(f"Run: {header.get('model')} started {header.get('started_at')} "
+              f"(concurrency {header.get('concurrency')}{resumed})")
+    print(f"Trials: {summary['trials']}  wall: {summary['wall']:.2f}s  "
+          f"effective request concurrency: {summary['effective_concurrency']:.2f}")
+    print()
+    print(f"{'span':<10}{'count':>8}{'total s':>11}{'mean s':>10}{'p50 s':>10}{'p95 s':>10}{'max s':>10}")
+    for name, d in summary["spans"].items():
+        print(f"{name:<10}{d['count']:>8}{d['total']:>11.3f}{d['mean']:>10.4f}"
+              f"{d['p50']:>10.4f}{d['p95']:>10.4f}{d['max']:>10.4f}")
+    print()
+    print("Attempts by outcome:")
+    for outcome, n in summary["attempt_outcomes"].items():
+        print(f"  {outcome:<28}{n:>8}")
+    print()
+    print("Successful request latency by depth:")
+    for depth, d in summary["latency_by_depth"].items():
+        print(f"  depth {depth!s:<4} n={d['count']:<6} p50={d['p50']:.3f}s p95={d['p95']:.3f}s max={d['max']:.3f}s")
+    if summary["slowest"]:
+        print()
+        print("Slowest trials:")
+        for t in summary["slowest"]:
+            attempts = ", ".join(f"{dur}s {outcome}" for dur, outcome in t["attempts"])
+            cell = f"{t['variant']}@{t['depth']}"
+            print(f"  #{t['trial']:<6} {cell:<14} {t['dur']:>8.3f}s {t['classification']:<8} [{attempts}]")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Summarize a run trace")
+    p.add_argument("trace", help="Trace JSONL written by run.py --trace")
+    p.add_argument("--slowest", type=int, default=10, help="How many slowest trials to list")
+    p.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = p.parse_args()
+
+    header, spans = read_trace(args.trace)
+    if not spans:
+        print(f"No spans in {args.trace}")
+        return
+    offsets = [h.get("offset", 0.0) for h in header.get("sessions", [])] or [0.0]
+    summary = summarize(spans, slowest=args.slowest, offsets=offsets)
+    if args.json:
+        print(json.dumps(summary, indent=2, default=str))
+    else:
+        print_summary(header, summary)
+
+
+if __name__ == "__main__":
+    main()
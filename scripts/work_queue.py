@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Coordinate one evaluation across several worker machines (see llm_arithmetic.workqueue).
+
+Usage:
+    python scripts/work_queue.py publish queue.db --depths 2-10 --trials 20 --model-label qwen3-32b
+    python scripts/work_queue.py serve queue.db --host 0.0.0.0 --port 8780   # expose the queue to other machines
+    python scripts/work_queue.py status queue.db                  # or status http://coordinator:8780
+    python scripts/work_queue.py export queue.db --output-dir results
+
+Workers are ordinary runs pointed at the queue:
+    uv run run.py --model openai/qwen3-32b --queue http://coordinator:8780 --concurrency 8 \\
+        --litellm-params '{"api_base": "http://localhost:8000/v1"}'
+
+``export`` writes the recorded trials as a regular results JSONL
+(``<model>_<date>.jsonl``) that the report scripts read like any other run.
+"""
+import sys
+import os
+import time
+import argparse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_arithmetic.types import parse_depths  # noqa: E402
+from llm_arithmetic.workqueue import QueueServer, WorkQueue, open_queue  # noqa: E402
+
+
+def print_status(queue):
+    counts = queue.counts()
+    meta = queue.meta()
+    print(f"Queue: {meta.get('model') or '(no model label)'} depths {meta.get('depths')} "
+          f"x {meta.get('trials_per_cell')} trials/cell, seed {meta.get('seed')}, published {meta.get('created_at')}")
+    print(f"  done {counts['done']}/{counts['total']}  pending {counts['pending']}  "
+          f"leased {counts['leased']} ({counts['expired']} expired)")
+    if isinstance(queue, WorkQueue):
+        for worker, n in queue.workers().items():
+            print(f"  {worker:<40}{n:>8}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Publish, serve, inspect and export a shared trial queue")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    pub = sub.add_parser("publish", help="Generate the trial grid into a new queue file")
+    pub.add_argument("queue", help="SQLite file to create")
+    pub.add_argument("--depths", default="2-10", help="Depth range '2-10' or list '2,5,8'")
+    pub.add_argument("--trials", type=int, default=10, help="Trials per variant x depth cell")
+    pub.add_argument("--model-label", default=None,
+                     help="Model name written into every trial record (default: each worker's --model/--model-alias)")
+    pub.add_argument("--seed", type=int, default=None,
+                     help="Problem-set seed, same problem set as run.py --seed (default: random; stored in the queue)")
+
+    srv = sub.add_parser("serve", help="Serve the queue over HTTP for workers on other machines")
+    srv.add_argument("queue", help="SQLite queue file")
+    srv.add_argument("--host", default="127.0.0.1",
+                     help="Interface to listen on; the API is unauthenticated, pass 0.0.0.0 only on a trusted network")
+    srv.add_argument("--port", type=int, default=8780)
+    srv.add_argument("--status-every", type=float, default=30.0, help="Print progress every N seconds (0 = never)")
+
+    st = sub.add_parser("status", help="Show progress and per-worker counts")
+    st.add_argument("queue", help="SQLite queue file or http://host:port")
+
+    exp = sub.add_parser("export", help="Write recorded trials as a results JSONL")
+    exp.add_argument("queue", help="SQLite queue file")
+    exp.add_argument("--output-dir", default="results")
+    exp.add_argument("--output", default=None, help="Exact output path (overrides --output-dir)")
+
+    args = p.parse_args()
+
+    if args.command == "publish":
+        if os.path.exists(args.queue):
+            p.error(f"{args.queue} already exists")
+        queue = WorkQueue(args.queue)
+        n = queue.publish(parse_depths(args.depths), args.trials, model=args.model_label, seed=args.seed)
+        print(f"Published {n} trials to {args.queue} (seed {queue.meta()['seed']})")
+    elif args.command == "serve":
+        queue = open_queue(args.queue)
+        with QueueServer(queue, host=args.host, port=args.port) as server:
+            print(f"Serving {args.queue} on {server.url} (Ctrl-C to stop)")
+            announced = False
+            try:
+                while True:
+                    time.sleep(args.status_every if args.status_every > 0 else 5)
+                    if args.status_every > 0:
+                        print_status(queue)
+                    counts = queue.counts()
+                    if counts["done"] == counts["total"] and not announced:
+                        announced = True
+                        print(f"All {counts['total']} trials recorded; export with: "
+                              f"python scripts/work_queue.py export {args.queue}")
+            except KeyboardInterrupt:
+                pass
+    elif args.command == "status":
+        print_status(open_queue(args.queue))
+    else:
+        queue = open_queue(args.queue)
+        counts = queue.counts()
+        path = args.output
+        if path is None:
+            label = queue.meta().get("model") or "queue"
+            date = datetime.now(timezone.utc).strftime("%Y-%m-%d_%H-%M")
+            os.makedirs(args.output_dir, exist_ok=True)
+            path = os.path.join(args.output_dir, f"{label.replace('/', '_')}_{date}.jsonl")
+        n = queue.export(path)
+        print(f"Wrote {n} trials to {path}")
+        if n < counts["total"]:
+            print(f"Warning: {counts['total'] - n} trials are not recorded yet", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json
+
+import pytest
+
+from llm_arithmetic import batch, io as io_, pricing
+
+
+class Interrupted(Exception):
+    pass
+
+
+class CountingClient(batch.LocalBatchClient):
+    """Local batch service that counts submissions and can die on the first poll, like a killed run."""
+
+    def __init__(self, *args, die_on_poll=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.submitted = 0
+        self.die_on_poll = die_on_poll
+
+    def submit(self, input_path):
+        self.submitted += 1
+        return super().submit(input_path)
+
+    def poll(self, batch_id):
+        if self.die_on_poll:
+            raise Interrupted
+        return super().poll(batch_id)
+
+
+def test_provider_for_and_result_parsing():
+    assert batch.provider_for("openai/gpt-4o") == "openai"
+    assert batch.provider_for("anthropic/claude-sonnet-4") == "anthropic"
+    assert batch.provider_for("openai/x", "local") == "local"
+    with pytest.raises(ValueError):
+        batch.provider_for("ollama/qwen3")
+
+    cid, resp, err = batch.openai_result({
+        "custom_id": "int_add:2:0", "error": None,
+        "response": {"status_code": 200, "body": {
+            "choices": [{"message": {"content": "42"}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 2},
+        }},
+    })
+    assert (cid, resp.choices[0].message.content, resp.usage["prompt_tokens"], err) == ("int_add:2:0", "42", 10, None)
+    _, resp, err = batch.openai_result({"custom_id": "x", "response": {"status_code": 429, "body": {}}, "error": None})
+    assert resp is None and "429" in err
+
+    _, resp, err = batch.anthropic_result({"custom_id": "y", "result": {"type": "succeeded", "message": {
+        "content": [{"type": "text", "text": "7"}],
+        "usage": {"input_tokens": 5, "output_tokens": 1, "cache_read_input_tokens": 100,
+                  "cache_creation_input_tokens": 20},
+    }}})
+    assert resp.choices[0].message.content == "7" and err is None
+    assert resp.usage["prompt_tokens"] == 125
+    assert pricing.cache_token_counts(resp.usage) == (100, 20)
+    _, resp, err = batch.anthropic_result({"custom_id": "z", "result": {"type": "expired"}})
+    assert resp is None and "expired" in err
+
+
+def test_local_batch_survives_a_restart_without_resubmitting(tmp_path):
+    trial_file = str(tmp_path / "mock_run.jsonl")
+    root = str(tmp_path / "batches" / "local")
+    prices = pricing.Prices(prompt=2.0, completion=4.0)
+    args = (trial_file, "mock", prices, [2, 3], 2, [])
+
+    first = CountingClient(root, die_on_poll=True)
+    with pytest.raises(Interrupted):
+        batch.run_batch(first, "local", *args, seed=7, poll_sec=0)
+    assert first.submitted == 1
+    state = json.loads((tmp_path / "batches" / "mock_run.json").read_text())
+    assert state["batch_id"] and len(state["problems"]) == 32
+
+    second = CountingClient(root, delay=0.05, error_rate=0.25, seed=1)
+    assert batch.run_batch(second, "local", *args, seed=7, poll_sec=0.02) == 32
+    assert second.submitted == 0
+
+    recs = io_.read_trials(trial_file)
+    assert len(recs) == 32
+    assert {(r["variant"], r["depth"], r["trial_index"]) for r in recs} == {
+        (p["variant"], p["depth"], p["trial_index"]) for p in state["problems"].values()
+    }
+    answered = [r for r in recs if not r["failed_to_get_reply"]]
+    failed = [r for r in recs if r["failed_to_get_reply"]]
+    assert answered and failed and all(r["classification"] == "Correct" for r in answered)
+    assert all(r["seed"] == 7 for r in recs)
+    for r in answered:
+        tokens = r["tokens"]
+        full_price = (tokens["prompt_tokens"] * 2.0 + tokens["completion_tokens"] * 4.0) / 1e6
+        assert r["cost"] == pytest.approx(batch.BATCH_DISCOUNT * full_price)
+
+    # a third start finds every trial already written
+    assert batch.run_batch(CountingClient(root), "local", *args, seed=7, poll_sec=0) == 0
+    assert len(io_.read_trials(trial_file)) == 32
+
+
+def test_run_with_local_batch_api(tmp_path):
+    from llm_arithmetic import runner
+
+    runner.run("openai/mock", 1, [2], str(tmp_path), seed=3, batch_api="local", batch_poll_sec=0)
+    (trial_file,) = tmp_path.glob("openai_mock_*.jsonl")
+    recs = io_.read_trials(str(trial_file))
+    assert len(recs) == 8
+    assert all(r["classification"] == "Correct" and r["model"] == "openai/mock" for r in recs)
+    assert list((tmp_path / "batches").glob("openai_mock_*.input.jsonl"))
+
+    with pytest.raises(ValueError):
+        runner.run("openai/mock", 1, [2], str(tmp_path), ci_width=0.1, batch_api="local")
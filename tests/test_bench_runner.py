@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import runpy
+
+from llm_arithmetic import gen, parse
+
+bench_runner = runpy.run_path(str(Path(__file__).resolve().parent.parent / "scripts" / "bench_runner.py"))
+
+
+def test_bench_reports_stages_and_restores_patches(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    originals = (gen.compute_correct, parse.parse_response)
+    result = bench_runner["bench"](trials=64, depths=[2, 3], concurrency=2, accuracy=0.5, allocations=True)
+    assert result["trials"] == 64
+    stages = result["stages_us_per_trial"]
+    for stage in ("schedule", "parse", "write_jsonl", "generate", "progress", "runner_other"):
+        assert stage in stages
+    assert result["overhead_us_per_trial"] > 0
+    assert result["allocations"]["peak_kb"] > 0
+    assert (gen.compute_correct, parse.parse_response) == originals
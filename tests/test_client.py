@@ -0,0 +1,61 @@
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from llm_arithmetic.client import ConnectionStats, make_client, shared_client
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}/"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_pooled_client_reuses_connection(server):
+    client, stats = make_client(pool_size=2)
+    with client:
+        for _ in range(5):
+            assert client.get(server).text == "ok"
+    assert stats.requests == 5
+    assert stats.connections == 1
+    assert stats.reused == 4
+    assert "80% reused" in stats.summary()
+
+
+def test_shared_client_installs_and_restores_session():
+    import litellm
+
+    assert litellm.client_session is None
+    with shared_client(pool_size=3) as stats:
+        assert isinstance(stats, ConnectionStats)
+        outer = litellm.client_session
+        assert outer is not None
+        # nested runs reuse the outer pool and don't report on it
+        with shared_client() as inner_stats:
+            assert inner_stats is None
+            assert litellm.client_session is outer
+        assert litellm.client_session is outer
+    assert litellm.client_session is None
+    assert outer.is_closed
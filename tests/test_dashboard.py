@@ -0,0 +1,65 @@
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rich.console import Console
+
+from llm_arithmetic.dashboard import LiveDashboard, RunDashboard, heat_text, order_variants
+from llm_arithmetic.metrics import RunMetrics
+
+
+def _render(renderable) -> str:
+    console = Console(file=io.StringIO(), width=160, color_system=None)
+    console.print(renderable)
+    return console.file.getvalue()
+
+
+def _finish(metrics, variant, depth, classification, n=1):
+    for _ in range(n):
+        metrics.request_finished(0.4, ok=True)
+        metrics.trial_finished(variant, depth, classification, 0, False, 10, 5, 0, 0.001)
+
+
+def test_heat_text_shades_and_highlights():
+    assert heat_text(1.0).style.bold
+    assert heat_text(0.0, "nan_rate").style.bold
+    low, high = heat_text(0.1).style.bgcolor, heat_text(0.9).style.bgcolor
+    assert low is not None and high is not None and low != high
+    assert heat_text(0.25).plain == "25.0%"
+
+
+def test_order_variants_matches_heatmap_order():
+    assert order_variants(["float_div", "int_sub", "zzz", "int_add"]) == ["int_add", "int_sub", "float_div", "zzz"]
+
+
+def test_dashboard_grid_and_status_from_metrics():
+    m = RunMetrics("test-model")
+    _finish(m, "int_add", 2, "Correct", 3)
+    _finish(m, "int_add", 2, "Deviate")
+    _finish(m, "int_mul", 4, "NaN")
+    m.in_flight.set(3, model="test-model")
+    view = RunDashboard(m, total=20, variants=["int_mul", "int_add"], depths=[4, 2])
+    view.done = 5
+
+    assert view.cell_counts() == {("int_add", 2): [3, 4], ("int_mul", 4): [0, 1]}
+    out = _render(view)
+    assert "int_add" in out.split("int_mul")[0]
+    assert "75.0%" in out and "0.0%" in out
+    assert "5/20 (25%)" in out
+    assert "In flight" in out and "3" in out
+    assert "p50 ≤0.5s" in out
+
+
+def test_live_dashboard_falls_back_to_plain_lines(monkeypatch, capsys):
+    monkeypatch.setenv("TQDM_DISABLE", "1")
+    m = RunMetrics("test-model")
+    with LiveDashboard(2, m, ["int_add"], [2]) as progress:
+        progress.log("hello")
+        progress.tick(prompt_tokens=1, completion_tokens=1, cost=0.0)
+        progress.tick(prompt_tokens=1, completion_tokens=1, cost=0.0)
+    err = capsys.readouterr().err
+    assert "hello" in err
+    assert "2/2 trials" in err
+    assert progress.view.done == 2
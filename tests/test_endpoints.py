@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import socket
+
+from llm_arithmetic import io as io_
+from llm_arithmetic.endpoints import EndpointOptions, EndpointPool, probe_models
+from llm_arithmetic.mock_server import MockConfig, MockLLMServer
+from llm_arithmetic.retry import RetryOptions
+from llm_arithmetic.runner import run
+
+
+def test_least_outstanding_with_rotation_on_ties():
+    pool = EndpointPool(["a", "b", "c"], health_interval=0)
+    first = [pool.acquire().url for _ in range(3)]
+    assert sorted(first) == ["a", "b", "c"]
+    b = next(e for e in pool.endpoints if e.url == "b")
+    pool.release(b, ok=True)
+    assert pool.acquire().url == "b"
+
+
+def test_ejection_and_health_reinstatement():
+    alive = {"a": True, "b": True}
+    logs = []
+    pool = EndpointPool(["a", "b"], eject_after=2, health_interval=0, probe=lambda url: alive[url],
+                        log=logs.append)
+    a, b = pool.endpoints
+
+    def fail(endpoint, error_class):
+        endpoint.outstanding += 1  # as if acquired
+        pool.release(endpoint, ok=False, error_class=error_class)
+
+    for _ in range(2):
+        fail(a, "server")
+    assert not a.healthy
+    assert {pool.acquire().url for _ in range(4)} == {"b"}
+    b.outstanding = 0
+    # prompt-specific failures don't eject
+    for _ in range(5):
+        fail(b, "context_length")
+    assert b.healthy
+
+    alive["b"] = False
+    pool.check_health()
+    assert a.healthy and not b.healthy
+    # everything ejected: fall back to the endpoint ejected longest ago instead of stalling
+    alive["a"] = False
+    pool.check_health()
+    assert pool.acquire().url == "b"
+    assert any("ejected" in line for line in logs) and any("back in the pool" in line for line in logs)
+
+
+def test_run_balances_over_servers_and_ejects_a_dead_one(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        dead = f"http://127.0.0.1:{s.getsockname()[1]}/v1"
+    assert probe_models(dead) is False
+
+    config = MockConfig(latency="0.01")
+    with MockLLMServer(config) as one, MockLLMServer(config) as two:
+        assert probe_models(one.api_base) is True
+        run(
+            model="openai/mock",
+            trials_per_cell=3,
+            depths=[2],
+            output_dir=str(tmp_path / "results"),
+            retry=RetryOptions(retries=5, delay=0.0, breaker_threshold=0),
+            concurrency=4,
+            litellm_params={"api_base": [one.api_base, dead, two.api_base], "api_key": "mock"},
+            endpoint_pool=EndpointOptions(eject_after=2, health_interval=0),
+        )
+        served = (one.stats.as_dict()["requests"], two.stats.as_dict()["requests"])
+    trials = [t for f in (tmp_path / "results").glob("*.jsonl") for t in io_.read_trials(str(f))]
+    assert len(trials) == 24 and all(t["classification"] == "Correct" for t in trials)
+    by_endpoint = {}
+    for t in trials:
+        by_endpoint[t["endpoint"]] = by_endpoint.get(t["endpoint"], 0) + 1
+    assert dead not in by_endpoint
+    assert by_endpoint == {one.api_base: served[0], two.api_base: served[1]}
+    assert min(served) > 0
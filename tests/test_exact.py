@@ -0,0 +1,68 @@
+"""Tests for the scaled-integer arithmetic engine (llm_arithmetic.exact)."""
+
+import sys
+import random
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from decimal import Decimal, localcontext
+import pytest
+
+from llm_arithmetic import exact, gen
+
+
+def test_scaled_round_trip_keeps_exponent():
+    for text in ["0", "12.34", "-0.0100", "1E+3", "123456789012345678901234567890.12"]:
+        value = Decimal(text)
+        coefficient, scale = exact.to_scaled(value)
+        assert scale >= 0
+        back = exact.from_scaled(coefficient, scale)
+        assert back == value
+    assert str(exact.from_scaled(1234, 2)) == "12.34"
+    assert exact.to_scaled(7) == (7, 0)
+
+
+def test_results_follow_decimal_exponents():
+    assert str(exact.add(Decimal("1.5"), Decimal("2.25"))) == "3.75"
+    assert str(exact.sub(Decimal("1.50"), Decimal("1.50"))) == "0.00"
+    assert str(exact.mul(Decimal("1.50"), Decimal("2.0"))) == "3.000"
+    assert str(exact.abs_diff(Decimal("1.2"), Decimal("3.45"))) == "2.25"
+
+
+def test_rounding_matches_decimal_half_even():
+    rng = random.Random(0)
+    with localcontext() as ctx:
+        ctx.prec = 200
+        for _ in range(2000):
+            lhs = Decimal(rng.randint(-10 ** 12, 10 ** 12)).scaleb(-rng.randint(0, 6))
+            rhs = Decimal(rng.randint(-10 ** 6, 10 ** 6) or 1).scaleb(-rng.randint(0, 4))
+            assert exact.quantize(lhs, 4) == lhs.quantize(Decimal("0.0000"))
+            assert exact.div(lhs, rhs, 4) == (lhs / rhs).quantize(Decimal("0.0000"))
+    assert exact.quantize(Decimal("0.00005"), 4) == Decimal("0.0000")
+    assert exact.quantize(Decimal("0.00015"), 4) == Decimal("0.0002")
+    assert exact.div(Decimal("-1"), Decimal("8"), 2) == Decimal("-0.12")
+    assert exact.div(Decimal("1"), Decimal("-3"), 4) == Decimal("-0.3333")
+
+
+def test_quantize_tiny_and_huge_exponents():
+    assert exact.quantize(Decimal("1e-999999"), 4) == Decimal("0.0000")
+    with pytest.raises(ValueError):
+        exact.quantize(Decimal("1e999999"), 4)
+    with pytest.raises(ValueError):
+        exact.to_scaled(Decimal("NaN"))
+    with pytest.raises(ZeroDivisionError):
+        exact.div(Decimal("1"), Decimal("0.00"), 4)
+
+
+def test_deep_float_problems_are_exact():
+    rng = random.Random(1)
+    for depth in (13, 50, 300):
+        lhs, rhs = gen.gen_float_pair("float_mul", depth, rng)
+        product = gen.compute_correct("float_mul", lhs, rhs)
+        (a, _), (b, _) = exact.to_scaled(lhs), exact.to_scaled(rhs)
+        assert product == exact.from_scaled(a * b, 4)
+        assert len(str(product).replace(".", "")) >= 2 * depth + 3
+
+        dividend, divisor = gen.gen_float_pair("float_div", depth, rng)
+        quotient = gen.compute_correct("float_div", dividend, divisor)
+        assert exact.mul(quotient, divisor) == dividend
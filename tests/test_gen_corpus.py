@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import runpy
+import random
+from collections import Counter
+from decimal import Decimal
+
+from llm_arithmetic import io as io_, parse
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+gen_corpus = runpy.run_path(str(SCRIPTS / "gen_corpus.py"))
+
+
+def test_corpus_matches_trial_schema(tmp_path):
+    files, written = gen_corpus["generate_corpus"](
+        str(tmp_path), models=2, runs_per_model=2, trials=3, depths=[2, 8], mix=(0.5, 0.3, 0.2)
+    )
+    assert files == 4 and written == 4 * 8 * 2 * 3
+    paths = sorted(tmp_path.glob("*.jsonl"))
+    records = io_.read_trials(str(paths[0]))
+    assert len(records) == 8 * 2 * 3
+    assert set(records[0]) >= {"model", "variant", "depth", "operands", "correct", "raw_response",
+                               "parsed", "classification", "error", "tokens", "cost", "timestamp"}
+    counts = Counter(r["classification"] for p in paths for r in io_.read_trials(str(p)))
+    assert set(counts) == {"Correct", "Deviate", "NaN"}
+    # stored classification agrees with what the parser makes of the raw response
+    for r in records:
+        variant = r["variant"]
+        correct = int(r["correct"]) if variant.startswith("int") else Decimal(r["correct"])
+        _, classification, error = parse.parse_response(r["raw_response"], correct, variant)
+        assert (classification, error) == (r["classification"], r["error"])
+
+
+def test_corpus_is_reproducible_without_global_rng(tmp_path):
+    state = random.getstate()
+    for out in ("a", "b"):
+        gen_corpus["generate_corpus"](str(tmp_path / out), models=1, runs_per_model=1, trials=2, depths=[3], seed=7)
+    assert random.getstate() == state
+    (a,), (b,) = (sorted((tmp_path / out).glob("*.jsonl")) for out in ("a", "b"))
+    assert a.read_text() == b.read_text()
+
+
+def test_report_loads_corpus(tmp_path):
+    gen_corpus["generate_corpus"](str(tmp_path), models=3, runs_per_model=1, trials=2, depths=[2, 3])
+    report = runpy.run_path(str(SCRIPTS / "report.py"), run_name="not_main")
+    report["load_results"].__globals__["RESULTS_DIR"] = str(tmp_path)
+    recs = report["load_results"]()
+    assert len(recs) == 3
@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from concurrent.futures import Future
+
+from llm_arithmetic.hedge import HedgePolicy, quantile
+
+
+def finished(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def test_quantile_is_nearest_rank():
+    values = [float(i) for i in range(1, 21)]
+    assert quantile(values, 0.95) == 19.0
+    assert quantile(values, 0.5) == 10.0
+    assert quantile([3.0], 0.95) == 3.0
+
+
+def test_thresholds_fall_back_to_the_run_and_hedges_are_capped():
+    policy = HedgePolicy(quantile=0.95, max_rate=0.1, min_samples=10)
+    assert policy.threshold(("int_add", 2)) is None
+    for i in range(10):
+        policy.observe(("int_add", 2), 1.0 + i)
+    assert policy.threshold(("int_add", 2)) == 10.0
+    # too few samples in this cell: use the run-wide quantile
+    policy.observe(("float_div", 9), 100.0)
+    assert policy.threshold(("float_div", 9)) == 100.0
+    assert policy.threshold(("int_add", 3)) == 100.0
+
+    policy.requests = 19
+    assert policy.allow()
+    policy.hedges = 1
+    assert not policy.allow()
+    policy.requests = 20
+    assert policy.allow()
+
+
+def test_settle_keeps_the_first_reply_and_waits_out_a_failure():
+    policy = HedgePolicy()
+    ok, failed = ("reply", 1.0, None), (None, 1.0, TimeoutError())
+
+    # the original succeeds while its duplicate still runs: the duplicate is abandoned
+    original, duplicate = Future(), Future()
+    policy.pair(original, duplicate)
+    assert policy.pairs == 1 and policy.hedges == 1
+    assert policy.settle(original, ok) == (ok, duplicate, True, None)
+    assert policy.pairs == 0 and policy.running_losers() == 1 and policy.wins == 0
+    duplicate.set_result(ok)
+    assert policy.running_losers() == 0
+
+    # a failure waits for the running twin, which then settles the trial alone
+    original, duplicate = Future(), Future()
+    policy.pair(original, duplicate)
+    assert policy.settle(original, failed) is None
+    assert policy.settle(duplicate, ok) == (ok, None, False, None)
+
+    # both finished: the success wins whichever is handled first; the loser's reply is billed
+    original, duplicate = Future(), finished(ok)
+    policy.pair(original, duplicate)
+    assert policy.settle(original, failed) == (ok, duplicate, False, None)
+    assert policy.wins == 1
+    original, duplicate = Future(), finished(("other", 2.0, None))
+    policy.pair(original, duplicate)
+    assert policy.settle(original, ok) == (ok, duplicate, False, "other")
+    assert policy.hedged >= {original, duplicate}
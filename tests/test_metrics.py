@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import urllib.request
+
+import pytest
+
+from llm_arithmetic.metrics import MetricsServer, Registry, RunMetrics, TextfileExporter
+
+
+def test_counter_and_gauge_exposition():
+    r = Registry()
+    c = r.counter("jobs_total", "Jobs done", ("kind",))
+    c.inc(kind="a")
+    c.inc(2, kind='we"ird')
+    g = r.gauge("in_flight", "In flight")
+    g.set(3)
+    om = r.render(openmetrics=True)
+    assert "# TYPE jobs counter" in om
+    assert 'jobs_total{kind="a"} 1' in om
+    assert 'jobs_total{kind="we\\"ird"} 2' in om
+    assert "in_flight 3" in om
+    assert om.endswith("# EOF\n")
+    prom = r.render(openmetrics=False)
+    assert "# TYPE jobs_total counter" in prom and "# EOF" not in prom
+    with pytest.raises(ValueError):
+        c.inc(-1, kind="a")
+
+
+def test_histogram_buckets_are_cumulative():
+    r = Registry()
+    h = r.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    for v in (0.05, 0.5, 0.7, 5):
+        h.observe(v)
+    text = r.render()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert "latency_seconds_sum 6.25" in text
+    assert h.quantile(0.5) == 1
+
+
+def test_server_and_textfile(tmp_path):
+    m = RunMetrics("model-x")
+    m.trial_finished("int_add", 2, "Correct", retries=1, failed=False,
+                     prompt_tokens=10, completion_tokens=2, cached_tokens=0, cost=0.5)
+    with MetricsServer(m.registry, port=0) as server:
+        req = urllib.request.Request(server.url, headers={"Accept": "application/openmetrics-text"})
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            assert resp.headers["Content-Type"].startswith("application/openmetrics-text")
+            body = resp.read().decode()
+    assert 'llm_arith_trials_total{model="model-x",variant="int_add",depth="2",classification="Correct"} 1' in body
+    assert 'llm_arith_cost_usd_total{model="model-x"} 0.5' in body
+
+    path = tmp_path / "m.prom"
+    with TextfileExporter(m.registry, str(path), interval=60):
+        m.trial_finished("int_add", 2, "NaN", retries=0, failed=True,
+                         prompt_tokens=0, completion_tokens=0, cached_tokens=0, cost=0.0)
+    text = path.read_text()
+    assert 'llm_arith_failed_replies_total{model="model-x"} 1' in text
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import json
+import random
+import urllib.error
+import urllib.request
+from decimal import Decimal
+
+import pytest
+
+from llm_arithmetic import io as io_
+from llm_arithmetic.mock_server import MockConfig, MockLLMServer, answer_for, parse_accuracy, parse_latency, parse_question
+from llm_arithmetic.retry import RetryOptions
+from llm_arithmetic.runner import run
+
+
+def _post(server, payload):
+    req = urllib.request.Request(
+        server.api_base + "/chat/completions",
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    return urllib.request.urlopen(req, timeout=10)
+
+
+def test_parse_specs():
+    rng = random.Random(0)
+    assert parse_latency("0.25")(rng) == 0.25
+    assert 0.1 <= parse_latency("uniform:0.1:0.2")(rng) <= 0.2
+    assert parse_latency("lognormal:0.1:0.5")(rng) > 0
+    with pytest.raises(ValueError):
+        parse_latency("gamma:1")
+    assert parse_accuracy("2=1,6=0.5") == {2: 1.0, 6: 0.5}
+    assert parse_question("What is -3.50 ÷ 12.25") == ("float_div", Decimal("-3.50"), Decimal("12.25"), 2)
+    assert parse_question("hello") is None
+
+
+def test_accuracy_by_depth():
+    config = MockConfig(accuracy={2: 1.0, 6: 0.0})
+    rng = random.Random(0)
+    assert answer_for("What is 12 + 34", config, rng) == ("46", 2)
+    answer, depth = answer_for("What is 123456 × 654321", config, rng)
+    assert depth == 6 and answer != str(123456 * 654321)
+    # depths above the last configured one inherit it
+    assert config.accuracy_for(9) == 0.0
+
+
+def test_packed_prompt_gets_numbered_answers():
+    from llm_arithmetic.parse import split_numbered_answers
+    from llm_arithmetic.prompt import make_packed_prompt
+
+    text = make_packed_prompt([(12, "+", 34), (100, "×", 25), (7, "-", 9)])
+    answer, depth = answer_for(text, MockConfig(), random.Random(0))
+    assert depth == 2
+    assert split_numbered_answers(answer, 3) == ["46", "2500", "-2"]
+
+
+def test_completion_and_streaming():
+    with MockLLMServer(MockConfig(completion_tokens_per_depth=10)) as server:
+        body = json.load(_post(server, {"model": "mock", "messages": [{"role": "user", "content": "7 × 8"}]}))
+        assert body["choices"][0]["message"]["content"] == "56"
+        assert body["usage"]["completion_tokens"] >= 10
+
+        resp = _post(server, {"model": "mock", "stream": True,
+                              "messages": [{"role": "user", "content": "1234 + 1"}]})
+        events = [line[6:] for line in resp.read().decode().splitlines() if line.startswith("data: ")]
+        assert events[-1] == "[DONE]"
+        text = "".join(json.loads(e)["choices"][0]["delta"].get("content", "") for e in events[:-1])
+        assert text == "1235"
+
+
+def test_rate_limit_sends_retry_after():
+    with MockLLMServer(MockConfig(rate_limit_rate=1.0, retry_after=2)) as server:
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            _post(server, {"model": "mock", "messages": [{"role": "user", "content": "1 + 1"}]})
+        assert exc.value.code == 429
+        assert exc.value.headers["Retry-After"] == "2"
+        assert server.stats.as_dict()["rate_limited"] == 1
+
+
+def test_runner_against_mock_server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = MockConfig(latency="uniform:0:0.01", rate_limit_rate=0.2, seed=1)
+    with MockLLMServer(config) as server:
+        run(
+            model="openai/mock",
+            trials_per_cell=2,
+            depths=[2, 3],
+            output_dir=str(tmp_path / "results"),
+            retry=RetryOptions(retries=10, delay=0.01),
+            litellm_params=server.litellm_params(),
+            concurrency=4,
+        )
+        stats = server.stats.as_dict()
+    trials = [t for f in (tmp_path / "results").glob("*.jsonl") for t in io_.read_trials(str(f))]
+    assert len(trials) == 8 * 2 * 2
+    assert all(t["classification"] == "Correct" for t in trials)
+    assert stats["rate_limited"] > 0
+    assert stats["requests"] == len(trials) + stats["rate_limited"]
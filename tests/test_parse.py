@@ -20,6 +20,7 @@ import pytest
 from llm_arithmetic.parse import (
     parse_response,
     extract_number,
+    split_numbered_answers,
     LEGACY_NUMBER_REGEX,
 )
 
@@ -224,3 +225,40 @@ def test_comma_thousands_correct():
 def test_negative_via_boxed():
     parsed, cls, err = parse_response(r"\boxed{-5603186868} \]  However...", -5603186868, "int_sub")
     assert cls == "Correct" and parsed == -5603186868
+
+
+# --- packed (multi-problem) replies ---------------------------------------
+
+def test_split_numbered_answers_maps_lines_to_problems():
+    raw = "<think>1. maybe 5</think>\n1. 42\n**2.** 12 + 30 = 42\n3) \\boxed{-7}\n\n5. 9"
+    assert split_numbered_answers(raw, 4) == ["42", "42", "\\boxed{-7}", ""]
+
+
+def test_split_numbered_answers_edge_cases():
+    # a bare "12.5" is an answer, not item 12; the first line for a number wins
+    assert split_numbered_answers("1. 12.5\n1. 99\n12.5", 12)[:2] == ["12.5", ""]
+    assert split_numbered_answers("", 2) == ["", ""]
+    assert split_numbered_answers("Sure: 17", 1) == ["Sure: 17"]
+    answers = split_numbered_answers("1. 3\n2. oops", 3)
+    assert [parse_response(a, 3, "int_add")[1] for a in answers] == ["Correct", "NaN", "NaN"]
+
+
+
+# --- deep problems ----------------------------------------------------------
+
+def test_deep_float_mul_error_is_exact():
+    # depth 100: 200+ significant digits, far past the 28-digit Decimal context
+    correct = Decimal("1" * 200 + ".2345")
+    assert parse_response(str(correct), correct, "float_mul")[1] == "Correct"
+    parsed, cls, err = parse_response("1" * 199 + "2.2345", correct, "float_mul")
+    assert cls == "Deviate" and err == "1.0000"
+    assert parse_response("1" * 200 + ".23454", correct, "float_mul")[1] == "Correct"
+
+
+def test_long_digit_run_parses_in_linear_time():
+    import time
+    raw = "The answer is " + "7" * 4000
+    start = time.perf_counter()
+    parsed, cls, err = parse_response(raw, int("7" * 4000), "int_mul")
+    assert cls == "Correct"
+    assert time.perf_counter() - start < 1.0
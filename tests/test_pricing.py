@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from llm_arithmetic.pricing import Prices, cache_token_counts, load_prices, trial_cost
+from llm_arithmetic.prompt import mark_cache_prefix
+
+
+def test_load_prices_optional_cache_columns(tmp_path):
+    csv_path = tmp_path / "models_metadata.csv"
+    csv_path.write_text(
+        "model,1m_prompt,1m_completion,1m_cached_prompt,1m_cache_write,date_released,reasoning_status,comment\n"
+        "claude,3,15,0.3,3.75, 2025-05,not_reasoning,\n"
+        "gpt,2, 8,,, 2025-04,not_reasoning,\n"
+    )
+    prices = load_prices(str(csv_path))
+    assert prices["claude"] == Prices(3, 15, 0.3, 3.75)
+    # empty cache columns fall back to the full prompt price
+    assert prices["gpt"] == Prices(2, 8, 2, 2)
+    assert load_prices(str(tmp_path / "missing.csv")) == {}
+
+
+def test_trial_cost_prices_cached_tokens_separately():
+    prices = Prices(prompt=3, completion=15, cached_prompt=0.3, cache_write=3.75)
+    # 4000 prompt tokens of which 3500 read from cache and 0 written
+    assert trial_cost(prices, 4000, 10, cached_tokens=3500) == pytest.approx(
+        (500 * 3 + 3500 * 0.3 + 10 * 15) / 1e6
+    )
+    assert trial_cost(prices, 4000, 10, cache_write_tokens=3500) == pytest.approx(
+        (500 * 3 + 3500 * 3.75 + 10 * 15) / 1e6
+    )
+    assert trial_cost(Prices(3, 15), 4000, 10, cached_tokens=3500) == pytest.approx(
+        (4000 * 3 + 10 * 15) / 1e6
+    )
+
+
+def test_shipped_metadata_carries_published_cache_rates():
+    metadata = Path(__file__).resolve().parent.parent / "data" / "models_metadata.csv"
+    prices = load_prices(str(metadata))
+    sonnet = prices["claude-sonnet-4"]
+    assert (sonnet.cached_prompt, sonnet.cache_write) == (pytest.approx(0.3), pytest.approx(3.75))
+    assert trial_cost(sonnet, 4000, 10, cached_tokens=3500) == pytest.approx(
+        (500 * 3 + 3500 * 0.3 + 10 * 15) / 1e6
+    )
+    # automatic caches bill writes at the regular prompt rate
+    assert prices["gpt-4.1"].cached_prompt == pytest.approx(0.5)
+    assert prices["gpt-4.1"].cache_write == prices["gpt-4.1"].prompt
+    assert prices["deepseek-chat"].cached_prompt == pytest.approx(0.07)
+    # models without prompt caching keep the full rate
+    assert prices["claude-2"].cached_prompt == prices["claude-2"].prompt
+
+
+def test_cache_token_counts_from_litellm_usage():
+    from litellm.types.utils import Usage
+
+    usage = Usage(
+        prompt_tokens=4000,
+        completion_tokens=10,
+        total_tokens=4010,
+        cache_read_input_tokens=3500,
+        cache_creation_input_tokens=200,
+    )
+    assert cache_token_counts(usage) == (3500, 200)
+    assert cache_token_counts({"prompt_tokens_details": {"cached_tokens": 1024}}) == (1024, 0)
+    assert cache_token_counts({"prompt_tokens": 5}) == (0, 0)
+    assert cache_token_counts(None) == (0, 0)
+
+
+def test_mark_cache_prefix_marks_last_message_only():
+    prefix = [
+        {"role": "system", "content": "be terse"},
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+    ]
+    marked = mark_cache_prefix(prefix)
+    assert marked[:2] == prefix[:2]
+    assert marked[-1]["content"] == [
+        {"type": "text", "text": "hello", "cache_control": {"type": "ephemeral"}}
+    ]
+    assert prefix[-1]["content"] == "hello"  # input untouched
+    assert mark_cache_prefix([]) == []
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pickle
+
+import pytest
+
+from llm_arithmetic import io as io_
+from llm_arithmetic.procpool import WorkerCompletionError, WorkerResponse, _usage_dict, load_callable
+from llm_arithmetic.retry import RetryOptions
+from llm_arithmetic.runner import run
+
+
+def test_worker_results_and_errors_pickle():
+    resp = pickle.loads(pickle.dumps(WorkerResponse("42", {"prompt_tokens": 3})))
+    assert resp.choices[0].message.content == "42" and resp.usage["prompt_tokens"] == 3
+    err = pickle.loads(pickle.dumps(WorkerCompletionError("RateLimitError", "slow down", 429)))
+    assert (err.error_class, err.status_code, str(err)) == ("RateLimitError", 429, "RateLimitError: slow down")
+
+
+def test_usage_dict_keeps_cache_details():
+    class Details:
+        cached_tokens = 7
+    class Usage:
+        prompt_tokens, completion_tokens, prompt_tokens_details = 10, 2, Details()
+    assert _usage_dict(Usage()) == {"prompt_tokens": 10, "completion_tokens": 2,
+                                    "prompt_tokens_details": {"cached_tokens": 7}}
+
+
+def test_load_callable_validates_spec():
+    assert load_callable("llm_arithmetic.procpool:register_mock_provider").__name__ == "register_mock_provider"
+    with pytest.raises(ValueError):
+        load_callable("llm_arithmetic.procpool")
+
+
+def test_process_backend_runs_completions_in_workers(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_ARITH_MOCK_CPU_MS", "1")
+    run(
+        model="mock-local/test",
+        trials_per_cell=2,
+        depths=[2, 3],
+        output_dir=str(tmp_path),
+        retry=RetryOptions(delay=0.0),
+        concurrency=1,
+        backend="process",
+        worker_init="llm_arithmetic.procpool:register_mock_provider",
+    )
+    (trial_file,) = tmp_path.glob("*.jsonl")
+    trials = io_.read_trials(str(trial_file))
+    assert len(trials) == 32
+    assert all(t["classification"] == "Correct" for t in trials)
+    assert all(t["tokens"]["prompt_tokens"] > 0 and t["attempts"] == 1 for t in trials)
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import pstats
+import tracemalloc
+
+import pytest
+
+from llm_arithmetic import profiling
+
+
+def _work():
+    return sum(i * i for i in range(20000))
+
+
+def test_disabled_is_a_noop(tmp_path):
+    with profiling.profiled(None, str(tmp_path), "run") as path:
+        with profiling.stage("load"):
+            _work()
+    assert path is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cprofile_writes_artifact_and_summary(tmp_path, capsys):
+    with profiling.profiled("cprofile", str(tmp_path), "report", top=5) as path:
+        with profiling.stage("load"):
+            _work()
+        with profiling.stage("render"):
+            _work()
+    assert Path(path).name.startswith("profile_report_") and path.endswith(".prof")
+    assert pstats.Stats(path).total_calls > 0
+    err = capsys.readouterr().err
+    assert "[profile] cprofile: report" in err
+    assert "load" in err and "render" in err
+    assert "_work" in err
+
+
+def test_tracemalloc_snapshot(tmp_path, capsys):
+    with profiling.profiled("tracemalloc", str(tmp_path), "run") as path:
+        with profiling.stage("load"):
+            data = [str(i) for i in range(10000)]
+    assert len(data) == 10000
+    assert not tracemalloc.is_tracing()
+    assert tracemalloc.Snapshot.load(path).traces
+    err = capsys.readouterr().err
+    assert "peak traced memory" in err and "KiB" in err
+
+
+def test_unknown_profiler(tmp_path):
+    with pytest.raises(ValueError):
+        with profiling.profiled("perf", str(tmp_path), "run"):
+            pass
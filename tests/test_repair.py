@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json
+
+import pytest
+
+from llm_arithmetic import types
+from llm_arithmetic.repair import RepairQueue, scan
+
+
+def record(n, **fields):
+    rec = {"model": "m", "variant": "int_add", "depth": 2, "operands": [n, 1], "correct": n + 1,
+           "raw_response": str(n + 1), "failed_to_get_reply": False, "extra_context": 0, "seed": 7,
+           "trial_index": n}
+    rec.update(fields)
+    return json.dumps(rec)
+
+
+def answered(item, raw):
+    return types.Trial(
+        model="m", variant=item["variant"], depth=item["depth"], operands=[item["lhs"], item["rhs"]],
+        correct=item["correct"], raw_response=raw, parsed=None, classification="Correct", error=None,
+        prompt_tokens=1, completion_tokens=1, cost=0.0, timestamp="t", attempts=1,
+        failed_to_get_reply=not raw,
+    )
+
+
+def test_scan_decodes_only_failed_or_empty_records(tmp_path):
+    path = tmp_path / "run.jsonl"
+    path.write_text("\n".join([
+        record(0),
+        record(1, failed_to_get_reply=True, raw_response=None),
+        record(2, raw_response=""),
+        "not json",
+        record(4, raw_response="the model said \"failed_to_get_reply\": true"),
+    ]) + "\n")
+    lines, broken = scan(str(path))
+    assert len(lines) == 5 and sorted(broken) == [1, 2]
+
+    with pytest.raises(ValueError):
+        RepairQueue(str(path), extra_context=100)
+
+
+def test_repair_replaces_answered_records_atomically(tmp_path):
+    path = tmp_path / "run.jsonl"
+    original = [record(0), record(1, failed_to_get_reply=True, raw_response=None),
+                record(2, raw_response="", variant="float_mul", operands=["1.5", "2.25"], correct="3.3750")]
+    path.write_text("\n".join(original))  # no trailing newline
+    queue = RepairQueue(str(path))
+    assert queue.meta() == {"depths": [2], "trials_per_cell": 1, "model": "m"}
+    with queue:
+        first, second = queue.claim(), queue.claim()
+        assert queue.claim() is None
+        assert (second["variant"], str(second["lhs"]), str(second["correct"])) == ("float_mul", "1.5", "3.3750")
+        queue.complete(first["id"], answered(first, "2"))
+        queue.complete(second["id"], answered(second, ""))  # still empty: kept as it was
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 2, "total": 2}
+    lines = path.read_text().splitlines()
+    assert lines[0] == original[0] and lines[2] == original[2]
+    fixed = json.loads(lines[1])
+    assert fixed["raw_response"] == "2" and not fixed["failed_to_get_reply"]
+    assert (fixed["seed"], fixed["trial_index"]) == (7, 1)
+    assert [p.name for p in tmp_path.iterdir()] == ["run.jsonl"]
+    assert "1/2" in queue.summary()
+
+    # the file grew meanwhile: the result goes next to it
+    queue = RepairQueue(str(path))
+    item = queue.claim()
+    with open(path, "a") as f:
+        f.write(record(9) + "\n")
+    with queue:
+        queue.complete(item["id"], answered(item, "3.375"))
+    assert json.loads(Path(str(path) + ".repaired").read_text().splitlines()[2])["raw_response"] == "3.375"
+    assert len(path.read_text().splitlines()) == 4
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import runpy
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+report = runpy.run_path(str(SCRIPTS / "report.py"), run_name="not_main")
+
+
+def cell(t, correct, nan, avg_error=0.0):
+    dev = t - correct - nan
+    return {"total_trials": t, "correct_count": correct, "nan_count": nan, "deviate_count": dev,
+            "avg_error": avg_error, "general_avg_error": avg_error * dev / (t - nan),
+            "avg_prompt_tokens": 10.0, "avg_completion_tokens": 2.0, "total_cost": 0.1 * t}
+
+
+def test_adaptive_runs_keep_raw_counts_and_weight_cells_equally():
+    # a saturated cell stopped at 5 trials, an uncertain one absorbed 45
+    cells = {"int_add": {"depth_2": cell(5, 5, 0), "depth_3": cell(45, 15, 9, avg_error=0.5)}}
+    fixed, _ = report["filter_record_by_depth"]({"cells": cells}, 0)
+    overall, per_cat = report["filter_record_by_depth"]({"cells": cells, "stop_rule": "wilson"}, 0)
+
+    assert overall["total_trials"] == fixed["total_trials"] == 50
+    assert per_cat["int_add"]["correct_count"] == 20
+    assert per_cat["int_add"]["nan_count"] == 9 and per_cat["int_add"]["deviate_count"] == 21
+    assert overall["total_prompt_tokens"] == 500 and overall["total_cost"] == pytest.approx(5.0)
+    # error averages are per deviating trial, in raw units
+    assert overall["avg_error"] == fixed["avg_error"] == pytest.approx(0.5)
+
+    assert fixed["accuracy"] == pytest.approx(20 / 50)
+    assert overall["accuracy"] == per_cat["int_add"]["accuracy"] == pytest.approx((1 + 15 / 45) / 2)
+    assert overall["nan_rate"] == pytest.approx((0 + 9 / 45) / 2)
+    assert overall["deviate_rate"] == pytest.approx((0 + 21 / 45) / 2)
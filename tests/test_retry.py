@@ -0,0 +1,102 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+
+from llm_arithmetic.procpool import WorkerCompletionError
+from llm_arithmetic.retry import (
+    CircuitBreaker, RetryQueue, backoff_delay, classify_error, is_retryable, retry_after, retry_delay_for,
+)
+
+
+class HTTPFailure(Exception):
+    def __init__(self, headers):
+        super().__init__("rate limited")
+        self.response = httpx.Response(429, headers=headers)
+
+
+def test_retry_after_reads_seconds_milliseconds_and_dates():
+    assert retry_after(HTTPFailure({"Retry-After": "3"})) == 3.0
+    assert retry_after(HTTPFailure({"retry-after-ms": "250", "retry-after": "9"})) == 0.25
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < retry_after(HTTPFailure({"Retry-After": later})) <= 30
+    assert retry_after(HTTPFailure({})) is None
+    assert retry_after(ValueError("no response")) is None
+    assert retry_after(WorkerCompletionError("RateLimitError", "slow down", 429, 1.5)) == 1.5
+
+
+def test_backoff_is_jittered_exponential_and_capped():
+    rng = random.Random(0)
+    for attempt in range(4):
+        ceiling = 2.0 * 2 ** (attempt + 1)
+        draws = [backoff_delay(attempt, 2.0, rng) for _ in range(50)]
+        assert all(ceiling / 2 <= d <= ceiling for d in draws)
+        assert len(set(draws)) > 1
+    assert backoff_delay(20, 2.0, rng, cap=60) <= 60
+    assert retry_delay_for(HTTPFailure({"Retry-After": "7"}), 0, 100.0) == 7.0
+    assert retry_delay_for(HTTPFailure({"Retry-After": "7000"}), 0, 1.0, cap=60) == 60
+
+
+def test_retry_queue_releases_items_when_due():
+    q = RetryQueue()
+    assert q.wait_time() is None and q.pop_due() is None
+    q.push(0.2, "late")
+    q.push(0.0, "now")
+    assert len(q) == 2
+    assert q.pop_due() == "now"
+    assert q.pop_due() is None
+    assert 0 < q.wait_time() <= 0.2
+    time.sleep(q.wait_time())
+    assert q.pop_due() == "late" and not q
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_classify_error_by_name_then_status():
+    ContextWindowExceededError = type("ContextWindowExceededError", (StatusError,), {})
+    assert classify_error(ContextWindowExceededError(400)) == "context_length"
+    assert classify_error(StatusError(401)) == "auth"
+    assert classify_error(StatusError(400)) == "bad_request"
+    assert classify_error(StatusError(429)) == "rate_limit"
+    assert classify_error(StatusError(503)) == "server"
+    assert classify_error(ConnectionResetError()) == "network"
+    assert classify_error(TimeoutError()) == "timeout"
+    assert classify_error(WorkerCompletionError("AuthenticationError", "bad key", 401)) == "auth"
+    assert classify_error(Exception("?")) == "other"
+    assert not is_retryable("auth") and not is_retryable("context_length")
+    assert is_retryable("rate_limit") and is_retryable("server") and is_retryable("other")
+
+
+def test_circuit_breaker_trips_probes_and_closes():
+    breaker = CircuitBreaker(threshold=0.5, window=4, cooldown=0.05)
+    for ok in (True, False, True):
+        assert breaker.record(ok) is False
+    # prompt-specific failures say nothing about the endpoint
+    assert breaker.record(False, "context_length") is False
+    assert breaker.record(False, "server") is True
+    assert breaker.state == "open" and not breaker.allow()
+    assert 0 < breaker.wait_time() <= 0.05
+
+    time.sleep(0.06)
+    assert breaker.state == "half_open" and breaker.allow()
+    breaker.dispatched()
+    assert not breaker.allow()  # one probe at a time
+    assert breaker.record(False, "server") is True
+    assert breaker.cooldown == 0.1 and breaker.trips == 2
+
+    time.sleep(0.11)
+    breaker.dispatched()
+    assert breaker.record(True) is False
+    assert breaker.state == "closed" and breaker.cooldown == 0.05
+    assert CircuitBreaker(threshold=0).record(False) is False
@@ -2,64 +2,76 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 import re
+import time
 import json
 from decimal import Decimal
 import pytest
 
 from llm_arithmetic.runner import run
+from llm_arithmetic.hedge import HedgeOptions
+from llm_arithmetic.retry import RetryOptions
+from llm_arithmetic.timeouts import TimeoutOptions
 from llm_arithmetic import io as io_
 from llm_arithmetic import types
 
+
 # A minimal fake response object to mimic litellm completion output
 class FakeMessage:
     def __init__(self, content):
         self.content = content
 
+
 class FakeChoice:
     def __init__(self, message):
         self.message = message
 
+
 class FakeResponse:
     def __init__(self, content):
         self.choices = [FakeChoice(FakeMessage(content))]
         self.usage = {"prompt_tokens": 0, "completion_tokens": 0}
 
+
+def fake_completion(model, messages, reasoning_effort=None, timeout=None, **kwargs):
+    """Parse the prompt expression and return the exact correct result."""
+    # Extract the last line containing the expression
+    ptext = messages[-1]["content"].strip()
+    # Match two numbers and an operator (+, -, ×, ÷)
+    m = re.search(r"(-?\d+(?:\.\d*)?)\s*([+\-×÷])\s*(-?\d+(?:\.\d*)?)$", ptext)
+    if not m:
+        return FakeResponse("")
+    a_str, op, b_str = m.groups()
+    a = Decimal(a_str)
+    b = Decimal(b_str)
+    # Compute according to op and runner's quantization rules
+    if op == "+":
+        res = a + b
+    elif op == "-":
+        res = a - b
+    elif op == "×":
+        res = (a * b).quantize(Decimal("0.0000"))
+    elif op == "÷":
+        res = (a / b).quantize(Decimal("0.0000"))
+    else:
+        res = Decimal("0")
+    return FakeResponse(str(res))
+
+
 @pytest.fixture(autouse=True)
 def patch_completion(monkeypatch):
     """
     Monkeypatch litellm.completion to parse the prompt expression and return exact correct results.
     """
-    def fake_completion(model, messages, reasoning_effort=None, timeout=None, **kwargs):
-        # Extract the last line containing the expression
-        ptext = messages[-1]["content"].strip()
-        # Match two numbers and an operator (+, -, ×, ÷)
-        m = re.search(r"(-?\d+(?:\.\d*)?)\s*([+\-×÷])\s*(-?\d+(?:\.\d*)?)$", ptext)
-        if not m:
-            return FakeResponse("")
-        a_str, op, b_str = m.groups()
-        a = Decimal(a_str)
-        b = Decimal(b_str)
-        # Compute according to op and runner's quantization rules
-        if op == "+":
-            res = a + b
-        elif op == "-":
-            res = a - b
-        elif op == "×":
-            res = (a * b).quantize(Decimal("0.0000"))
-        elif op == "÷":
-            res = (a / b).quantize(Decimal("0.0000"))
-        else:
-            res = Decimal("0")
-        return FakeResponse(str(res))
-
     monkeypatch.setattr("litellm.completion", fake_completion)
     yield
 
+
 @pytest.fixture(autouse=True)
 def isolate_fs(tmp_path, monkeypatch):
     """Run each test in an isolated temporary directory to avoid writing to project root"""
     monkeypatch.chdir(tmp_path)
 
+
 def test_runner_all_variants_positive(tmp_path):
     # Prepare a known trial file path to avoid timestamp unpredictability
     trial_file = tmp_path / "trials.jsonl"
@@ -71,8 +83,7 @@ def test_runner_all_variants_positive(tmp_path):
         output_dir=str(tmp_path),
         reasoning_effort=None,
         resume_file=str(trial_file),
-        retries=1,
-        retry_delay=0.0
+        retry=RetryOptions(retries=1, delay=0.0)
     )
     # Read back the trial records
     trials = io_.read_trials(str(trial_file))
@@ -89,6 +100,13 @@ def test_runner_all_variants_positive(tmp_path):
     # Optionally: verify each variant appears exactly once
     variants = [rec["variant"] for rec in trials]
     assert sorted(variants) == sorted([*"int_add int_sub int_mul int_div float_add float_sub float_mul float_div".split()])
+    # an ordinary run writes none of the optional fields (seed, shard, hedging, ...)
+    assert set(trials[0]) == {
+        "model", "variant", "depth", "operands", "correct", "raw_response", "parsed", "classification",
+        "error", "tokens", "cost", "timestamp", "attempts", "failed_to_get_reply", "extra_context", "latency",
+    }
+    assert set(trials[0]["tokens"]) == {"prompt_tokens", "completion_tokens"}
+
 
 def test_runner_retries_on_failure(tmp_path, monkeypatch):
     # Count how many times completion is called; fail every even call, succeed every odd
@@ -129,8 +147,7 @@ def test_runner_retries_on_failure(tmp_path, monkeypatch):
         output_dir=str(tmp_path),
         reasoning_effort=None,
         resume_file=str(trial_file),
-        retries=2,
-        retry_delay=0.0
+        retry=RetryOptions(retries=2, delay=0.0)
     )
     # Should produce 8 trials
     trials = io_.read_trials(str(trial_file))
@@ -143,6 +160,7 @@ def test_runner_retries_on_failure(tmp_path, monkeypatch):
     # Ensure completion was called twice per trial
     assert call_count['count'] == 8 * 2
 
+
 def test_resume_only_missing(tmp_path, monkeypatch):
     # Simulate an interrupted run: pre-write 4 trials for first 4 variants
     monkeypatch.chdir(tmp_path)
@@ -175,12 +193,546 @@ def test_resume_only_missing(tmp_path, monkeypatch):
         output_dir=str(tmp_path),
         reasoning_effort=None,
         resume_file=str(trial_file),
-        retries=1,
-        retry_delay=0.0
+        retry=RetryOptions(retries=1, delay=0.0)
     )
     # Verify we now have 8 trials total
     trials = io_.read_trials(str(trial_file))
     assert len(trials) == 8
     # Verify variant order matches full list
     variants = [rec["variant"] for rec in trials]
-    assert variants == types.VARIANTS 
\ No newline at end of file
+    assert variants == types.VARIANTS
+
+
+def test_adaptive_stops_saturated_cells(tmp_path):
+    # The fake model is always correct, so every cell converges at min_trials
+    trial_file = tmp_path / "trials.jsonl"
+    run(
+        model="test-model",
+        trials_per_cell=10,
+        depths=[2, 3],
+        output_dir=str(tmp_path),
+        reasoning_effort=None,
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=1, delay=0.0),
+        ci_width=0.5,
+        min_trials=5,
+    )
+    trials = io_.read_trials(str(trial_file))
+    assert len(trials) == 8 * 2 * 5
+    assert all(rec["stop_rule"] == "wilson:width=0.5:min=5" for rec in trials)
+
+
+def test_adaptive_redistributes_budget_to_uncertain_cells(tmp_path, monkeypatch):
+    # Always right on int_add, right every other call elsewhere: the trials saved
+    # on int_add move to the uncertain cells
+    calls = {}
+    def fake_mixed(model, messages, reasoning_effort=None, timeout=None, **kwargs):
+        expr = messages[-1]["content"].strip().splitlines()[-1]
+        if "+" in expr and "." not in expr:
+            return fake_completion(model, messages)
+        key = (re.sub(r"[\d.]", "", expr), "." in expr)
+        calls[key] = calls.get(key, 0) + 1
+        if calls[key] % 2:
+            return fake_completion(model, messages)
+        return FakeResponse("0")
+    monkeypatch.setattr("litellm.completion", fake_mixed)
+
+    trial_file = tmp_path / "trials.jsonl"
+    run(
+        model="test-model",
+        trials_per_cell=8,
+        depths=[2],
+        output_dir=str(tmp_path),
+        reasoning_effort=None,
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=1, delay=0.0),
+        ci_width=0.5,
+        min_trials=4,
+    )
+    trials = io_.read_trials(str(trial_file))
+    per_variant = {v: sum(1 for r in trials if r["variant"] == v) for v in types.VARIANTS}
+    assert len(trials) == 8 * 8
+    assert per_variant["int_add"] == 4
+    assert max(per_variant.values()) > 8
+
+
+def test_concurrent_run_writes_every_trial(tmp_path):
+    trial_file = tmp_path / "trials.jsonl"
+    run(
+        model="test-model",
+        trials_per_cell=3,
+        depths=[2, 3],
+        output_dir=str(tmp_path),
+        reasoning_effort=None,
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=1, delay=0.0),
+        concurrency=4,
+    )
+    trials = io_.read_trials(str(trial_file))
+    assert len(trials) == 8 * 2 * 3
+    assert all(rec["classification"] == "Correct" for rec in trials)
+
+
+def test_interleaved_partial_run_covers_whole_grid(tmp_path, monkeypatch):
+    # Interrupt after 16 requests: every cell should already have a trial
+    calls = {"n": 0}
+    def interrupted(model, messages, **kwargs):
+        calls["n"] += 1
+        if calls["n"] > 16:
+            raise KeyboardInterrupt
+        return fake_completion(model, messages)
+    monkeypatch.setattr("litellm.completion", interrupted)
+
+    trial_file = tmp_path / "trials.jsonl"
+    with pytest.raises(KeyboardInterrupt):
+        run(
+            model="test-model",
+            trials_per_cell=5,
+            depths=[2, 3],
+            output_dir=str(tmp_path),
+            reasoning_effort=None,
+            resume_file=str(trial_file),
+            retry=RetryOptions(retries=1, delay=0.0),
+        )
+    trials = io_.read_trials(str(trial_file))
+    assert {(r["variant"], r["depth"]) for r in trials} == {
+        (v, d) for v in types.VARIANTS for d in [2, 3]
+    }
+
+
+def test_prompt_cache_marks_prefix_and_records_cached_tokens(tmp_path, monkeypatch):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "dialog_1k.json").write_text(json.dumps({"messages": [
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": "hi there"},
+    ]}))
+    (tmp_path / "data" / "models_metadata.csv").write_text(
+        "model,1m_prompt,1m_completion,1m_cached_prompt,1m_cache_write\n"
+        "test-model,1000000,0,100000,\n"
+    )
+    seen = []
+    def caching_completion(model, messages, **kwargs):
+        seen.append(messages)
+        resp = fake_completion(model, messages)
+        resp.usage = {
+            "prompt_tokens": 10,
+            "completion_tokens": 0,
+            "prompt_tokens_details": {"cached_tokens": 8},
+        }
+        return resp
+    monkeypatch.setattr("litellm.completion", caching_completion)
+
+    trial_file = tmp_path / "trials.jsonl"
+    run(
+        model="test-model",
+        trials_per_cell=1,
+        depths=[2],
+        output_dir=str(tmp_path),
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=1, delay=0.0),
+        extra_context=1,
+        prompt_cache=True,
+    )
+    for messages in seen:
+        assert messages[1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+        assert isinstance(messages[-1]["content"], str)
+    trials = io_.read_trials(str(trial_file))
+    assert len(trials) == 8
+    for rec in trials:
+        assert rec["tokens"]["cached_tokens"] == 8
+        # 2 uncached tokens at $1/token + 8 cached at $0.10/token
+        assert rec["cost"] == pytest.approx(2.8)
+
+
+def test_metrics_textfile_counts_trials_and_retries(tmp_path, monkeypatch):
+    calls = {"n": 0}
+    def flaky_completion(model, messages, **kwargs):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise RuntimeError("transient")
+        return fake_completion(model, messages)
+    monkeypatch.setattr("litellm.completion", flaky_completion)
+
+    prom = tmp_path / "metrics" / "run.prom"
+    run(
+        model="test-model",
+        trials_per_cell=2,
+        depths=[2],
+        output_dir=str(tmp_path),
+        retry=RetryOptions(retries=2, delay=0.0),
+        metrics_textfile=str(prom),
+    )
+    text = prom.read_text()
+    correct = re.findall(r'llm_arith_trials_total\{[^}]*classification="Correct"[^}]*\} (\d+)', text)
+    assert sum(int(c) for c in correct) == 16
+    assert 'llm_arith_retries_total{model="test-model"} 1' in text
+    assert 'llm_arith_requests_total{model="test-model",outcome="error"} 1' in text
+    assert 'llm_arith_request_latency_seconds_count{model="test-model"} 17' in text
+    assert 'llm_arith_trials_planned{model="test-model"} 16' in text
+    assert 'llm_arith_in_flight_requests{model="test-model"} 0' in text
+
+
+def test_trace_spans_cover_every_trial_phase(tmp_path, monkeypatch):
+    calls = {"n": 0}
+    def flaky_completion(model, messages, **kwargs):
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise TimeoutError("slow")
+        return fake_completion(model, messages)
+    monkeypatch.setattr("litellm.completion", flaky_completion)
+
+    trial_file = tmp_path / "trials.jsonl"
+    run(
+        model="test-model",
+        trials_per_cell=1,
+        depths=[2],
+        output_dir=str(tmp_path),
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=2, delay=0.0),
+        trace=True,
+    )
+    from llm_arithmetic.trace import read_trace
+    header, spans = read_trace(str(tmp_path / "traces" / "trials.jsonl"))
+    assert header["model"] == "test-model"
+    by_trial = {}
+    for s in spans:
+        by_trial.setdefault(s["trial"], []).append(s["span"])
+    assert len(by_trial) == 8
+    for names in by_trial.values():
+        assert {"generate", "attempt", "parse", "write", "trial"} <= set(names)
+    failed = [s for s in spans if s["span"] == "attempt" and not s["ok"]]
+    assert len(failed) == 1 and failed[0]["error_class"] == "TimeoutError"
+    assert any(s["span"] == "backoff" for s in spans)
+    # trial records carry the request latency
+    assert all(rec["latency"] is not None for rec in io_.read_trials(str(trial_file)))
+
+
+def test_seeded_shards_split_the_grid_and_merge(tmp_path):
+    import runpy
+    merge = runpy.run_path(str(Path(__file__).resolve().parent.parent / "scripts" / "merge_shards.py"))["merge"]
+    for i in range(3):
+        run(model="test-model", trials_per_cell=2, depths=[2, 3], output_dir=str(tmp_path),
+            retry=RetryOptions(delay=0.0), seed=7, shard=(i, 3))
+    shard_files = sorted((tmp_path / "shards").glob("*.jsonl"))
+    assert len(shard_files) == 3 and not list(tmp_path.glob("*.jsonl"))
+    files = {str(p): io_.read_trials(str(p)) for p in shard_files}
+    assert sorted(len(r) for r in files.values()) == [10, 11, 11]
+
+    run(model="test-model", trials_per_cell=2, depths=[2, 3], output_dir=str(tmp_path / "full"),
+        retry=RetryOptions(delay=0.0), seed=7)
+    (full_file,) = (tmp_path / "full").glob("*.jsonl")
+    full = {(r["variant"], r["depth"], r["trial_index"]): r["operands"] for r in io_.read_trials(str(full_file))}
+
+    result = merge(files)
+    assert not result["errors"] and not result["missing"] and result["duplicates"] == 0
+    assert len(result["records"]) == 32
+    # same seed, same problem for every slot whether sharded or not
+    assert {(r["variant"], r["depth"], r["trial_index"]): r["operands"] for r in result["records"]} == full
+    assert result["stats"]["total"]["correct"] == 32
+
+    first = next(iter(files))
+    files[first + ".again"] = files[first][:2]
+    files.pop(str(shard_files[1]))
+    result = merge(files)
+    assert result["duplicates"] == 2
+    assert len(result["missing"]) == 11
+    assert any("shard" in w for w in result["warnings"])
+
+    tampered = {str(p): io_.read_trials(str(p)) for p in shard_files}
+    tampered[str(shard_files[0])][0]["operands"] = [1, 1]
+    assert any("don't match seed" in e for e in merge(tampered)["errors"])
+
+
+def test_sharding_requires_a_seed(tmp_path):
+    with pytest.raises(ValueError):
+        run(model="test-model", trials_per_cell=1, depths=[2], output_dir=str(tmp_path), shard=(0, 2))
+
+
+def test_backoff_does_not_stall_other_trials(tmp_path, monkeypatch):
+    class RateLimited(Exception):
+        retry_after = 0.3
+
+    calls = {"n": 0}
+    def limited_once(model, messages, **kwargs):
+        calls["n"] += 1
+        assert kwargs["max_retries"] == 0
+        if calls["n"] == 1:
+            raise RateLimited("429")
+        return fake_completion(model, messages)
+    monkeypatch.setattr("litellm.completion", limited_once)
+
+    trial_file = tmp_path / "trials.jsonl"
+    started = time.monotonic()
+    run(
+        model="test-model",
+        trials_per_cell=1,
+        depths=[2],
+        output_dir=str(tmp_path),
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=3, delay=30.0),  # Retry-After wins over the (long) exponential backoff
+    )
+    assert time.monotonic() - started < 10
+    trials = io_.read_trials(str(trial_file))
+    assert len(trials) == 8 and all(t["classification"] == "Correct" for t in trials)
+    # the rate-limited first trial was recorded after the ones dispatched while it waited
+    assert trials[0]["attempts"] == 1
+    assert [t["attempts"] for t in trials].index(2) > 0
+
+
+def test_non_retryable_errors_fail_fast_with_error_class(tmp_path, monkeypatch):
+    class AuthenticationError(Exception):
+        status_code = 401
+
+    calls = {"n": 0}
+    def bad_key(model, messages, **kwargs):
+        calls["n"] += 1
+        raise AuthenticationError("invalid api key")
+    monkeypatch.setattr("litellm.completion", bad_key)
+
+    trial_file = tmp_path / "trials.jsonl"
+    run(
+        model="test-model",
+        trials_per_cell=1,
+        depths=[2],
+        output_dir=str(tmp_path),
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=5, delay=0.0, breaker_threshold=0),
+    )
+    trials = io_.read_trials(str(trial_file))
+    assert calls["n"] == 8
+    assert all(t["failed_to_get_reply"] and t["attempts"] == 1 for t in trials)
+    assert {t["error_class"] for t in trials} == {"auth"}
+
+
+def test_circuit_breaker_pauses_against_a_dead_endpoint(tmp_path, monkeypatch):
+    class ServiceUnavailableError(Exception):
+        status_code = 503
+
+    revived_at = time.monotonic() + 0.5
+    calls = {"dead": 0}
+    def flaky_endpoint(model, messages, **kwargs):
+        if time.monotonic() < revived_at:
+            calls["dead"] += 1
+            raise ServiceUnavailableError("down")
+        return fake_completion(model, messages)
+    monkeypatch.setattr("litellm.completion", flaky_endpoint)
+
+    trial_file = tmp_path / "trials.jsonl"
+    run(
+        model="test-model",
+        trials_per_cell=1,
+        depths=[2],
+        output_dir=str(tmp_path),
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=100, delay=0.0, breaker_threshold=0.5, breaker_window=4, breaker_cooldown=0.1),
+    )
+    trials = io_.read_trials(str(trial_file))
+    assert len(trials) == 8 and all(t["classification"] == "Correct" for t in trials)
+    # without the breaker, a zero-delay retry loop would hammer the endpoint for the whole 0.5 s
+    assert calls["dead"] <= 8
+    assert trials[0]["error_class"] == "server"
+
+
+def test_hedging_duplicates_stragglers_and_bills_the_duplicate(tmp_path, monkeypatch):
+    import threading
+    from llm_arithmetic import prompt
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "models_metadata.csv").write_text(
+        "model,1m_prompt,1m_completion,1m_cached_prompt,1m_cache_write\n"
+        "test-model,1000000,0,,\n"
+    )
+    lock = threading.Lock()
+    seen = []  # prompts in order of their first request
+    # the 20th and 26th problems straggle: their first request holds its reply (a
+    # wrong one) until the trial has been settled and written from the duplicate's
+    straggling = {}  # prompt text -> set once that trial is written
+    duplicated = set()
+    def straggle(model, messages, **kwargs):
+        ptext = messages[-1]["content"]
+        with lock:
+            held = None
+            if ptext in straggling:
+                duplicated.add(ptext)
+            elif ptext not in seen:
+                seen.append(ptext)
+                if len(seen) in (20, 26):
+                    held = straggling[ptext] = threading.Event()
+        if held is not None:
+            assert held.wait(30), "the straggler was never hedged"
+            resp = FakeResponse("0")
+            resp.usage = {"prompt_tokens": 10, "completion_tokens": 0}
+            return resp
+        resp = fake_completion(model, messages)
+        resp.usage = {"prompt_tokens": 10, "completion_tokens": 0}
+        return resp
+    monkeypatch.setattr("litellm.completion", straggle)
+    write_trial = io_.write_trial
+    def write_and_release(trial, path):
+        write_trial(trial, path)
+        op = prompt.OP_SYMBOLS[trial.variant.split("_")[1]]
+        with lock:
+            settled = straggling.get(prompt.make_prompt(trial.operands[0], op, trial.operands[1]))
+        if settled is not None:
+            settled.set()
+    monkeypatch.setattr(io_, "write_trial", write_and_release)
+
+    trial_file = tmp_path / "trials.jsonl"
+    run(
+        model="test-model",
+        trials_per_cell=4,
+        depths=[2],
+        output_dir=str(tmp_path),
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=1),
+        concurrency=4,
+        hedge=HedgeOptions(max_rate=1.0),
+    )
+    trials = io_.read_trials(str(trial_file))
+    assert len(trials) == 32 and all(t["classification"] == "Correct" for t in trials)
+    assert len(straggling) == 2 and duplicated == set(straggling)
+    for t in trials:
+        assert t["cost"] == pytest.approx(10 + t.get("hedge_cost", 0))
+        assert ("hedge_cost" in t) == t.get("hedged", False)
+        assert t.get("hedge_cost", 10) == pytest.approx(10)
+    # the duplicates' correct replies settled the straggling trials, not the held "0"
+    straggled = [t for t in trials if prompt.make_prompt(
+        t["operands"][0], prompt.OP_SYMBOLS[t["variant"].split("_")[1]], t["operands"][1]) in straggling]
+    assert len(straggled) == 2
+    assert all(t.get("hedged") and t["parsed"] == t["correct"] for t in straggled)
+
+
+def test_packed_requests_split_into_trials(tmp_path, monkeypatch):
+    requests = []
+    failures = []
+    def packed_completion(model, messages, **kwargs):
+        ptext = messages[-1]["content"]
+        if not failures:
+            failures.append(ptext)
+            raise RuntimeError("transient")
+        requests.append(ptext)
+        lines = [l for l in ptext.splitlines() if re.match(r"\s+\d+\. ", l)]
+        answers = []
+        for line in lines:
+            n, expr = line.strip().split(". ", 1)
+            # the model skips the second problem of every request
+            if n != "2":
+                answers.append(f"{n}. {fake_completion(model, [{'content': expr}]).choices[0].message.content}")
+        resp = FakeResponse("\n".join(answers))
+        resp.usage = {"prompt_tokens": 100, "completion_tokens": 7}
+        return resp
+    monkeypatch.setattr("litellm.completion", packed_completion)
+
+    trial_file = tmp_path / "trials.jsonl"
+    run(
+        model="test-model",
+        trials_per_cell=1,
+        depths=[2],
+        output_dir=str(tmp_path),
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=2, delay=0.0),
+        pack=3,
+        metrics_textfile=str(tmp_path / "run.prom"),
+    )
+    trials = io_.read_trials(str(trial_file))
+    assert len(requests) == 3 and len(trials) == 8
+    assert requests[0] == failures[0]
+    assert [t["attempts"] for t in trials] == [2, 2, 2, 1, 1, 1, 1, 1]
+    # one failed request is one retry, not one per problem it packs
+    text = (tmp_path / "run.prom").read_text()
+    assert 'llm_arith_retries_total{model="test-model"} 1' in text
+    assert 'llm_arith_requests_total{model="test-model",outcome="error"} 1' in text
+    assert [t["pack_position"] for t in trials] == [1, 2, 3, 1, 2, 3, 1, 2]
+    assert {t["variant"] for t in trials} == set(types.VARIANTS)
+    for t in trials:
+        expected = "NaN" if t["pack_position"] == 2 else "Correct"
+        assert t["classification"] == expected
+    # each request's usage is shared by the problems it carried
+    assert sum(t["tokens"]["prompt_tokens"] for t in trials) == 300
+    assert [t["tokens"]["completion_tokens"] for t in trials[-2:]] == [4, 3]
+
+
+def test_longest_schedule_uses_earlier_runs(tmp_path):
+    earlier = tmp_path / "test-model_earlier.jsonl"
+    earlier.write_text("\n".join(json.dumps({
+        "model": "test-model", "variant": variant, "depth": 3, "latency": seconds,
+        "tokens": {"completion_tokens": 10}, "failed_to_get_reply": False,
+    }) for variant, seconds in [("float_div", 40.0), ("int_mul", 30.0)]) + "\n")
+    trial_file = tmp_path / "trials.jsonl"
+    run(
+        model="test-model",
+        trials_per_cell=1,
+        depths=[2, 3],
+        output_dir=str(tmp_path),
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=1),
+        schedule="longest",
+    )
+    trials = io_.read_trials(str(trial_file))
+    assert len(trials) == 16
+    assert [(t["variant"], t["depth"]) for t in trials[:2]] == [("float_div", 3), ("int_mul", 3)]
+
+
+def test_adaptive_timeouts_per_cell(tmp_path, monkeypatch):
+    earlier = tmp_path / "test-model_earlier.jsonl"
+    earlier.write_text("\n".join(json.dumps({
+        "model": "test-model", "variant": "int_add", "depth": 2, "latency": 1.0,
+        "tokens": {"completion_tokens": 3}, "failed_to_get_reply": False,
+    }) for _ in range(20)) + "\n")
+    seen = []
+    def hanging_completion(model, messages, timeout=None, **kwargs):
+        seen.append((messages[-1]["content"], timeout))
+        if len(seen) == 1:
+            raise TimeoutError("request hung")
+        return fake_completion(model, messages)
+    monkeypatch.setattr("litellm.completion", hanging_completion)
+
+    trial_file = tmp_path / "trials.jsonl"
+    run(
+        model="test-model",
+        trials_per_cell=1,
+        depths=[2],
+        output_dir=str(tmp_path),
+        resume_file=str(trial_file),
+        retry=RetryOptions(retries=2, delay=0.01),
+        timeout_sec=120,
+        adaptive_timeout=TimeoutOptions(floor=2.0),
+    )
+    def is_int_add(ptext):
+        line = ptext.strip().splitlines()[-1]
+        return "+" in line and "." not in line
+    # int_add@2: 3 × 1 s, then doubled for the retry after its timeout; no data elsewhere
+    assert [t for p, t in seen if is_int_add(p)] == [3.0, 6.0]
+    assert {t for p, t in seen if not is_int_add(p)} == {120}
+    trials = io_.read_trials(str(trial_file))
+    first = next(t for t in trials if t["variant"] == "int_add")
+    assert (first["error_class"], first["timeout"], first["attempts"]) == ("timeout", 6.0, 2)
+    assert first["classification"] == "Correct"
+    assert all(t["timeout"] == 120 for t in trials if t["variant"] != "int_add")
+
+
+def test_repair_reissues_only_failed_trials(tmp_path, monkeypatch):
+    from llm_arithmetic.repair import RepairQueue
+
+    calls = []
+    def flaky_completion(model, messages, **kwargs):
+        calls.append(messages[-1]["content"])
+        if len(calls) in (2, 5):
+            raise RuntimeError("provider flaked")
+        return fake_completion(model, messages)
+    monkeypatch.setattr("litellm.completion", flaky_completion)
+    trial_file = tmp_path / "trials.jsonl"
+    run(model="test-model", trials_per_cell=1, depths=[2], output_dir=str(tmp_path),
+        resume_file=str(trial_file), retry=RetryOptions(retries=1), model_alias="alias")
+    before = trial_file.read_text().splitlines()
+    assert sum(json.loads(line)["failed_to_get_reply"] for line in before) == 2
+
+    monkeypatch.setattr("litellm.completion", fake_completion)
+    queue = RepairQueue(str(trial_file))
+    run(model="test-model", trials_per_cell=1, depths=[2], output_dir=str(tmp_path), retry=RetryOptions(retries=1),
+        work_queue=queue)
+    after = trial_file.read_text().splitlines()
+    assert len(after) == 8
+    assert [a for a, b in zip(after, before) if a != b] == [after[1], after[4]]
+    trials = [json.loads(line) for line in after]
+    assert all(t["classification"] == "Correct" and t["model"] == "alias" for t in trials)
+    assert [t["operands"] for t in trials] == [json.loads(line)["operands"] for line in before]
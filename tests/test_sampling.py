@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from llm_arithmetic.sampling import StoppingRule, interval_width, wilson_interval
+
+
+def test_wilson_interval_known_value():
+    low, high = wilson_interval(5, 10)
+    assert low == pytest.approx(0.2366, abs=1e-4)
+    assert high == pytest.approx(0.7634, abs=1e-4)
+
+
+def test_wilson_interval_saturated_cells_narrow_quickly():
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    assert interval_width(10, 10) < interval_width(5, 10)
+    assert interval_width(0, 10) == pytest.approx(interval_width(10, 10))
+
+
+def test_stopping_rule_respects_min_and_max():
+    rule = StoppingRule(width=0.5, min_trials=5, max_trials=12)
+    assert not rule.converged(4, 4)  # below min_trials despite being saturated
+    assert rule.converged(5, 5)
+    assert not rule.converged(3, 6)
+    assert rule.capped(12) and not rule.capped(11)
+    assert rule.describe() == "wilson:width=0.5:min=5:max=12"
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"width": 0},
+    {"width": 1.5},
+    {"width": 0.3, "min_trials": 0},
+    {"width": 0.3, "min_trials": 5, "max_trials": 3},
+])
+def test_stopping_rule_rejects_bad_config(kwargs):
+    with pytest.raises(ValueError):
+        StoppingRule(**kwargs)
@@ -0,0 +1,160 @@
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from llm_arithmetic.sampling import StoppingRule
+from llm_arithmetic.schedule import (
+    CellScheduler,
+    LatencyModel,
+    answered_trials,
+    load_latency_history,
+    makespan_bound,
+    parse_shard,
+    shard_slots,
+    trial_files,
+)
+
+VARIANTS = ["int_add", "int_mul"]
+DEPTHS = [2, 5]
+
+
+def empty_stats():
+    return {
+        v: {f"depth_{d}": {"total_trials": 0, "correct_count": 0} for d in DEPTHS}
+        for v in VARIANTS
+    }
+
+
+def drain(scheduler, stats, correct=True):
+    """Dispatch and immediately record trials until the scheduler is done."""
+    order = []
+    while True:
+        cell = scheduler.next_cell()
+        if cell is None:
+            return order
+        scheduler.assign(cell)
+        scheduler.complete(cell)
+        stats_cell = stats[cell[0]][f"depth_{cell[1]}"]
+        stats_cell["total_trials"] += 1
+        stats_cell["correct_count"] += int(correct)
+        order.append(cell)
+
+
+def test_variant_order_fills_cells_in_turn():
+    stats = empty_stats()
+    order = drain(CellScheduler(stats, VARIANTS, DEPTHS, 2, order="variant"), stats)
+    assert order == [
+        ("int_add", 2), ("int_add", 2), ("int_add", 5), ("int_add", 5),
+        ("int_mul", 2), ("int_mul", 2), ("int_mul", 5), ("int_mul", 5),
+    ]
+
+
+def test_interleave_round_robins_over_grid():
+    stats = empty_stats()
+    order = drain(CellScheduler(stats, VARIANTS, DEPTHS, 2, order="interleave"), stats)
+    grid = [("int_add", 2), ("int_add", 5), ("int_mul", 2), ("int_mul", 5)]
+    assert order == grid + grid
+
+
+def test_random_order_is_stratified():
+    stats = empty_stats()
+    scheduler = CellScheduler(stats, VARIANTS, DEPTHS, 3, order="random", rng=random.Random(1))
+    order = drain(scheduler, stats)
+    # every cell gets its n-th trial before any cell gets its (n+1)-th
+    for r in range(3):
+        assert len(set(order[r * 4:(r + 1) * 4])) == 4
+
+
+def test_in_flight_trials_count_towards_quota():
+    stats = empty_stats()
+    scheduler = CellScheduler(stats, VARIANTS, DEPTHS, 1, order="interleave")
+    dispatched = []
+    while (cell := scheduler.next_cell()) is not None:
+        scheduler.assign(cell)
+        dispatched.append(cell)
+    assert len(dispatched) == 4
+
+
+def test_adaptive_stops_saturated_cells():
+    stats = empty_stats()
+    rule = StoppingRule(width=0.5, min_trials=4)
+    order = drain(CellScheduler(stats, VARIANTS, DEPTHS, 10, stop_rule=rule), stats)
+    assert len(order) == 4 * 4
+
+
+def test_unknown_order_rejected():
+    with pytest.raises(ValueError):
+        CellScheduler(empty_stats(), VARIANTS, DEPTHS, 1, order="depth")
+
+
+def test_shard_slots_partition_the_grid():
+    cells = [(v, d) for v in VARIANTS for d in DEPTHS]
+    shards = [shard_slots(cells, 5, i, 3) for i in range(3)]
+    seen = [(cell, k) for s in shards for cell, ks in s.items() for k in ks]
+    assert sorted(seen) == sorted((cell, k) for cell in cells for k in range(5))
+    sizes = [sum(len(ks) for ks in s.values()) for s in shards]
+    assert max(sizes) - min(sizes) <= 1
+    assert parse_shard("2/3") == (2, 3)
+    with pytest.raises(ValueError):
+        parse_shard("3/3")
+
+
+def test_budgets_limit_each_cell():
+    stats = empty_stats()
+    budgets = {cell: 1 for cell in [(v, d) for v in VARIANTS for d in DEPTHS]}
+    budgets[(VARIANTS[0], DEPTHS[0])] = 3
+    order = drain(CellScheduler(stats, VARIANTS, DEPTHS, 5, budgets=budgets), stats)
+    assert len(order) == 6
+    assert order.count((VARIANTS[0], DEPTHS[0])) == 3
+
+
+def test_longest_order_dispatches_slowest_cells_first():
+    stats = empty_stats()
+    latencies = LatencyModel()
+    for cell, seconds in [(("int_add", 2), 1.0), (("int_add", 5), 4.0), (("int_mul", 5), 9.0)]:
+        latencies.observe(cell, seconds, int(seconds * 10))
+    # ("int_mul", 2) has no data and gets the mean of the others
+    order = drain(CellScheduler(stats, VARIANTS, DEPTHS, 2, order="longest", latencies=latencies), stats)
+    assert order == [("int_mul", 5)] * 2 + [("int_mul", 2)] * 2 + [("int_add", 5)] * 2 + [("int_add", 2)] * 2
+
+    # no data at all: deeper first, cells of a depth alternating
+    stats = empty_stats()
+    order = drain(CellScheduler(stats, VARIANTS, DEPTHS, 1, order="longest"), stats)
+    assert order == [("int_add", 5), ("int_mul", 5), ("int_add", 2), ("int_mul", 2)]
+
+
+def test_latency_model_falls_back_to_completion_tokens():
+    cells = [("int_add", 2), ("int_mul", 5), ("int_mul", 2)]
+    tokens_only = LatencyModel()
+    tokens_only.observe(("int_add", 2), None, 10)
+    tokens_only.observe(("int_mul", 5), None, 400)
+    assert tokens_only.estimates(cells) == {("int_add", 2): 10, ("int_mul", 5): 400, ("int_mul", 2): 205}
+
+    # a request with both measurements converts tokens to seconds
+    tokens_only.observe(("int_mul", 2), 2.0, 100)
+    estimates = tokens_only.estimates(cells)
+    assert estimates[("int_mul", 2)] == 2.0
+    assert estimates[("int_mul", 5)] == pytest.approx(8.0)
+
+
+def test_load_latency_history_and_makespan_bound(tmp_path):
+    def rec(model, variant, depth, latency, failed=False):
+        return {"model": model, "variant": variant, "depth": depth, "latency": latency,
+                "tokens": {"completion_tokens": 5}, "failed_to_get_reply": failed}
+    mine = tmp_path / "mine.jsonl"
+    mine.write_text("\n".join(json.dumps(r) for r in [
+        rec("m", "int_add", 2, 1.0), rec("m", "int_add", 2, 3.0), rec("m", "int_mul", 5, 50.0, failed=True),
+    ]) + "\n")
+    (tmp_path / "other.jsonl").write_text(json.dumps(rec("other", "int_mul", 5, 99.0)) + "\n")
+    history = load_latency_history(answered_trials(trial_files(str(tmp_path)), "m"))
+    assert history.requests == 2
+    assert history.estimates([("int_add", 2), ("int_mul", 5)]) == {("int_add", 2): 2.0, ("int_mul", 5): 2.0}
+
+    assert makespan_bound([], 4) == 0.0
+    assert makespan_bound([1.0, 1.0, 1.0, 1.0], 2) == 2.0
+    assert makespan_bound([10.0, 1.0, 1.0], 4) == 10.0
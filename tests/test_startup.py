@@ -0,0 +1,81 @@
+"""Cold-start budget for the CLI and report scripts.
+
+Runs each entry point in a fresh interpreter with ``-X importtime`` and checks
+that heavy dependencies stay unimported and that the imports attributable to
+the entry point itself (everything after interpreter/site start-up) fit in the
+budget. Raise ``STARTUP_BUDGET_MS`` deliberately, not to silence a regression.
+"""
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time of the entry point's own imports, in milliseconds.
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", 100))
+
+HEAVY = ("litellm", "openai", "httpx", "tqdm", "rich", "dotenv")
+
+_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _importtime(code):
+    """Run ``code`` under -X importtime; return ({module: cumulative_us}, own_us)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    modules = {}
+    own_us = 0
+    after_site = False
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if not m:
+            continue
+        cumulative, indent, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        modules[name] = cumulative
+        if indent == 1:  # top-level import
+            if after_site:
+                own_us += cumulative
+            elif name == "site":
+                after_site = True
+    return modules, own_us
+
+
+def _run_script(path, *argv):
+    return (
+        "import runpy, sys\n"
+        f"sys.argv = [{path!r}, *{list(argv)!r}]\n"
+        "try:\n"
+        f"    runpy.run_path({path!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+    )
+
+
+def _import_script(path):
+    return f"import runpy\nrunpy.run_path({path!r}, run_name='not_main')\n"
+
+
+@pytest.mark.parametrize("code", [
+    _run_script("run.py", "--help"),
+    _import_script("scripts/report.py"),
+    _import_script("scripts/heatmap.py"),
+    _import_script("scripts/heatmap_accuracy.py"),
+], ids=["run.py --help", "report", "heatmap", "heatmap_accuracy"])
+def test_cold_start_within_budget(code):
+    modules, own_us = _importtime(code)
+    heavy = sorted(m for m in modules if m.split(".")[0] in HEAVY)
+    assert not heavy, f"heavy modules imported at start-up: {heavy[:10]}"
+    assert own_us / 1000 <= STARTUP_BUDGET_MS, (
+        f"start-up imports took {own_us / 1000:.1f} ms (budget {STARTUP_BUDGET_MS} ms)"
+    )
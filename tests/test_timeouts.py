@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from llm_arithmetic.timeouts import TimeoutPolicy
+
+
+def test_limits_follow_the_cell_quantile_within_floor_and_ceiling():
+    policy = TimeoutPolicy(ceiling=600, quantile=0.99, factor=3.0, floor=30.0, min_samples=5)
+    assert policy.limit(("int_add", 2)) == 600
+    assert policy.limits() is None
+    for seconds in [1.0, 1.0, 2.0, 2.0, 4.0]:
+        policy.observe(("int_add", 2), seconds)
+        policy.observe(("float_div", 10), seconds * 50)
+    assert policy.limit(("int_add", 2)) == 30.0  # 3 × 4 s, raised to the floor
+    assert policy.limit(("float_div", 10)) == 600  # 3 × 200 s, the ceiling
+    assert policy.limit(("int_add", 3)) == 600  # no data for this cell
+    assert policy.limits() == (30.0, 600)
+
+    # each earlier timeout doubles the limit, up to the ceiling
+    assert [policy.limit(("int_add", 2), n) for n in range(6)] == [30.0, 60.0, 120.0, 240.0, 480.0, 600]
+
+
+def test_seed_from_earlier_trials():
+    policy = TimeoutPolicy(ceiling=100, floor=1.0, min_samples=2)
+    policy.seed([
+        {"variant": "int_mul", "depth": 4, "latency": 2.0},
+        {"variant": "int_mul", "depth": 4, "latency": 5.0},
+        {"variant": "int_mul", "depth": 5, "latency": None},
+    ])
+    assert policy.limit(("int_mul", 4)) == 15.0
+    assert policy.limit(("int_mul", 5)) == 100
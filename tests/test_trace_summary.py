@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import runpy
+
+import pytest
+
+from llm_arithmetic.trace import NullTracer, Tracer, read_trace
+
+trace_summary = runpy.run_path(str(Path(__file__).resolve().parent.parent / "scripts" / "trace_summary.py"))
+
+
+def test_summary_accounts_for_spans(tmp_path):
+    path = tmp_path / "t.jsonl"
+    with Tracer(str(path), model="m", concurrency=2) as tracer:
+        tracer.record(0, "generate", 0.0, 0.001, variant="int_add", depth=2)
+        tracer.record(0, "attempt", 0.001, 1.0, variant="int_add", depth=2, attempt=1, ok=False,
+                      error_class="RateLimitError")
+        tracer.record(0, "backoff", 1.001, 0.5, seconds=0.5)
+        tracer.record(0, "attempt", 1.501, 2.0, variant="int_add", depth=2, attempt=2, ok=True)
+        tracer.record(0, "trial", 0.001, 3.6, variant="int_add", depth=2, attempts=2, classification="Correct")
+        tracer.record(1, "attempt", 0.001, 0.5, variant="int_mul", depth=4, attempt=1, ok=True)
+        tracer.record(1, "trial", 0.001, 0.6, variant="int_mul", depth=4, attempts=1, classification="Deviate")
+    header, spans = read_trace(str(path))
+    assert header["concurrency"] == 2
+    summary = trace_summary["summarize"](spans)
+    assert summary["trials"] == 2
+    assert summary["spans"]["attempt"]["count"] == 3
+    assert summary["attempt_outcomes"] == {"ok": 2, "RateLimitError": 1}
+    assert summary["slowest"][0]["trial"] == 0
+    assert summary["slowest"][0]["attempts"] == [(1.0, "RateLimitError"), (2.0, "ok")]
+    assert summary["effective_concurrency"] == pytest.approx(3.5 / 3.601)
+
+
+def test_null_tracer_is_silent():
+    tracer = NullTracer()
+    with tracer.span(0, "parse") as attrs:
+        attrs["x"] = 1
+    tracer.record(0, "attempt", 0, 1)
+
+
+def test_resumed_trace_continues_the_clock(tmp_path):
+    path = tmp_path / "t.jsonl"
+    with Tracer(str(path), model="m", concurrency=1) as tracer:
+        tracer.record(0, "attempt", 0.0, 2.0, variant="int_add", depth=2, attempt=1, ok=True)
+        tracer.record(0, "trial", 0.0, 2.0, variant="int_add", depth=2, attempts=1, classification="Correct")
+    with Tracer(str(path), model="m", concurrency=1) as tracer:
+        assert tracer.now() >= 2.0
+        start = tracer.now()
+        tracer.record(1, "attempt", start, 1.0, variant="int_add", depth=2, attempt=1, ok=True)
+        tracer.record(1, "trial", start, 1.0, variant="int_add", depth=2, attempts=1, classification="Correct")
+    header, spans = read_trace(str(path))
+    assert [h["session"] for h in header["sessions"]] == [0, 1]
+    offsets = [h["offset"] for h in header["sessions"]]
+    assert offsets[0] == 0.0 and offsets[1] >= 2.0
+    assert spans[2]["start"] >= spans[0]["start"] + spans[0]["dur"]  # no overlap with the first session
+    summary = trace_summary["summarize"](spans, offsets=offsets)
+    assert summary["sessions"] == 2
+    assert summary["wall"] == pytest.approx(3.0)
+    assert summary["effective_concurrency"] == pytest.approx(1.0)
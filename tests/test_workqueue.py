@@ -0,0 +1,103 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json
+import subprocess
+import time
+
+from llm_arithmetic import gen, io as io_
+from llm_arithmetic.mock_server import MockConfig, MockLLMServer
+from llm_arithmetic.workqueue import QueueServer, QueueWorker, RemoteQueue, WorkQueue
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_publish_claim_complete_and_first_result_wins(tmp_path):
+    q = WorkQueue(str(tmp_path / "q.db"))
+    assert q.publish([2, 3], 2, model="label") == 32
+    assert q.meta()["depths"] == [2, 3]
+    first = [q.claim("a") for _ in range(16)]
+    # round-robin publish order: the first 16 claims cover every cell once
+    assert len({(i["variant"], i["depth"]) for i in first}) == 16
+    assert q.counts()["leased"] == 16
+
+    assert q.complete(first[0]["id"], "a", {"n": 1}) is True
+    assert q.complete(first[0]["id"], "b", {"n": 2}) is False
+    assert q.records() == [{"n": 1}]
+    assert q.workers() == {"a": 1}
+
+
+def test_publish_is_reproducible_from_its_seed(tmp_path):
+    a, b, c = (WorkQueue(str(tmp_path / f"{name}.db")) for name in "abc")
+    a.publish([2, 5], 2, seed=7)
+    b.publish([2, 5], 2, seed=7)
+    c.publish([2, 5], 2)
+    items = [[q.claim("w") for _ in range(32)] for q in (a, b)]
+    assert items[0] == items[1]
+    first = items[0][0]
+    assert (first["lhs"], first["rhs"]) == tuple(str(x) for x in gen.slot_problem(7, first["variant"], first["depth"], 0))
+    assert a.meta()["seed"] == 7 and isinstance(c.meta()["seed"], int)
+
+
+def test_expired_leases_are_reissued_and_release_returns_them(tmp_path):
+    q = WorkQueue(str(tmp_path / "q.db"))
+    q.publish([2], 1)
+    crashed = q.claim("dead", lease_sec=0.05)
+    held = q.claim("alive", lease_sec=60)
+    time.sleep(0.1)
+    assert q.counts()["expired"] == 1
+    again = q.claim("b")
+    assert again["id"] == crashed["id"]
+    assert q.renew("alive") == 1
+    assert q.release("alive") == 1
+    assert q.claim("c")["id"] == held["id"]
+
+
+def test_remote_queue_and_worker_decode_operands(tmp_path):
+    q = WorkQueue(str(tmp_path / "q.db"))
+    q.publish([3], 1)
+    with QueueServer(q, host="127.0.0.1", port=0) as server:
+        worker = QueueWorker(RemoteQueue(server.url), worker="w1", lease_sec=30)
+        with worker:
+            item = worker.claim()
+            assert worker.meta()["trials_per_cell"] == 1
+            assert isinstance(item["lhs"], int) and item["variant"] == "int_add"
+            assert item["correct"] == item["lhs"] + item["rhs"]
+            assert worker.counts()["leased"] == 1
+        # leaving the context releases unfinished leases
+        assert q.counts()["pending"] == 8
+
+
+def test_local_worker_processes_share_the_grid_and_recover_a_crash(tmp_path):
+    db = tmp_path / "q.db"
+    q = WorkQueue(str(db))
+    q.publish([2], 2, model="mock-label")
+    for _ in range(3):
+        q.claim("crashed-worker", lease_sec=0.5)
+
+    with MockLLMServer(MockConfig(latency=0.01, seed=3)) as server:
+        cmd = [
+            sys.executable, "run.py", "--model", "openai/mock", "--queue", str(db),
+            "--output-dir", str(tmp_path), "--retry-delay", "0", "--concurrency", "2",
+            "--litellm-params", json.dumps(server.litellm_params()),
+        ]
+        workers = [
+            subprocess.Popen(cmd + ["--worker-id", f"w{i}"], cwd=ROOT,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            for i in range(2)
+        ]
+        for w in workers:
+            _, err = w.communicate(timeout=120)
+            assert w.returncode == 0, err
+
+    counts = q.counts()
+    assert counts["done"] == counts["total"] == 16
+    assert set(q.workers()) <= {"w0", "w1"}
+    out = tmp_path / "merged.jsonl"
+    assert q.export(str(out)) == 16
+    recs = io_.read_trials(str(out))
+    assert {r["model"] for r in recs} == {"mock-label"}
+    assert all(r["classification"] == "Correct" for r in recs)
+    assert not list(tmp_path.glob("openai_mock_*.jsonl"))